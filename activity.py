@@ -0,0 +1,217 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import pipeline
+import pitchshift
+from parallel_render import stage_context
+from render_cache import audio_fingerprint
+
+FRAME_SECONDS = 0.02
+# A frame is speech when its level is within THRESHOLD_DB of the loudest
+# frame and above FLOOR_DB (dB relative to full scale)
+THRESHOLD_DB = -40
+FLOOR_DB = -60
+# Pauses shorter than this stay inside one segment; every segment is
+# widened by PAD_SECONDS so consonants at the edges are kept
+MIN_GAP_SECONDS = 0.25
+PAD_SECONDS = 0.05
+# Above this share of active audio a gated render would save little
+MAX_ACTIVE_SHARE = 0.8
+SEGMENT_CACHE_SIZE = 32
+
+_segment_cache = OrderedDict()
+_segment_lock = threading.Lock()
+
+
+def frame_levels(audio, frame):
+    # RMS level in dBFS of every whole frame plus the trailing partial one,
+    # over all channels together
+    count = -(-len(audio) // frame)
+    padded = np.zeros((count * frame, *audio.shape[1:]), dtype=np.float32)
+    padded[:len(audio)] = audio
+    frames = padded.reshape(count, -1)
+    power = np.einsum("ij,ij->i", frames, frames) / frames.shape[1]
+    return 10 * np.log10(power + 1e-12)
+
+
+def detect(audio, sample_rate):
+    # Active segments as an (n, 2) array of [start, end) sample positions
+    frame = max(int(FRAME_SECONDS * sample_rate), 1)
+    if len(audio) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    levels = frame_levels(audio, frame)
+    active = levels > max(levels.max() + THRESHOLD_DB, FLOOR_DB)
+    edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    
+    pad = int(round(PAD_SECONDS * sample_rate / frame))
+    gap = int(round(MIN_GAP_SECONDS * sample_rate / frame))
+    keep = (starts[1:] - ends[:-1]) > gap + 2 * pad
+    starts = np.concatenate((starts[:1], starts[1:][keep])) - pad
+    ends = np.concatenate((ends[:-1][keep], ends[-1:])) + pad
+    segments = np.stack((starts, ends), axis=1).astype(np.int64) * frame
+    return np.clip(segments, 0, len(audio))
+
+
+def segment_map(audio, sample_rate, key=None):
+    # detect(), run once per clip; key defaults to the clip's fingerprint
+    key = (key if key is not None else audio_fingerprint(audio), sample_rate)
+    with _segment_lock:
+        segments = _segment_cache.get(key)
+        if segments is not None:
+            _segment_cache.move_to_end(key)
+            return segments
+    segments = detect(audio, sample_rate)
+    segments.flags.writeable = False
+    with _segment_lock:
+        _segment_cache[key] = segments
+        while len(_segment_cache) > SEGMENT_CACHE_SIZE:
+            _segment_cache.popitem(last=False)
+    return segments
+
+
+def active_share(segments, length):
+    return float(np.sum(segments[:, 1] - segments[:, 0])) / max(length, 1)
+
+
+def trim_bounds(audio, sample_rate, segments=None):
+    # First and last sample to keep when trimming leading and trailing silence
+    if segments is None:
+        segments = detect(audio, sample_rate)
+    if len(segments) == 0:
+        return 0, len(audio)
+    return int(segments[0, 0]), int(segments[-1, 1])
+
+
+def trim(audio, sample_rate, segments=None):
+    start, end = trim_bounds(audio, sample_rate, segments)
+    return audio[start:end]
+
+
+def stage_tail(name, func, args, sample_rate):
+    # Samples of silence a stage can fill (before, after) a segment: filter
+    # ringing on both sides (filtfilt is zero-phase), reverb and echo tails
+    # after, and one FFT frame either side of a phase-vocoder stretch
+    if name in ("pitch", "speed"):
+        n_fft = pitchshift.fft_size(sample_rate)
+        return n_fft, n_fft
+    before, after = stage_context(func, args)
+    return after, before
+
+
+def regions(segments, length, compiled):
+    # Segments widened by every stage's tail (in input samples) and merged
+    # where they overlap, so each region renders on its own
+    before = after = 0.0
+    scale = 1.0
+    for name, func, args in compiled.stages:
+        if isinstance(func, pipeline.FusedPointwise):
+            continue
+        head, tail = stage_tail(name, func, args, compiled.sample_rate)
+        before += head * scale
+        after += tail * scale
+        if name == "speed":
+            scale *= args[1]
+    merged = []
+    for start, end in segments:
+        low, high = max(int(start - before), 0), min(int(end + after + 1), length)
+        if merged and low <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], high)
+        else:
+            merged.append([low, high])
+    return merged
+
+
+def render_active(audio, sample_rate, params, segments=None, progress=None, key=None):
+    # Runs the chain only over the active regions of the clip. Silence
+    # between them is copied through (resampled for a speed change) and
+    # scaled with the rest of the clip, so rasp noise and the cost of
+    # every stage land on speech only. Filters, reverb and echo are linear,
+    # so their output matches the full render wherever the input is silent
+    # enough to count as zero; the phase vocoder restarts at every region.
+    # Like Pipeline.run, the regions render in the (channels, frames) layout.
+    compiled = pipeline.compile_params(params, sample_rate)
+    if segments is None:
+        segments = segment_map(audio, sample_rate, key)
+    if active_share(segments, len(audio)) > MAX_ACTIVE_SHARE:
+        return compiled.run(audio, progress)
+    
+    length = len(audio)
+    audio = pipeline.channels_first(audio)
+    speed = params.get("speed", 1.0)
+    out_length = length if speed == 1.0 else int(round(length / speed))
+    if speed == 1.0:
+        out = np.array(audio, dtype=np.float32)
+    else:
+        out = audio[..., np.minimum((np.arange(out_length) * speed).astype(np.int64), length - 1)]
+        out = out.astype(np.float32)
+    
+    fused = compiled.stages[-1][1]
+    ops = [step for step in fused.steps if step[0] not in ("normalize", "gain")]
+    pointwise = pipeline.FusedPointwise(ops, sample_rate) if ops else None
+    spans = regions(segments, length, compiled)
+    for i, (low, high) in enumerate(spans):
+        if progress is not None:
+            progress("regions", i / len(spans))
+        part = audio[..., low:high]
+        for name, func, args in compiled.stages[:-1]:
+            part = func(part, *args)
+        position = int(round(low / speed))
+        part = part[..., :max(out_length - position, 0)]
+        if pointwise is not None:
+            part = np.array(part, dtype=np.float32)
+            pointwise(part, part, offset=position)
+        out[..., position:position + part.shape[-1]] = part
+    
+    scale = fused.gain / (float(np.max(np.abs(out), initial=0.0)) + 0.0001) if fused.normalize else fused.gain
+    if scale != 1.0:
+        out *= np.float32(scale)
+    return pipeline.channels_last(out)
+
+
+def sparse_speech(seconds, sample_rate, share=0.25, seed=0):
+    # Phrases of synthetic voice between stretches of low room noise
+    from benchmark import synthetic_voice
+    
+    rng = np.random.default_rng(seed)
+    audio = (rng.standard_normal(int(seconds * sample_rate)) * 1e-4).astype(np.float32)
+    voice = synthetic_voice(seconds, sample_rate)
+    phrase = int(2 * sample_rate)
+    period = int(phrase / share)
+    for start in range(0, len(audio) - phrase, period):
+        audio[start:start + phrase] += voice[start:start + phrase]
+    return audio
+
+
+if __name__ == "__main__":
+    from presets import find_preset
+    
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    sample_rate = 44100
+    audio = sparse_speech(seconds, sample_rate)
+    started = time.perf_counter()
+    segments = segment_map(audio, sample_rate)
+    detect_ms = (time.perf_counter() - started) * 1000
+    print(f"{seconds:.0f}s clip: {len(segments)} segments, {active_share(segments, len(audio)):.0%} active, "
+          f"detected in {detect_ms:.1f} ms; trimmed to {len(trim(audio, sample_rate, segments)) / sample_rate:.1f}s")
+    for name in ("Heavy Bass", "Cathedral", "Chipmunk", "Robot", "Haunted House"):
+        params = find_preset(name)[1]
+        started = time.perf_counter()
+        pipeline.apply_params(audio, sample_rate, params)
+        full_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        render_active(audio, sample_rate, params, segments)
+        gated_seconds = time.perf_counter() - started
+        # Rasp noise is random and the phase vocoder restarts per region, so
+        # samples are compared on the rest of the chain only
+        linear = {k: v for k, v in params.items() if k not in ("raspy", "grit", "smoky", "pitch", "speed")}
+        error = np.max(np.abs(render_active(audio, sample_rate, linear, segments)
+                              - pipeline.apply_params(audio, sample_rate, linear)))
+        print(f"{name:<16} full {full_seconds:.2f}s  active only {gated_seconds:.2f}s  "
+              f"x{full_seconds / gated_seconds:.1f}  max error without pitch/speed {error:.1e}")
\ No newline at end of file
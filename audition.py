@@ -0,0 +1,110 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import activity
+import pipeline
+
+_source = None
+_source_memory = None
+_sample_rate = None
+_segments = None
+
+
+def _attach(name, shape, sample_rate, segments=None):
+    # Worker initializer: map the parent's float32 source once per process
+    global _source, _source_memory, _sample_rate, _segments
+    _source_memory = shared_memory.SharedMemory(name=name)
+    _source = np.ndarray(shape, dtype=np.float32, buffer=_source_memory.buf)
+    _source.flags.writeable = False
+    _sample_rate = sample_rate
+    _segments = segments
+
+
+def _render_preset(name, params):
+    start = time.perf_counter()
+    if _segments is not None:
+        audio = activity.render_active(_source, _sample_rate, params, _segments)
+    else:
+        audio = pipeline.apply_params(_source, _sample_rate, params)
+    return name, audio, time.perf_counter() - start
+
+
+class AuditionGrid:
+    # Renders a set of presets for one clip across a process pool. The clip
+    # is copied into shared memory once and every worker maps it instead of
+    # receiving a pickled copy per job; only the rendered output travels
+    # back. Finished renders are queued for the Tk thread to poll(). Given
+    # the clip's segment map, only its active regions are rendered.
+    def __init__(self, audio, sample_rate, presets, workers=None, segments=None):
+        self.sample_rate = sample_rate
+        self.segments = segments
+        self.presets = list(presets)
+        self.workers = workers or max((os.cpu_count() or 2) - 1, 1)
+        self.events = queue.Queue()
+        self.lock = threading.Lock()
+        self.remaining = len(self.presets)
+        self.started = None
+        
+        self.memory = shared_memory.SharedMemory(create=True, size=max(audio.size, 1) * 4)
+        self.source = np.ndarray(audio.shape, dtype=np.float32, buffer=self.memory.buf)
+        self.source[:] = audio
+        self.pool = None
+    
+    def start(self):
+        self.started = time.perf_counter()
+        if not self.presets:
+            self._release()
+            return
+        self.pool = ProcessPoolExecutor(max_workers=min(self.workers, len(self.presets)),
+                                        initializer=_attach,
+                                        initargs=(self.memory.name, self.source.shape, self.sample_rate,
+                                                  self.segments))
+        for name, params in self.presets:
+            future = self.pool.submit(_render_preset, name, params)
+            future.add_done_callback(lambda f, n=name, p=params: self._finished(f, n, p))
+    
+    def _finished(self, future, name, params):
+        if not future.cancelled():
+            error = future.exception()
+            if error is not None:
+                self.events.put(("error", name, params, error))
+            else:
+                _, audio, seconds = future.result()
+                self.events.put(("done", name, params, audio, seconds))
+        with self.lock:
+            self.remaining -= 1
+            last = self.remaining == 0
+        if last:
+            self._release()
+    
+    def _release(self):
+        # The source block goes once every job has finished or been cancelled
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+        self.source = None
+        self.memory.close()
+        self.memory.unlink()
+        self.events.put(("finished", time.perf_counter() - self.started))
+    
+    @property
+    def done(self):
+        with self.lock:
+            return self.remaining == 0
+    
+    def cancel(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+    
+    def poll(self):
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
\ No newline at end of file
@@ -0,0 +1,213 @@
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import soundfile as sf
+
+import activity
+import loader
+import parallel_render
+import pipeline
+import streaming
+from filterbank import default_bank
+from profiling import ChainProfile
+from preset_library import PresetError, load_library, merge_libraries
+from presets import find_preset, iter_presets
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".ogg")
+
+
+def collect_inputs(patterns):
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for entry in sorted(os.listdir(pattern)):
+                path = os.path.join(pattern, entry)
+                if os.path.isfile(path) and entry.lower().endswith(AUDIO_EXTENSIONS):
+                    files.append(path)
+        else:
+            files.extend(sorted(glob.glob(pattern, recursive=True)))
+    return list(dict.fromkeys(files))
+
+
+def slugify(name):
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def render_file(path, presets, output_dir, stream=False, profile=False, split_pool=None, workers=None,
+                skip_silence=False, trim=False, normalize=True):
+    start = time.perf_counter()
+    stem = os.path.splitext(os.path.basename(path))[0]
+    outputs = []
+    
+    if stream:
+        info = sf.info(path)
+        sample_rate, frames = info.samplerate, info.frames
+        for name, params in presets:
+            out_path = os.path.join(output_dir, f"{stem}__{slugify(name)}.wav")
+            stage_profile = ChainProfile(trace_memory=True) if profile else None
+            stats = streaming.render_file(path, out_path, params, normalize=normalize, profile=stage_profile)
+            outputs.append(output_entry(name, out_path, stats["frames_out"] / sample_rate, stage_profile))
+    else:
+        audio, sample_rate = loader.load(path)
+        frames = len(audio)
+        segments = activity.segment_map(audio, sample_rate) if skip_silence else None
+        for name, params in presets:
+            stage_profile = ChainProfile(trace_memory=True) if profile else None
+            if split_pool is not None:
+                processed = parallel_render.render_parallel(audio, sample_rate, params, split_pool, workers)
+            elif segments is not None:
+                processed = activity.render_active(audio, sample_rate, params, segments)
+            else:
+                processed = pipeline.apply_params(audio, sample_rate, params, stage_profile)
+            if trim:
+                processed = activity.trim(processed, sample_rate)
+            out_path = os.path.join(output_dir, f"{stem}__{slugify(name)}.wav")
+            sf.write(out_path, processed, sample_rate)
+            outputs.append(output_entry(name, out_path, len(processed) / sample_rate, stage_profile))
+    
+    return {
+        "source": path,
+        "sample_rate": sample_rate,
+        "duration": frames / sample_rate,
+        "outputs": outputs,
+        "seconds": time.perf_counter() - start,
+        "filter_cache": default_bank.stats(),
+    }
+
+
+def output_entry(preset, path, duration, profile=None):
+    entry = {"preset": preset, "path": path, "duration": duration}
+    if profile is not None:
+        profile.stop()
+        entry["profile"] = profile.as_dict()
+    return entry
+
+
+def run_batch(files, presets, output_dir, workers=None, stream=False, log=print, profile=False, split=False,
+              skip_silence=False, trim=False, normalize=True):
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    results = []
+    start = time.perf_counter()
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if split:
+            # One file at a time, each clip spread over the whole pool
+            jobs = [(path, lambda path=path: render_file(path, presets, output_dir, split_pool=pool,
+                                                         workers=workers, trim=trim)) for path in files]
+        else:
+            futures = {pool.submit(render_file, path, presets, output_dir, stream, profile,
+                                   skip_silence=skip_silence, trim=trim, normalize=normalize): path
+                       for path in files}
+            jobs = ((futures[future], future.result) for future in as_completed(futures))
+        for path, job in jobs:
+            try:
+                result = job()
+                log(f"[{len(results) + 1}/{len(files)}] {path} ({result['seconds']:.2f}s)")
+                if profile:
+                    for output in result["outputs"]:
+                        log(json.dumps({"source": path, "preset": output["preset"], **output["profile"]}))
+            except Exception as e:
+                result = {"source": path, "error": str(e)}
+                log(f"[{len(results) + 1}/{len(files)}] {path} FAILED: {e}")
+            results.append(result)
+    
+    elapsed = time.perf_counter() - start
+    rendered = [r for r in results if "error" not in r]
+    audio_seconds = sum(o["duration"] for r in rendered for o in r["outputs"])
+    summary = {
+        "files": len(files),
+        "failed": len(results) - len(rendered),
+        "presets": [name for name, _ in presets],
+        "workers": workers,
+        "stream": stream,
+        "normalize": normalize,
+        "split": split,
+        "skip_silence": skip_silence,
+        "trim": trim,
+        "profile": profile,
+        "elapsed": elapsed,
+        "files_per_second": len(rendered) / elapsed if elapsed else 0.0,
+        "audio_seconds_per_second": audio_seconds / elapsed if elapsed else 0.0,
+    }
+    
+    manifest = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "summary": summary,
+                "results": sorted(results, key=lambda r: r["source"])}
+    with open(os.path.join(output_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render voice presets over many files without the GUI")
+    parser.add_argument("inputs", nargs="*", help="input directories or glob patterns")
+    parser.add_argument("-p", "--preset", action="append", default=[], help="preset name (repeatable)")
+    parser.add_argument("-o", "--output", default="voice_effects_out", help="output directory")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--stream", action="store_true",
+                        help="render in fixed-size blocks with constant memory (causal filters); output is "
+                             "peak-normalized in a second pass, so nothing is written until the first finishes")
+    parser.add_argument("--no-normalize", action="store_true",
+                        help="with --stream, skip normalization and write blocks as they are rendered, "
+                             "at the preset's volume with clipping guarded")
+    parser.add_argument("--split", action="store_true",
+                        help="render one file at a time, each split into chunks across all workers")
+    parser.add_argument("--skip-silence", action="store_true",
+                        help="run the effects over active (non-silent) regions only")
+    parser.add_argument("--trim", action="store_true", help="trim leading and trailing silence from outputs")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every effect stage and record the breakdown in the manifest")
+    parser.add_argument("--presets", action="append", default=[], metavar="FILE",
+                        help="load a JSON or TOML preset library (repeatable)")
+    parser.add_argument("--list-presets", action="store_true", help="list preset names and exit")
+    args = parser.parse_args(argv)
+    
+    try:
+        library = merge_libraries(*(load_library(path) for path in args.presets))
+    except (OSError, PresetError) as e:
+        parser.error(str(e))
+    
+    if args.list_presets:
+        for category, name, _ in iter_presets(library):
+            print(f"{category}: {name}")
+        return 0
+    
+    if not args.inputs or not args.preset:
+        parser.error("at least one input and one --preset are required")
+    
+    try:
+        presets = [find_preset(name, library) for name in args.preset]
+    except KeyError as e:
+        parser.error(e.args[0])
+    
+    files = collect_inputs(args.inputs)
+    if not files:
+        parser.error("no input files matched")
+    
+    if args.split and (args.stream or args.profile):
+        parser.error("--split cannot be combined with --stream or --profile")
+    if args.skip_silence and (args.stream or args.split or args.profile):
+        parser.error("--skip-silence cannot be combined with --stream, --split or --profile")
+    if args.trim and args.stream:
+        parser.error("--trim cannot be combined with --stream")
+    if args.no_normalize and not args.stream:
+        parser.error("--no-normalize needs --stream")
+    
+    summary = run_batch(files, presets, args.output, args.workers, args.stream, profile=args.profile,
+                        split=args.split, skip_silence=args.skip_silence, trim=args.trim,
+                        normalize=not args.no_normalize)
+    print(f"{summary['files'] - summary['failed']}/{summary['files']} files in {summary['elapsed']:.2f}s "
+          f"with {summary['workers']} workers: {summary['files_per_second']:.2f} files/s, "
+          f"{summary['audio_seconds_per_second']:.1f} audio-s/s")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,271 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+import effects
+import pipeline
+from presets import iter_presets
+
+DURATIONS = (1, 60, 3600)
+SAMPLE_RATES = (22050, 44100, 48000, 96000)
+REGRESSION_THRESHOLD = 1.10
+# Chunked stages need some working memory that doesn't grow with the clip
+MEMORY_ALLOWANCE = 32 * 1024 * 1024
+# Smaller allocations are interpreter bookkeeping rather than buffers
+ALLOCATION_MIN = 64 * 1024
+
+EFFECTS = {
+    "change_pitch": lambda sr: (effects.change_pitch, (sr, 1.5)),
+    "change_speed": lambda sr: (effects.change_speed, (sr, 1.25)),
+    "bass_boost": lambda sr: (effects.bass_boost, (sr, 2.0)),
+    "bandpass_filter": lambda sr: (effects.bandpass_filter, (sr, 300, 3400)),
+    "robot_effect": lambda sr: (effects.robot_effect, (sr,)),
+    "add_reverb": lambda sr: (effects.add_reverb, (sr, 0.4)),
+    "add_rasp": lambda sr: (effects.add_rasp, (0.5,)),
+    "add_distortion": lambda sr: (effects.add_distortion, (0.5,)),
+    "normalize": lambda sr: (effects.normalize, ()),
+}
+
+
+def synthetic_voice(seconds, sample_rate, seed=0):
+    # Harmonic stack with vibrato plus breath noise, roughly speech-shaped
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / np.float32(sample_rate)
+    phase = 2 * np.pi * (140 * t + 3 * np.sin(2 * np.pi * 5 * t) / (2 * np.pi * 5))
+    audio = np.zeros(len(t), dtype=np.float32)
+    for k in range(1, 9):
+        audio += np.sin(k * phase, dtype=np.float32) / k
+    audio *= np.float32(0.3)
+    audio += rng.standard_normal(len(t), dtype=np.float32) * np.float32(0.01)
+    return audio
+
+
+def cases(names=None, presets=True):
+    for name in EFFECTS:
+        if names is None or name in names:
+            yield "effect", name, lambda audio, sr, name=name: _call_effect(name, audio, sr)
+    if presets:
+        for _, name, params in iter_presets():
+            if names is None or name in names:
+                yield "preset", name, lambda audio, sr, params=params: pipeline.apply_params(audio, sr, params)
+
+
+def _call_effect(name, audio, sample_rate):
+    func, args = EFFECTS[name](sample_rate)
+    return func(audio, *args)
+
+
+def best_time(run, audio, sample_rate, repeat=1, axis=0):
+    # Warm caches (filter designs, impulse responses, windows) on one second
+    # (along the time axis) so they are not billed to the timed call
+    run(audio.take(np.arange(min(sample_rate, audio.shape[axis])), axis=axis), sample_rate)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(audio, sample_rate)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(run, audio, sample_rate):
+    tracemalloc.start()
+    try:
+        run(audio, sample_rate)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def count_allocations(run, audio, sample_rate, minimum=ALLOCATION_MIN):
+    # Steps through the call one bytecode at a time and counts the ones
+    # during which traced memory peaked at least `minimum` bytes above where
+    # it started, i.e. operations that allocated a buffer. Several buffers
+    # allocated inside one numpy call count once.
+    count = 0
+    
+    def trace(frame, event, arg):
+        nonlocal count
+        current, peak = tracemalloc.get_traced_memory()
+        if peak - trace.before >= minimum:
+            count += 1
+        tracemalloc.reset_peak()
+        trace.before = tracemalloc.get_traced_memory()[0]
+        if event == "call":
+            frame.f_trace_opcodes = True
+        return trace
+    
+    tracemalloc.start()
+    trace.before = 0
+    sys.settrace(trace)
+    try:
+        run(audio, sample_rate)
+    finally:
+        sys.settrace(None)
+        tracemalloc.stop()
+    return count
+
+
+def measure(run, audio, sample_rate, repeat=1, axis=0):
+    best = best_time(run, audio, sample_rate, repeat, axis)
+    
+    # Memory is measured on separate calls since tracing slows numpy down
+    return best, peak_memory(run, audio, sample_rate), count_allocations(run, audio, sample_rate)
+
+
+def run_benchmark(durations=DURATIONS, sample_rates=SAMPLE_RATES, names=None, presets=True,
+                  repeat=1, log=print):
+    results = []
+    for sample_rate in sample_rates:
+        for seconds in durations:
+            audio = synthetic_voice(seconds, sample_rate)
+            for kind, name, run in cases(names, presets):
+                elapsed, peak, allocations = measure(run, audio, sample_rate, repeat)
+                result = {"kind": kind, "name": name, "sample_rate": sample_rate, "duration": seconds,
+                          "seconds": elapsed, "realtime_factor": seconds / elapsed,
+                          "peak_bytes": peak, "peak_over_signal": peak / audio.nbytes,
+                          "allocations": allocations}
+                results.append(result)
+                log(format_result(result))
+            del audio
+    return results
+
+
+def multichannel(audio, channels):
+    # The same voice at different delays and gains per channel
+    return np.stack([np.roll(audio, 997 * c) * np.float32(1 - 0.05 * c) for c in range(channels)], axis=1)
+
+
+def channel_benchmark(channels=8, seconds=30, sample_rate=44100, names=None, presets=True, repeat=1, log=print):
+    # Cost of one batched N-channel render against one mono render of the
+    # same length; running the channels one by one would cost N. Presets get
+    # the (frames, channels) clip and pay for the pipeline's two transposes;
+    # single effects get the (channels, frames) rows they see inside it.
+    mono = synthetic_voice(seconds, sample_rate)
+    wide = multichannel(mono, channels)
+    rows = pipeline.channels_first(wide)
+    results = []
+    for kind, name, run in cases(names, presets):
+        mono_seconds = best_time(run, mono, sample_rate, repeat)
+        if kind == "effect":
+            elapsed, peak, allocations = measure(run, rows, sample_rate, repeat, axis=-1)
+        else:
+            elapsed, peak, allocations = measure(run, wide, sample_rate, repeat)
+        result = {"kind": kind, "name": name, "sample_rate": sample_rate, "duration": seconds,
+                  "channels": channels, "mono_seconds": mono_seconds, "seconds": elapsed,
+                  "realtime_factor": seconds / elapsed, "cost_ratio": elapsed / mono_seconds,
+                  "peak_bytes": peak, "peak_over_signal": peak / wide.nbytes, "allocations": allocations}
+        results.append(result)
+        log(f"{kind:<6} {name:<22} mono {mono_seconds:7.3f}s  {channels} channels {elapsed:7.3f}s "
+            f"= {result['cost_ratio']:4.1f}x mono, peak {peak / 1e6:.1f} MB, {allocations} allocations")
+    return results
+
+
+def format_result(r):
+    return (f"{r['kind']:<6} {r['name']:<22} {r['sample_rate']:>6} Hz {r['duration']:>6g}s: "
+            f"{r['seconds']:8.3f}s = {r['realtime_factor']:8.1f}x realtime, "
+            f"peak {r['peak_bytes'] / 1e6:9.1f} MB ({r['peak_over_signal']:.1f}x signal), "
+            f"{r['allocations']} allocations")
+
+
+def result_key(r):
+    return (r["kind"], r["name"], r["sample_rate"], r["duration"], r.get("channels", 1))
+
+
+def compare(baseline, results, threshold=REGRESSION_THRESHOLD, log=print):
+    # Ratios above the threshold in time, peak memory or allocation count are
+    # regressions; baselines from before allocations were counted skip that
+    previous = {result_key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = previous.get(result_key(r))
+        if old is None:
+            continue
+        time_ratio = r["seconds"] / old["seconds"]
+        memory_ratio = r["peak_bytes"] / max(old["peak_bytes"], 1)
+        allocation_ratio = r["allocations"] / max(old.get("allocations", r["allocations"]), 1)
+        flag = time_ratio > threshold or memory_ratio > threshold or allocation_ratio > threshold
+        if flag:
+            regressions.append(r)
+        log(f"{'REGRESSION' if flag else 'ok':<10} {r['kind']:<6} {r['name']:<22} {r['sample_rate']:>6} Hz "
+            f"{r['duration']:>6g}s: time x{time_ratio:.2f}, peak x{memory_ratio:.2f}, "
+            f"allocations x{allocation_ratio:.2f}")
+    return regressions
+
+
+def over_budget(results, ratio, allowance=MEMORY_ALLOWANCE, log=print):
+    # A render should hold about two clip-sized buffers at once: the
+    # previous stage's output and the next one. On short clips the allowance
+    # is most of the budget, so a pass there says little and is reported.
+    failures = []
+    short = 0
+    for r in results:
+        signal_bytes = r["peak_bytes"] / r["peak_over_signal"] if r["peak_over_signal"] else 0
+        if r["peak_bytes"] > ratio * signal_bytes + allowance:
+            failures.append(r)
+            log(f"OVER BUDGET {r['kind']:<6} {r['name']:<22} {r['sample_rate']:>6} Hz {r['duration']:>6g}s: "
+                f"peak {r['peak_over_signal']:.1f}x signal")
+        elif ratio * signal_bytes < allowance:
+            short += 1
+    if short:
+        log(f"{short} case(s) only checked against the {allowance / 2 ** 20:g} MB allowance; "
+            f"use clips above {allowance / ratio / 2 ** 20:.0f} MB for the ratio to matter")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every effect and preset on synthetic voice.")
+    parser.add_argument("-d", "--duration", type=float, action="append",
+                        help=f"signal length in seconds (repeatable, default {DURATIONS})")
+    parser.add_argument("-r", "--rate", type=int, action="append",
+                        help=f"sample rate in Hz (repeatable, default {SAMPLE_RATES})")
+    parser.add_argument("-e", "--only", action="append", help="effect or preset name (repeatable)")
+    parser.add_argument("--no-presets", action="store_true", help="benchmark single effects only")
+    parser.add_argument("--repeat", type=int, default=1, help="timed calls per case, best is kept")
+    parser.add_argument("-o", "--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to check for regressions")
+    parser.add_argument("--memory-budget", type=float, metavar="RATIO",
+                        help="fail when a render peaks above RATIO x the clip size "
+                             f"(plus {MEMORY_ALLOWANCE // 2 ** 20} MB working memory)")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="slowdown or memory ratio counted as a regression")
+    parser.add_argument("--channels", type=int, metavar="N",
+                        help="compare N-channel renders against mono instead (first duration and rate)")
+    args = parser.parse_args(argv)
+    
+    if args.channels:
+        results = channel_benchmark(args.channels, (args.duration or [30])[0], (args.rate or [44100])[0],
+                                    args.only, not args.no_presets, args.repeat)
+    else:
+        results = run_benchmark(args.duration or DURATIONS, args.rate or SAMPLE_RATES, args.only,
+                                not args.no_presets, args.repeat)
+    
+    if args.output:
+        report = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    
+    failed = False
+    if args.memory_budget is not None:
+        failed = bool(over_budget(results, args.memory_budget))
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        failed = bool(compare(baseline, results, args.threshold)) or failed
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
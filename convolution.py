@@ -0,0 +1,173 @@
+import functools
+
+import numpy as np
+import soundfile as sf
+from scipy import signal
+
+from fft_batch import irfft, rfft
+from filterbank import get_sos
+
+ROOMS = {
+    "room": {"decay": 0.4, "predelay": 0.005, "damping": 8000},
+    "hall": {"decay": 2.2, "predelay": 0.025, "damping": 6000},
+    "cathedral": {"decay": 4.5, "predelay": 0.04, "damping": 5000},
+    "haunted": {"decay": 3.0, "predelay": 0.06, "damping": 2500},
+    "stadium": {"decay": 2.8, "predelay": 0.08, "damping": 4000},
+}
+
+# Preset flags that pick a space; anything else gets a plain room whose
+# decay grows with the reverb amount.
+ROOM_FLAGS = (
+    ("holy", "cathedral"),
+    ("spooky", "haunted"),
+    ("spacious", "hall"),
+    ("large_space", "stadium"),
+)
+
+PARTITION_SIZE = 1024
+
+
+def room_spec(params, sample_rate):
+    # Hashable description of the impulse response a preset wants
+    if params.get("ir"):
+        return ("file", params["ir"], sample_rate)
+    room = params.get("room")
+    for flag, name in ROOM_FLAGS:
+        if room is None and params.get(flag):
+            room = name
+    if room is None:
+        return ("room", "room", 0.3 + 1.5 * params.get("reverb", 0.0), sample_rate)
+    return ("room", room, ROOMS[room]["decay"], sample_rate)
+
+
+def synthesize_ir(sample_rate, decay, predelay=0.01, damping=6000, seed=0):
+    length = int(decay * sample_rate)
+    t = np.arange(length) / sample_rate
+    noise = np.random.default_rng(seed).standard_normal(length)
+    noise = signal.sosfilt(get_sos('lowpass', 2, min(damping, sample_rate * 0.45), sample_rate), noise)
+    # -60 dB at the decay time
+    tail = noise * np.exp(-6.908 * t / decay)
+    ir = np.concatenate([np.zeros(int(predelay * sample_rate)), tail])
+    return ir / np.sqrt(np.sum(ir ** 2))
+
+
+def load_ir(path, sample_rate):
+    ir, ir_rate = sf.read(path, dtype='float64')
+    if ir.ndim > 1:
+        ir = ir.mean(axis=1)
+    if ir_rate != sample_rate:
+        g = np.gcd(int(ir_rate), int(sample_rate))
+        ir = signal.resample_poly(ir, sample_rate // g, ir_rate // g)
+    return ir / np.sqrt(np.sum(ir ** 2))
+
+
+@functools.lru_cache(maxsize=32)
+def impulse_response(spec):
+    if spec[0] == "file":
+        _, path, sample_rate = spec
+        ir = load_ir(path, sample_rate)
+    else:
+        _, room, decay, sample_rate = spec
+        settings = dict(ROOMS[room], decay=decay)
+        ir = synthesize_ir(sample_rate, **settings)
+    ir.flags.writeable = False
+    return ir
+
+
+@functools.lru_cache(maxsize=32)
+def ir_spectrum(spec, n_fft):
+    spectrum = np.fft.rfft(impulse_response(spec), n_fft).astype(np.complex64)
+    spectrum.flags.writeable = False
+    return spectrum
+
+
+@functools.lru_cache(maxsize=32)
+def ir_partitions(spec, block):
+    ir = impulse_response(spec)
+    count = -(-len(ir) // block)
+    padded = np.zeros(count * block)
+    padded[:len(ir)] = ir
+    partitions = np.fft.rfft(padded.reshape(count, block), 2 * block, axis=1)
+    partitions.flags.writeable = False
+    return partitions
+
+
+def fft_convolve(audio, spec, batch=None):
+    # Overlap-add against the cached IR spectrum; output keeps the input
+    # length. (channels, frames) audio adds the channels as a leading batch
+    # axis of the same FFT.
+    ir_length = len(impulse_response(spec))
+    n_fft = 1 << int(np.ceil(np.log2(2 * ir_length)))
+    block = n_fft - ir_length + 1
+    channels = audio.shape[:-1]
+    length = audio.shape[-1]
+    spectrum = ir_spectrum(spec, n_fft)
+    # Keep the batched FFT working set around a million samples
+    batch = batch or max(1, (1 << 20) // (n_fft * int(np.prod(channels))))
+    
+    out = np.zeros((*channels, length), dtype=np.float32)
+    for start in range(0, length, block * batch):
+        chunk = audio[..., start:start + block * batch]
+        count = -(-chunk.shape[-1] // block)
+        frames = np.zeros((*channels, count, block), dtype=np.float32)
+        frames.reshape(*channels, count * block)[..., :chunk.shape[-1]] = chunk
+        segments = irfft(rfft(frames, n_fft, axis=-1) * spectrum, n_fft, axis=-1)
+        for i in range(count):
+            offset = start + i * block
+            end = min(offset + n_fft, length)
+            out[..., offset:end] += segments[..., i, :end - offset]
+    return out
+
+
+class PartitionedConvolver:
+    # Uniformly partitioned convolution for block processing. Input spectra
+    # go into a frequency-domain delay line; each output block is the sum
+    # of the last len(partitions) input spectra times the IR partitions.
+    # Blocks are (frames,) or (channels, frames); the layout is taken from
+    # the first block.
+    def __init__(self, spec, block=PARTITION_SIZE):
+        self.block = block
+        self.partitions = ir_partitions(spec, block)
+        self._set_channels(())
+        self.consumed = 0
+        self.produced = 0
+    
+    def _set_channels(self, channels):
+        self.channels = channels
+        self.history = np.zeros((*channels, len(self.partitions) - 1, self.block + 1), dtype=complex)
+        self.previous = np.zeros((*channels, self.block))
+        self.pending = np.zeros((*channels, 0))
+    
+    def process(self, block):
+        if self.consumed == 0 and np.ndim(block) > 1:
+            self._set_channels(block.shape[:-1])
+        self.consumed += block.shape[-1]
+        self.pending = np.concatenate([self.pending, block], axis=-1)
+        count = self.pending.shape[-1] // self.block
+        if count == 0:
+            return np.zeros((*self.channels, 0))
+        
+        frames = self.pending[..., :count * self.block].reshape(*self.channels, count, self.block)
+        self.pending = self.pending[..., count * self.block:]
+        earlier = np.concatenate([self.previous[..., None, :], frames[..., :-1, :]], axis=-2)
+        windows = np.concatenate([earlier, frames], axis=-1)
+        self.previous = frames[..., -1, :].copy()
+        
+        spectra = np.concatenate([self.history, np.fft.rfft(windows, axis=-1)], axis=-2)
+        depth = self.history.shape[-2]
+        # Loop over partitions, vectorised across every block in this call
+        acc = np.zeros((*self.channels, count, self.block + 1), dtype=complex)
+        for p, partition in enumerate(self.partitions):
+            acc += spectra[..., depth - p:depth - p + count, :] * partition
+        self.history = spectra[..., spectra.shape[-2] - depth:, :]
+        
+        out = np.fft.irfft(acc, axis=-1)[..., self.block:].reshape(*self.channels, -1)
+        self.produced += out.shape[-1]
+        return out
+    
+    def flush(self):
+        keep = self.consumed - self.produced
+        out = self.process(np.zeros((*self.channels, self.block)))[..., :keep]
+        self.consumed -= self.block
+        self.produced = self.consumed
+        return out
\ No newline at end of file
@@ -0,0 +1,159 @@
+import numpy as np
+from scipy import signal
+
+from convolution import fft_convolve, room_spec
+from filterbank import get_sos
+from pitchshift import pitch_shift, time_stretch
+
+FILTER_ORDER = 4
+BASS_CUTOFF = 200
+ECHO_DELAY = 0.25
+ECHO_DECAY = 0.5
+CHUNK_SIZE = 1 << 16
+
+# Every effect returns a new float32 array and leaves its input untouched;
+# working memory beyond the output is bounded by CHUNK_SIZE. Audio is
+# (frames,) or contiguous (channels, frames) rows, time on the last axis
+# (pipeline.Pipeline.run transposes (frames, channels) clips once on the
+# way in and out), and every channel goes through the same call. A chunk
+# holds CHUNK_SIZE samples over all channels, so the working set of a
+# multichannel call stays the size of a mono one.
+DTYPE = np.float32
+
+
+def chunk_frames(audio, chunk=CHUNK_SIZE):
+    return max(chunk // int(np.prod(audio.shape[:-1])), 1)
+
+
+def filtfilt(sos, audio, chunk=CHUNK_SIZE):
+    # Same result as signal.sosfiltfilt with odd padding, but both passes run
+    # in chunks carrying the filter state, writing into one float32 output
+    # instead of allocating padded full-length copies. Clips no longer than
+    # the default padding are padded by as much as they have.
+    edge = 3 * (2 * len(sos) + 1 - min((sos[:, 2] == 0).sum(), (sos[:, 5] == 0).sum()))
+    length = audio.shape[-1]
+    if length == 0:
+        return np.array(audio, dtype=DTYPE)
+    if length <= edge:
+        return signal.sosfiltfilt(sos, audio, padlen=length - 1).astype(DTYPE)
+    
+    zi = signal.sosfilt_zi(sos).reshape(len(sos), *(1,) * (audio.ndim - 1), 2)
+    left = 2 * audio[..., :1] - audio[..., edge:0:-1]
+    right = 2 * audio[..., -1:] - audio[..., -2:-edge - 2:-1]
+    out = np.empty(audio.shape, dtype=DTYPE)
+    chunk = chunk_frames(audio, chunk)
+    
+    _, state = signal.sosfilt(sos, left, zi=zi * left[..., :1])
+    for start in range(0, length, chunk):
+        out[..., start:start + chunk], state = signal.sosfilt(sos, audio[..., start:start + chunk], zi=state)
+    tail, _ = signal.sosfilt(sos, right, zi=state)
+    
+    _, state = signal.sosfilt(sos, tail[..., ::-1], zi=zi * tail[..., -1:])
+    for end in range(length, 0, -chunk):
+        start = max(end - chunk, 0)
+        filtered, state = signal.sosfilt(sos, out[..., start:end][..., ::-1], zi=state)
+        out[..., start:end] = filtered[..., ::-1]
+    return out
+
+
+def change_pitch(audio, sample_rate, factor):
+    return pitch_shift(audio, factor, sample_rate)
+
+
+def change_speed(audio, sample_rate, factor):
+    return time_stretch(audio, factor, sample_rate)
+
+
+def bass_boost(audio, sample_rate, factor):
+    return tone(audio, sample_rate, 'lowpass', BASS_CUTOFF, factor - 1)
+
+
+def tone(audio, sample_rate, btype, cutoff, gain):
+    # Adds gain times one band back onto the signal
+    band = filtfilt(get_sos(btype, FILTER_ORDER, cutoff, sample_rate), audio)
+    band *= gain
+    band += audio
+    return band
+
+
+def lowpass_filter(audio, sample_rate, cutoff):
+    return filtfilt(get_sos('lowpass', FILTER_ORDER, cutoff, sample_rate), audio)
+
+
+def bandpass_filter(audio, sample_rate, lowcut, highcut):
+    return filtfilt(get_sos('bandpass', FILTER_ORDER, (lowcut, highcut), sample_rate), audio)
+
+
+def robot_effect(audio, sample_rate):
+    return ring_modulate(audio, sample_rate, 30, 1.0)
+
+
+def ring_modulate(audio, sample_rate, freq, mix):
+    out = np.empty(audio.shape, dtype=DTYPE)
+    chunk = chunk_frames(audio)
+    for start in range(0, audio.shape[-1], chunk):
+        end = min(start + chunk, audio.shape[-1])
+        carrier = np.sin(2 * np.pi * freq * np.arange(start, end) / sample_rate)
+        out[..., start:end] = audio[..., start:end] * (1 - mix + mix * carrier)
+    return out
+
+
+def add_reverb(audio, sample_rate, amount, room=None):
+    spec = room or room_spec({"reverb": amount}, sample_rate)
+    wet = fft_convolve(audio, spec)
+    wet *= amount
+    wet += audio
+    return wet
+
+
+def echo_taps(sample_rate, amount, delay=ECHO_DELAY):
+    # (offset, gain) per repeat, dropping repeats quieter than -40 dB
+    taps = []
+    gain = amount
+    while gain >= 0.01 and len(taps) < 16:
+        taps.append((int(delay * sample_rate) * (len(taps) + 1), gain))
+        gain *= ECHO_DECAY
+    return taps
+
+
+def add_echo(audio, sample_rate, amount):
+    out = np.array(audio, dtype=DTYPE)
+    length = audio.shape[-1]
+    chunk = chunk_frames(audio)
+    scratch = np.empty((*audio.shape[:-1], min(chunk, length)), dtype=DTYPE)
+    for offset, gain in echo_taps(sample_rate, amount):
+        for start in range(offset, length, chunk):
+            end = min(start + chunk, length)
+            delayed = np.multiply(audio[..., start - offset:end - offset], gain, out=scratch[..., :end - start])
+            out[..., start:end] += delayed
+    return out
+
+
+def add_drive(audio, amount):
+    drive = 1 + 3 * amount
+    out = np.multiply(audio, drive, dtype=DTYPE)
+    np.tanh(out, out=out)
+    out *= 1 / np.tanh(drive)
+    return out
+
+
+def add_rasp(audio, amount):
+    rng = np.random.default_rng()
+    out = np.empty(audio.shape, dtype=DTYPE)
+    step = chunk_frames(audio)
+    for start in range(0, audio.shape[-1], step):
+        chunk = audio[..., start:start + step]
+        noise = rng.standard_normal(chunk.shape, dtype=DTYPE) * (0.05 * amount)
+        distorted = np.tanh(chunk * (1 + amount))
+        out[..., start:start + chunk.shape[-1]] = chunk * (1 - amount * 0.3) + distorted * amount * 0.3 + noise
+    return out
+
+
+def add_distortion(audio, amount):
+    out = np.multiply(audio, 1 + amount * 2, dtype=DTYPE)
+    np.tanh(out, out=out)
+    return out
+
+
+def normalize(audio):
+    return audio / (np.max(np.abs(audio)) + 0.0001)
\ No newline at end of file
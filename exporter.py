@@ -0,0 +1,140 @@
+import os
+import queue
+import threading
+
+import numpy as np
+import soundfile as sf
+
+CHUNK_FRAMES = 1 << 16
+
+# Container per extension, and which subtypes each one is offered with
+CONTAINERS = {
+    "WAV": (".wav", ("PCM_16", "PCM_24", "FLOAT")),
+    "FLAC": (".flac", ("PCM_16", "PCM_24")),
+    "OGG": (".ogg", ("VORBIS",)),
+}
+
+# Integer subtypes get quantized here (optionally with TPDF dither) and are
+# written as integers, so libsndfile does no further rounding
+INTEGER_SUBTYPES = {
+    "PCM_16": (np.int16, 2 ** 15, 0),
+    "PCM_24": (np.int32, 2 ** 23, 8),
+}
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class ExportTarget:
+    def __init__(self, path, format, subtype, dither=True):
+        self.path = path
+        self.format = format
+        self.subtype = subtype
+        self.dither = dither and subtype in INTEGER_SUBTYPES
+        self.rng = np.random.default_rng()
+        self.file = None
+    
+    def open(self, sample_rate, channels):
+        self.file = sf.SoundFile(self.path, "w", samplerate=sample_rate, channels=channels,
+                                 format=self.format, subtype=self.subtype)
+    
+    def write(self, block):
+        if self.subtype not in INTEGER_SUBTYPES:
+            self.file.write(block)
+            return
+        dtype, scale, shift = INTEGER_SUBTYPES[self.subtype]
+        scaled = block * float(scale - 1)
+        if self.dither:
+            # Triangular noise of +-1 LSB decorrelates the rounding error
+            scaled += self.rng.random(block.shape)
+            scaled -= self.rng.random(block.shape)
+        quantized = np.clip(np.round(scaled), -scale, scale - 1).astype(np.int32)
+        if shift:
+            quantized <<= shift
+        self.file.write(quantized.astype(dtype, copy=False))
+    
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def targets_for(base_path, containers, depth="PCM_16", dither=True):
+    # One target per container, using the requested depth where the
+    # container has it and its closest option otherwise
+    targets = []
+    for name in containers:
+        extension, subtypes = CONTAINERS[name]
+        subtype = depth if depth in subtypes else subtypes[-1] if depth == "FLOAT" else subtypes[0]
+        targets.append(ExportTarget(base_path + extension, name, subtype, dither))
+    return targets
+
+
+def export(audio, sample_rate, targets, progress=None, chunk=CHUNK_FRAMES):
+    # Single pass over the render: each chunk is written to every target
+    audio = np.asarray(audio, dtype=np.float32)
+    channels = 1 if audio.ndim == 1 else audio.shape[1]
+    try:
+        for target in targets:
+            target.open(sample_rate, channels)
+        for start in range(0, len(audio), chunk):
+            if progress is not None:
+                progress(start / max(len(audio), 1))
+            block = audio[start:start + chunk]
+            for target in targets:
+                target.write(block)
+    except BaseException:
+        for target in targets:
+            target.close()
+            if os.path.exists(target.path):
+                os.remove(target.path)
+        raise
+    for target in targets:
+        target.close()
+    return [{"path": t.path, "format": t.format, "subtype": t.subtype, "dither": t.dither,
+             "bytes": os.path.getsize(t.path)} for t in targets]
+
+
+class Exporter:
+    # Runs one export on a background thread. Events are queued for the Tk
+    # thread to pick up with poll(); cancel() removes partly written files.
+    def __init__(self, audio, sample_rate, targets):
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.targets = targets
+        self.events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+    
+    def start(self):
+        self.thread.start()
+    
+    def cancel(self):
+        self.cancel_event.set()
+    
+    @property
+    def busy(self):
+        return self.thread.is_alive()
+    
+    def poll(self):
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+    
+    def _progress(self, fraction):
+        if self.cancel_event.is_set():
+            raise ExportCancelled()
+        self.events.put(("progress", fraction))
+    
+    def _run(self):
+        try:
+            results = export(self.audio, self.sample_rate, self.targets, self._progress)
+            self.events.put(("done", results))
+        except ExportCancelled:
+            self.events.put(("cancelled",))
+        except Exception as e:
+            self.events.put(("error", e))
\ No newline at end of file
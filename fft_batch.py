@@ -0,0 +1,30 @@
+import multiprocessing
+import os
+
+import numpy as np
+from scipy import fft as scipy_fft
+
+# Frames of multichannel audio arrive as (channels, frames, size) stacks.
+# scipy.fft splits one such batched transform across threads, so the extra
+# channels run on the other cores inside a single call. Mono stacks keep
+# numpy's transform.
+FFT_WORKERS = os.cpu_count() or 1
+
+
+def fft_workers():
+    # Pools (batch, audition, parallel_render, the service) already run one
+    # process per core, so their workers transform on a single thread
+    # rather than putting cores x cores threads on the machine
+    return 1 if multiprocessing.parent_process() is not None else FFT_WORKERS
+
+
+def rfft(x, n=None, axis=-1):
+    if x.ndim > 2:
+        return scipy_fft.rfft(x, n, axis=axis, workers=fft_workers())
+    return np.fft.rfft(x, n, axis=axis)
+
+
+def irfft(x, n=None, axis=-1):
+    if x.ndim > 2:
+        return scipy_fft.irfft(x, n, axis=axis, workers=fft_workers())
+    return np.fft.irfft(x, n, axis=axis)
\ No newline at end of file
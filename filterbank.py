@@ -0,0 +1,67 @@
+import threading
+from collections import OrderedDict
+
+from scipy import signal
+
+
+class FilterBank:
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.filters = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def sos(self, btype, order, cutoff, sample_rate):
+        if isinstance(cutoff, (tuple, list)):
+            cutoff = tuple(float(c) for c in cutoff)
+        else:
+            cutoff = float(cutoff)
+        key = (btype, int(order), cutoff, int(sample_rate))
+        
+        with self.lock:
+            sos = self.filters.get(key)
+            if sos is not None:
+                self.filters.move_to_end(key)
+                self.hits += 1
+                return sos
+            self.misses += 1
+        
+        nyquist = sample_rate / 2
+        if isinstance(cutoff, tuple):
+            normalized = [c / nyquist for c in cutoff]
+        else:
+            normalized = cutoff / nyquist
+        sos = signal.butter(order, normalized, btype=btype, output='sos')
+        
+        with self.lock:
+            self.filters[key] = sos
+            self.filters.move_to_end(key)
+            while len(self.filters) > self.maxsize:
+                self.filters.popitem(last=False)
+                self.evictions += 1
+        return sos
+    
+    def clear(self):
+        with self.lock:
+            self.filters.clear()
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self.filters),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+default_bank = FilterBank()
+
+
+def get_sos(btype, order, cutoff, sample_rate):
+    return default_bank.sos(btype, order, cutoff, sample_rate)
\ No newline at end of file
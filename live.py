@@ -0,0 +1,164 @@
+import time
+
+import numpy as np
+
+from streaming import StreamingChain
+
+DEFAULT_BLOCKSIZE = 256
+DEFAULT_LATENCY_TARGET = 0.020
+# The pitch stage delays audio by about one FFT frame; 512 keeps that
+# around 12 ms at 44.1 kHz where the offline default would add ~60 ms.
+LIVE_FFT_SIZE = 512
+
+
+class OutputFifo:
+    # The pitch stage emits whole hops rather than one frame per input frame,
+    # so processed audio is queued here and drained one device block at a time.
+    def __init__(self, capacity):
+        self.buffer = np.zeros(capacity, dtype='float32')
+        self.size = 0
+    
+    def push(self, block):
+        dropped = 0
+        if len(block) > len(self.buffer):
+            dropped += len(block) - len(self.buffer)
+            block = block[-len(self.buffer):]
+        overflow = self.size + len(block) - len(self.buffer)
+        if overflow > 0:
+            self.buffer[:self.size - overflow] = self.buffer[overflow:self.size]
+            self.size -= overflow
+            dropped += overflow
+        self.buffer[self.size:self.size + len(block)] = block
+        self.size += len(block)
+        return dropped
+    
+    def pull(self, out):
+        n = min(len(out), self.size)
+        out[:n] = self.buffer[:n]
+        out[n:] = 0
+        self.buffer[:self.size - n] = self.buffer[n:self.size]
+        self.size -= n
+        return len(out) - n
+
+
+class LiveMonitor:
+    def __init__(self, params, sample_rate=44100, blocksize=DEFAULT_BLOCKSIZE,
+                 latency_target=DEFAULT_LATENCY_TARGET):
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.latency_target = latency_target
+        self.chain = self.build_chain(params)
+        self.fifo = OutputFifo(max(blocksize, LIVE_FFT_SIZE) * 4)
+        self.stream = None
+        self.reset_stats()
+    
+    def reset_stats(self):
+        self.callbacks = 0
+        self.input_overflows = 0
+        self.output_underflows = 0
+        self.deadline_misses = 0
+        self.starved_frames = 0
+        self.dropped_frames = 0
+        self.process_time = 0.0
+        self.max_process_time = 0.0
+        self.clipped_frames = 0
+        self.measured_latency = None
+        self.held_frames = 0.0
+    
+    def build_chain(self, params):
+        # Changing tempo can't be done on a live input, so speed is ignored
+        params = {key: value for key, value in params.items() if key != "speed"}
+        return StreamingChain(params, self.sample_rate, LIVE_FFT_SIZE, self.blocksize)
+    
+    def set_params(self, params):
+        self.chain = self.build_chain(params)
+    
+    @property
+    def running(self):
+        return self.stream is not None and self.stream.active
+    
+    def start(self):
+        import sounddevice as sd
+        
+        self.reset_stats()
+        self.stream = sd.Stream(samplerate=self.sample_rate, blocksize=self.blocksize,
+                                channels=1, dtype='float32', latency='low',
+                                callback=self._callback)
+        self.stream.start()
+    
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+    
+    def _callback(self, indata, outdata, frames, time_info, status):
+        start = time.perf_counter()
+        if status.input_overflow:
+            self.input_overflows += 1
+        if status.output_underflow:
+            self.output_underflows += 1
+        
+        self.dropped_frames += self.fifo.push(self.render(indata[:, 0]))
+        self.starved_frames += self.fifo.pull(outdata[:, 0])
+        
+        # Audio also waits inside the chain (the pitch stage's FFT frame,
+        # the reverb partition) and in the FIFO before it is played
+        held = self.chain.held + self.fifo.size
+        self.held_frames = held if not self.callbacks else self.held_frames + (held - self.held_frames) * 0.05
+        
+        # DAC time minus ADC time of this buffer is the device round trip;
+        # some host APIs report zero, in which case stats() falls back to
+        # the latency the stream was opened with.
+        round_trip = time_info.outputBufferDacTime - time_info.inputBufferAdcTime
+        if round_trip > 0:
+            if self.measured_latency is None:
+                self.measured_latency = round_trip
+            else:
+                self.measured_latency += (round_trip - self.measured_latency) * 0.05
+        
+        elapsed = time.perf_counter() - start
+        self.callbacks += 1
+        self.process_time += elapsed
+        self.max_process_time = max(self.max_process_time, elapsed)
+        if elapsed > frames / self.sample_rate:
+            self.deadline_misses += 1
+    
+    def render(self, block):
+        # The preset's volume, as offline renders apply it, then a clip
+        # guard: live input can't be peak-normalized ahead of time
+        out = self.chain.process(block) * self.chain.output_gain
+        clipped = np.abs(out) > 1.0
+        if clipped.any():
+            self.clipped_frames += int(clipped.sum())
+            np.clip(out, -1.0, 1.0, out=out)
+        return out
+    
+    def stats(self):
+        deadline = self.blocksize / self.sample_rate
+        reported = None
+        if self.stream is not None:
+            input_latency, output_latency = self.stream.latency
+            reported = input_latency + output_latency + deadline
+        device = self.measured_latency if self.measured_latency is not None else reported
+        chain_latency = self.held_frames / self.sample_rate
+        latency = None if device is None else device + chain_latency
+        return {
+            "latency": latency,
+            "device_latency": device,
+            "chain_latency": chain_latency,
+            "reported_latency": reported,
+            "latency_target": self.latency_target,
+            "within_target": latency is not None and latency <= self.latency_target,
+            "blocksize": self.blocksize,
+            "callbacks": self.callbacks,
+            "input_overflows": self.input_overflows,
+            "output_underflows": self.output_underflows,
+            "xruns": self.input_overflows + self.output_underflows,
+            "deadline_misses": self.deadline_misses,
+            "starved_frames": self.starved_frames,
+            "dropped_frames": self.dropped_frames,
+            "clipped_frames": self.clipped_frames,
+            "load": self.process_time / (self.callbacks * deadline) if self.callbacks else 0.0,
+            "max_load": self.max_process_time / deadline,
+        }
\ No newline at end of file
@@ -0,0 +1,138 @@
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+import soundfile as sf
+
+BLOCK_FRAMES = 1 << 18
+
+# WAV subtypes whose samples can be viewed straight from disk
+MEMMAP_DTYPES = {
+    "PCM_16": ("<i2", 1 / 32768),
+    "PCM_32": ("<i4", 1 / 2147483648),
+    "FLOAT": ("<f4", 1.0),
+    "DOUBLE": ("<f8", 1.0),
+}
+
+
+def wav_data_chunk(path):
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            return None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"data":
+                return f.tell(), size
+            f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+def open_memmap(path, info=None):
+    info = info or sf.info(path)
+    if info.format != "WAV" or info.subtype not in MEMMAP_DTYPES:
+        return None
+    chunk = wav_data_chunk(path)
+    if chunk is None:
+        return None
+    dtype, scale = MEMMAP_DTYPES[info.subtype]
+    offset, size = chunk
+    frames = min(info.frames, size // (np.dtype(dtype).itemsize * info.channels))
+    raw = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(frames, info.channels))
+    return raw, scale
+
+
+def load(path, mono=False, block_frames=BLOCK_FRAMES, copy=False):
+    # Multichannel files load as (frames, channels) and single-channel ones
+    # as (frames,); mono=True mixes every channel down instead. Float32 WAV
+    # comes back as a read-only view of the file unless copy is set, which
+    # files that may be overwritten or deleted while in use (recorded
+    # takes) need: a removed file under a live map faults on POSIX and
+    # can't be removed at all on Windows.
+    info = sf.info(path)
+    mapped = open_memmap(path, info)
+    flat = mono or info.channels == 1
+    
+    if mapped is not None:
+        raw, scale = mapped
+        # Float32 needs no conversion at all; pages load on first touch
+        if raw.dtype == np.float32 and (info.channels == 1 or not mono):
+            view = raw[:, 0] if flat else raw
+            return (np.array(view) if copy else view), info.samplerate
+        frames = len(raw)
+        blocks = ((i, raw[i:i + block_frames]) for i in range(0, frames, block_frames))
+    else:
+        frames = info.frames
+        scale = 1.0
+        blocks = _decode_blocks(path, info.channels, block_frames)
+    
+    out = np.empty((frames,) if flat else (frames, info.channels), dtype=np.float32)
+    total = 0
+    for start, block in blocks:
+        count = min(len(block), frames - start)
+        if count <= 0:
+            break
+        target = out[start:start + count]
+        if mono and info.channels > 1:
+            np.sum(block[:count], axis=1, dtype=np.float32, out=target)
+            target *= np.float32(scale / info.channels)
+        else:
+            target[...] = block[:count] if not flat else block[:count, 0]
+            if scale != 1.0:
+                target *= np.float32(scale)
+        total = start + count
+    return out[:total], info.samplerate
+
+
+def _decode_blocks(path, channels, block_frames):
+    # Compressed formats are decoded a block at a time into one reused buffer
+    buffer = np.empty((block_frames, channels), dtype=np.float32)
+    start = 0
+    with sf.SoundFile(path) as f:
+        while True:
+            block = f.read(block_frames, dtype="float32", always_2d=True, out=buffer)
+            if not len(block):
+                return
+            yield start, block
+            start += len(block)
+
+
+def peak_rss():
+    import resource
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+if __name__ == "__main__":
+    import tracemalloc
+    
+    import pipeline
+    
+    if len(sys.argv) < 2:
+        sys.exit("usage: python loader.py AUDIO_FILE")
+    path = sys.argv[1]
+    size = os.path.getsize(path)
+    before = peak_rss()
+    tracemalloc.start()
+    start = time.perf_counter()
+    audio, sample_rate = load(path)
+    elapsed = time.perf_counter() - start
+    load_peak = tracemalloc.get_traced_memory()[1]
+    print(f"{path}: {size / 1e6:.1f} MB on disk, {len(audio) / sample_rate:.1f}s at {sample_rate} Hz "
+          f"({audio.nbytes / 1e6:.1f} MB float32, {audio.shape[1] if audio.ndim > 1 else 1} channels, "
+          f"memmap={isinstance(audio, np.memmap)})")
+    print(f"loaded in {elapsed:.2f}s, {load_peak / 1e6:.1f} MB allocated = {load_peak / size:.2f}x file size")
+    
+    # A render reads every page of the map; its allocations are the output
+    # and the stage buffers, not a second copy of the input
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    pipeline.apply_params(audio, sample_rate, {"bass": 1.5})
+    render_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"rendered in {time.perf_counter() - start:.2f}s, {render_peak / 1e6:.1f} MB allocated = "
+          f"{render_peak / audio.nbytes:.2f}x the clip; peak RSS grew {(peak_rss() - before) / 1e6:.1f} MB")
\ No newline at end of file
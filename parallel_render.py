@@ -0,0 +1,302 @@
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy import signal
+
+import effects
+import pipeline
+import pitchshift
+from convolution import impulse_response
+from filterbank import get_sos
+
+# Clips are split into at most one chunk per worker, each at least this long
+MIN_CHUNK_SECONDS = 10
+CROSSFADE_SECONDS = 0.02
+# Filter context runs until the slowest pole has decayed this far
+SETTLE_LEVEL = 1e-7
+# Largest difference from the serial render, on a normalized (peak 1) clip.
+# Rasp noise is random in both renders and is not part of the comparison.
+TOLERANCE = 1e-4
+
+
+class SharedAudio:
+    def __init__(self, length):
+        self.length = length
+        self.memory = shared_memory.SharedMemory(create=True, size=max(length, 1) * 4)
+        self.array = np.ndarray((length,), dtype=np.float32, buffer=self.memory.buf)
+    
+    def release(self):
+        self.array = None
+        self.memory.close()
+        self.memory.unlink()
+
+
+def _attach(name, length):
+    memory = shared_memory.SharedMemory(name=name)
+    return memory, np.ndarray((length,), dtype=np.float32, buffer=memory.buf)
+
+
+def settle_frames(sos, level=SETTLE_LEVEL):
+    radius = np.max(np.abs(signal.sos2zpk(sos)[1]))
+    return int(math.ceil(math.log(level) / math.log(radius)))
+
+
+def stage_context(func, args):
+    # Samples of input a stage needs (before, after) a chunk so that the
+    # chunk's own output matches the whole-clip render
+    if func is effects.tone:
+        sample_rate, btype, cutoff, _ = args
+        settle = settle_frames(get_sos(btype, effects.FILTER_ORDER, cutoff, sample_rate))
+        return settle, settle
+    if func is effects.lowpass_filter:
+        settle = settle_frames(get_sos('lowpass', effects.FILTER_ORDER, args[1], args[0]))
+        return settle, settle
+    if func is effects.bandpass_filter:
+        settle = settle_frames(get_sos('bandpass', effects.FILTER_ORDER, args[1:], args[0]))
+        return settle, settle
+    if func is effects.add_reverb:
+        return len(impulse_response(args[2])), 0
+    if func is effects.add_echo:
+        taps = effects.echo_taps(args[0], args[1])
+        return (taps[-1][0] if taps else 0), 0
+    if isinstance(func, pipeline.FusedPointwise):
+        return 0, 0
+    raise ValueError(f"No chunk context known for {func}")
+
+
+def split_steps(compiled):
+    # Phase-vocoder stages run as their own step; the stages between them
+    # run together over overlapping chunks
+    steps = []
+    first = 0
+    for i, (name, _, _) in enumerate(compiled.stages):
+        if name in ("pitch", "speed"):
+            if i > first:
+                steps.append(("chain", first, i))
+            steps.append(("stretch", i, i + 1))
+            first = i + 1
+    if first < len(compiled.stages):
+        steps.append(("chain", first, len(compiled.stages)))
+    return steps
+
+
+def _bounds(length, count):
+    return [length * k // count for k in range(count + 1)]
+
+
+def _stretch_geometry(name, factor, length, start, end):
+    # (rate, stretched range) behind output samples [start, end)
+    if name == "speed":
+        return factor, start, end
+    # pitch: a 1/factor stretch read back by linear interpolation at k * factor
+    rate = 1 / factor
+    return rate, int(start * factor), min(int((end - 1) * factor) + 2, int(round(length / rate)))
+
+
+def _advance_part(source, length, rate, n_fft, first, last):
+    memory, audio = _attach(source, length)
+    try:
+        return pitchshift.advance_sum(audio, rate, first, last, n_fft)
+    finally:
+        del audio
+        memory.close()
+
+
+def _stretch_part(source, length, target, out_length, name, factor, n_fft, start, end, phase):
+    memory, audio = _attach(source, length)
+    try:
+        rate, s_start, s_end = _stretch_geometry(name, factor, length, start, end)
+        stretched = pitchshift.stretch_range(audio, rate, s_start, s_end, phase, n_fft)
+    finally:
+        del audio
+        memory.close()
+    if name == "pitch":
+        last = int(round(length / rate)) - 1
+        positions = np.arange(start, end) * factor
+        part = np.interp(positions - s_start, np.arange(len(stretched)), stretched)
+        part[positions > last] = 0
+    else:
+        part = stretched
+    memory, out = _attach(target, out_length)
+    out[start:end] = part
+    del out
+    memory.close()
+
+
+def _chain_part(source, target, length, params, sample_rate, first, last, start, end, fade):
+    # Renders stages [first, last) over one chunk plus its context. The part
+    # no other chunk covers goes straight into the target; the crossfade
+    # regions at either end come back to the parent along with the peak.
+    compiled = pipeline.compile_params(params, sample_rate)
+    stages = compiled.stages[first:last]
+    before = sum(stage_context(func, args)[0] for _, func, args in stages) + fade
+    after = sum(stage_context(func, args)[1] for _, func, args in stages) + fade
+    low, high = max(start - before, 0), min(end + after, length)
+    
+    memory, source_audio = _attach(source, length)
+    audio = np.array(source_audio[low:high])
+    del source_audio
+    memory.close()
+    
+    for name, func, args in stages:
+        if isinstance(func, pipeline.FusedPointwise):
+            # Normalization needs the whole clip's peak; the parent applies it
+            steps = [step for step in func.steps if step[0] not in ("normalize", "gain")]
+            if steps:
+                audio = pipeline.FusedPointwise(steps, sample_rate)(audio, audio, offset=low)
+        else:
+            audio = func(audio, *args)
+    
+    inner_start = start + fade if start > 0 else start
+    inner_end = end - fade if end < length else end
+    memory, out = _attach(target, length)
+    out[inner_start:inner_end] = audio[inner_start - low:inner_end - low]
+    del out
+    memory.close()
+    peak = float(np.max(np.abs(audio[inner_start - low:inner_end - low]), initial=0.0))
+    head = audio[start - fade - low:start + fade - low].copy() if start > 0 else None
+    tail = audio[end - fade - low:end + fade - low].copy() if end < length else None
+    return head, tail, peak
+
+
+def _run_stretch(pool, stage, current, sample_rate, count):
+    name, _, args = stage
+    factor = args[1]
+    n_fft = pitchshift.fft_size(sample_rate)
+    length = current.length
+    out_length = length if name == "pitch" else int(round(length / factor))
+    bounds = _bounds(out_length, count)
+    rate = _stretch_geometry(name, factor, length, 0, 1)[0]
+    
+    # Pass one: the phase each range starts from
+    edges = [pitchshift.frames_for_range(*_stretch_geometry(name, factor, length, bounds[k], bounds[k + 1])[1:],
+                                         rate, length, n_fft)[0] for k in range(count)]
+    edges.append(pitchshift.stretch_frames(length, rate, n_fft))
+    futures = [pool.submit(_advance_part, current.memory.name, length, rate, n_fft, edges[k], edges[k + 1])
+               for k in range(count)]
+    sums = [future.result() for future in futures]
+    phases = [sums[0][1]]
+    for total, _ in sums[:-1]:
+        phases.append(np.mod(phases[-1] + total, 2 * np.pi))
+    
+    # Pass two: render every range from its phase
+    target = SharedAudio(out_length)
+    try:
+        futures = [pool.submit(_stretch_part, current.memory.name, length, target.memory.name, out_length,
+                               name, factor, n_fft, bounds[k], bounds[k + 1], phases[k]) for k in range(count)]
+        for future in futures:
+            future.result()
+    except BaseException:
+        target.release()
+        raise
+    return target
+
+
+def _run_chain(pool, params, sample_rate, first, last, current, count):
+    length = current.length
+    bounds = _bounds(length, count)
+    fade = int(CROSSFADE_SECONDS * sample_rate / 2)
+    target = SharedAudio(length)
+    try:
+        futures = [pool.submit(_chain_part, current.memory.name, target.memory.name, length, params, sample_rate,
+                               first, last, bounds[k], bounds[k + 1], fade) for k in range(count)]
+        parts = [future.result() for future in futures]
+    except BaseException:
+        target.release()
+        raise
+    
+    peak = max(part[2] for part in parts)
+    ramp = ((np.arange(2 * fade) + 0.5) / (2 * fade)).astype(np.float32)
+    for k in range(1, count):
+        tail, head = parts[k - 1][1], parts[k][0]
+        region = target.array[bounds[k] - fade:bounds[k] + fade]
+        region[:] = tail * (1 - ramp) + head * ramp
+        peak = max(peak, float(np.max(np.abs(region), initial=0.0)))
+    return target, peak
+
+
+def chunk_count(length, sample_rate, workers):
+    return max(1, min(workers, int(length // (MIN_CHUNK_SECONDS * sample_rate))))
+
+
+def render_parallel(audio, sample_rate, params, pool=None, workers=None, progress=None):
+    # Same output as pipeline.apply_params, within TOLERANCE, with every
+    # stage spread over up to `workers` processes. Normalization is done in
+    # two passes: the chunks report their peaks, then the stitched clip is
+    # scaled once by the global value. Multichannel clips already batch
+    # their channels in every stage and render serially.
+    workers = workers or os.cpu_count() or 1
+    compiled = pipeline.compile_params(params, sample_rate)
+    count = chunk_count(len(audio), sample_rate, workers)
+    if count < 2 or audio.ndim > 1:
+        return compiled.run(audio, progress)
+    
+    own_pool = pool is None
+    if own_pool:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    current = SharedAudio(len(audio))
+    try:
+        current.array[:] = audio
+        peak = 0.0
+        steps = split_steps(compiled)
+        for i, (kind, first, last) in enumerate(steps):
+            if progress is not None:
+                progress("+".join(name for name, _, _ in compiled.stages[first:last]), i / len(steps))
+            if kind == "stretch":
+                following = _run_stretch(pool, compiled.stages[first], current, sample_rate, count)
+            else:
+                following, peak = _run_chain(pool, params, sample_rate, first, last, current, count)
+            current.release()
+            current = following
+        result = np.array(current.array)
+    finally:
+        current.release()
+        if own_pool:
+            pool.shutdown()
+    
+    fused = compiled.stages[-1][1]
+    scale = fused.gain / (peak + 0.0001) if fused.normalize else fused.gain
+    if scale != 1.0:
+        result *= np.float32(scale)
+    return result
+
+
+def verify(seconds=60, sample_rate=44100, workers=None):
+    # Parallel against serial for every built-in preset, rasp keys dropped
+    # so both renders are deterministic
+    from benchmark import synthetic_voice
+    from presets import iter_presets
+    
+    workers = workers or os.cpu_count() or 1
+    audio = synthetic_voice(seconds, sample_rate)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        render_parallel(audio[:int(2 * MIN_CHUNK_SECONDS * sample_rate)], sample_rate, {}, pool, workers)
+        for _, name, params in iter_presets():
+            params = {k: v for k, v in params.items() if k not in ("raspy", "grit", "smoky")}
+            start = time.perf_counter()
+            serial = pipeline.apply_params(audio, sample_rate, params)
+            serial_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            parallel = render_parallel(audio, sample_rate, params, pool, workers)
+            parallel_seconds = time.perf_counter() - start
+            results.append({"preset": name, "error": float(np.max(np.abs(parallel - serial))),
+                            "serial": serial_seconds, "parallel": parallel_seconds})
+    return results
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    failed = 0
+    for r in verify(seconds, workers=workers):
+        ok = r["error"] <= TOLERANCE
+        failed += not ok
+        print(f"{r['preset']:<24} max error {r['error']:.2e} {'ok' if ok else 'OVER'}  "
+              f"serial {r['serial']:.2f}s  parallel {r['parallel']:.2f}s  x{r['serial'] / r['parallel']:.1f}")
+    raise SystemExit(1 if failed else 0)
\ No newline at end of file
@@ -0,0 +1,299 @@
+import functools
+
+import numpy as np
+
+import effects
+from convolution import room_spec
+from render_cache import params_key
+
+FUSE_CHUNK = 1 << 16
+
+# Character keys and the stage each one drives. Values are multipliers
+# around 1.0 like "bass"; anything above 1 switches the stage on.
+TONE_KEYS = {
+    "warmth": ("lowpass", 500, 0.8),
+    "clarity": ("bandpass", (2000, 5000), 1.0),
+    "projection": ("bandpass", (1500, 4000), 1.0),
+    "brightness": ("highpass", 5000, 1.0),
+    "twang": ("bandpass", (900, 2000), 1.0),
+}
+DRIVE_KEYS = ("energy", "power", "punch", "authority")
+GRIT_KEYS = ("grit", "smoky")
+SOFT_KEYS = ("soothing", "silky", "intimate")
+MUFFLED_CUTOFF = 900
+SOFT_CUTOFF = 8000
+WEIRD_CARRIER = (90, 0.5)
+
+# Tags that only describe a preset; room flags are read by room_spec
+TAG_KEYS = ("dramatic", "theatrical", "lyrical", "soulful", "nature", "drawl", "versatile",
+            "holy", "spooky", "spacious", "large_space", "room", "ir")
+
+POINTWISE = ("ring", "drive", "rasp", "distortion", "normalize", "gain")
+
+
+def channels_first(audio):
+    # (frames, channels) clip as contiguous (channels, frames) rows, the
+    # layout every stage works in; mono passes through
+    return audio if audio.ndim == 1 else np.ascontiguousarray(audio.T)
+
+
+# The transpose is its own inverse
+channels_last = channels_first
+
+
+def _excess(params, keys):
+    return max((params.get(key, 1.0) - 1 for key in keys), default=0.0)
+
+
+def _below_nyquist(btype, cutoff, sample_rate):
+    # Cutoffs clamped under Nyquist the way the soft filter is; None when a
+    # highpass or band starts above the limit and has nothing left to pass
+    limit = sample_rate * 0.45
+    if btype == 'bandpass':
+        low, high = cutoff
+        return (low, min(high, limit)) if low < limit else None
+    if btype == 'highpass':
+        return cutoff if cutoff < limit else None
+    return min(cutoff, limit)
+
+
+def plan(params, sample_rate):
+    # Stage list shared by the offline pipeline and StreamingChain:
+    # (kind, args) in processing order
+    steps = []
+    pitch = params.get("pitch", 1.0)
+    bass = params.get("bass", 1.0)
+    reverb = params.get("reverb", 0.0)
+    echo = params.get("echo", 0.0)
+    speed = params.get("speed", 1.0)
+    
+    if pitch != 1.0:
+        steps.append(("pitch", (pitch,)))
+    
+    if bass > 1.0:
+        steps.append(("tone", ("bass", 'lowpass', effects.BASS_CUTOFF, bass - 1)))
+    for key, (btype, cutoff, scale) in TONE_KEYS.items():
+        cutoff = _below_nyquist(btype, cutoff, sample_rate)
+        if params.get(key, 1.0) > 1.0 and cutoff is not None:
+            steps.append(("tone", (key, btype, cutoff, (params[key] - 1) * scale)))
+    
+    band = _below_nyquist('bandpass', tuple(params["bandpass"]), sample_rate) if "bandpass" in params else None
+    if band is not None:
+        steps.append(("filter", ("bandpass", 'bandpass', band)))
+    if params.get("muffled"):
+        steps.append(("filter", ("muffled", 'lowpass', MUFFLED_CUTOFF)))
+    soft = _excess(params, SOFT_KEYS)
+    if soft > 0:
+        steps.append(("filter", ("soft", 'lowpass', min(SOFT_CUTOFF / (1 + soft), sample_rate * 0.45))))
+    
+    if reverb > 0:
+        steps.append(("reverb", (reverb, room_spec(params, sample_rate))))
+    # Amounts under the quietest kept repeat leave no taps at all
+    if echo > 0 and effects.echo_taps(sample_rate, echo):
+        steps.append(("echo", (echo,)))
+    
+    if speed != 1.0:
+        steps.append(("speed", (speed,)))
+    
+    if params.get("robotic"):
+        steps.append(("ring", (30, 1.0)))
+    if params.get("weird"):
+        steps.append(("ring", WEIRD_CARRIER))
+    drive = _excess(params, DRIVE_KEYS)
+    if drive > 0:
+        steps.append(("drive", (drive,)))
+    rasp = params.get("raspy", 0) + 0.5 * _excess(params, GRIT_KEYS)
+    if rasp > 0:
+        steps.append(("rasp", (rasp,)))
+    if params.get("distortion", 0) > 0:
+        steps.append(("distortion", (params["distortion"],)))
+    
+    steps.append(("normalize", ()))
+    if params.get("volume", 1.0) != 1.0:
+        steps.append(("gain", (params["volume"],)))
+    return steps
+
+
+class FusedPointwise:
+    # Runs adjacent pointwise stages as one chunked pass, in place, over the
+    # float32 output buffer. Normalization tracks the peak during that pass
+    # and is applied afterwards together with any output gain. Passing out
+    # as the input itself processes a buffer the caller owns in place, and
+    # offset is the position of the first frame in the clip (ring carrier
+    # phase). Multichannel (channels, frames) audio shares one carrier.
+    in_place = True
+    
+    def __init__(self, steps, sample_rate, chunk=FUSE_CHUNK):
+        self.steps = steps
+        self.sample_rate = sample_rate
+        self.chunk = chunk
+        self.normalize = any(kind == "normalize" for kind, _ in steps)
+        self.gain = float(np.prod([args[0] for kind, args in steps if kind == "gain"]))
+        self.ops = [(kind, args) for kind, args in steps if kind not in ("normalize", "gain")]
+        self.name = "+".join(kind for kind, _ in steps)
+    
+    def __call__(self, audio, out=None, offset=0):
+        if out is None:
+            out = np.empty(audio.shape, dtype=np.float32)
+        length = audio.shape[-1]
+        chunk = effects.chunk_frames(audio, self.chunk)
+        size = min(chunk, length)
+        # Flat so the slice for a short last chunk stays contiguous
+        scratch = np.empty(size * audio.size // max(length, 1), dtype=np.float32)
+        needs_phase = any(kind == "ring" for kind, _ in self.ops)
+        index = np.arange(size, dtype=float) if needs_phase else None
+        phase = np.empty(size) if needs_phase else None
+        rng = np.random.default_rng()
+        peak = 0.0
+        
+        for start in range(0, length, chunk):
+            x = out[..., start:start + chunk]
+            count = x.shape[-1]
+            if out is not audio:
+                np.copyto(x, audio[..., start:start + count], casting='same_kind')
+            s = scratch[:x.size].reshape(x.shape)
+            for kind, args in self.ops:
+                if kind == "ring":
+                    freq, mix = args
+                    p = phase[:count]
+                    np.add(index[:count], start + offset, out=p)
+                    p *= 2 * np.pi * freq / self.sample_rate
+                    np.sin(p, out=p)
+                    if mix != 1.0:
+                        p *= mix
+                        p += 1 - mix
+                    np.multiply(x, p, out=x, casting='same_kind')
+                elif kind == "drive":
+                    drive = 1 + 3 * args[0]
+                    x *= np.float32(drive)
+                    np.tanh(x, out=x)
+                    x *= np.float32(1 / np.tanh(drive))
+                elif kind == "rasp":
+                    amount = args[0]
+                    np.multiply(x, np.float32(1 + amount), out=s)
+                    np.tanh(s, out=s)
+                    s *= np.float32(amount * 0.3)
+                    x *= np.float32(1 - amount * 0.3)
+                    x += s
+                    rng.standard_normal(out=s, dtype=np.float32)
+                    s *= np.float32(0.05 * amount)
+                    x += s
+                elif kind == "distortion":
+                    x *= np.float32(1 + args[0] * 2)
+                    np.tanh(x, out=x)
+            if self.normalize and count:
+                peak = max(peak, float(np.max(np.abs(x, out=s))))
+        
+        scale = self.gain / (peak + 0.0001) if self.normalize else self.gain
+        if scale != 1.0:
+            out *= np.float32(scale)
+        return out
+
+
+class Pipeline:
+    # A preset compiled for one sample rate: keys are mapped to stages once
+    # and the pointwise tail is fused. stages keeps the (name, func, args)
+    # shape so it can be run with progress reporting and profiling.
+    #
+    # Buffer ownership: the input clip is borrowed and never written. Every
+    # stage returns a new float32 buffer, except in_place stages, which
+    # overwrite the buffer the previous stage produced. So at most the
+    # current buffer and the next one are alive during a render. Buffers
+    # taken from or handed to a stage memo are borrowed the same way.
+    #
+    # prefixes[i] is the tuple of plan steps up to and including stage i;
+    # two presets with equal prefixes produce identical audio up to there.
+    def __init__(self, params, sample_rate):
+        self.params = params
+        self.sample_rate = sample_rate
+        self.steps = plan(params, sample_rate)
+        self.stages = []
+        self.prefixes = []
+        pending = []
+        for i, (kind, args) in enumerate(self.steps):
+            if kind in POINTWISE:
+                pending.append((kind, args))
+                continue
+            self._fuse(pending, i)
+            pending = []
+            self.stages.append(self._stage(kind, args))
+            self.prefixes.append(tuple(self.steps[:i + 1]))
+        self._fuse(pending, len(self.steps))
+    
+    def _fuse(self, steps, end):
+        if steps:
+            fused = FusedPointwise(steps, self.sample_rate)
+            self.stages.append((fused.name, fused, ()))
+            self.prefixes.append(tuple(self.steps[:end]))
+    
+    def _stage(self, kind, args):
+        sr = self.sample_rate
+        if kind == "pitch":
+            return "pitch", effects.change_pitch, (sr, args[0])
+        if kind == "tone":
+            name, btype, cutoff, gain = args
+            return name, effects.tone, (sr, btype, cutoff, gain)
+        if kind == "filter":
+            name, btype, cutoff = args
+            if btype == 'bandpass':
+                return name, effects.bandpass_filter, (sr, *cutoff)
+            return name, effects.lowpass_filter, (sr, cutoff)
+        if kind == "reverb":
+            amount, spec = args
+            return "reverb", effects.add_reverb, (sr, amount, spec)
+        if kind == "echo":
+            return "echo", effects.add_echo, (sr, args[0])
+        if kind == "speed":
+            return "speed", effects.change_speed, (sr, args[0])
+        raise ValueError(f"Unknown stage: {kind}")
+    
+    def resume_point(self, memo, source_key):
+        # Index of the first stage still to run and the buffer to feed it
+        for i in range(len(self.stages) - 1, 0, -1):
+            cached = memo.get(source_key, self.prefixes[i - 1])
+            if cached is not None:
+                return i, cached
+        return 0, None
+    
+    def run(self, audio, progress=None, profile=None, memo=None, source_key=None):
+        # With a memo (render_cache.StageCache) the output of every stage that
+        # allocates a new buffer is stored under its prefix, and a later run
+        # with the same source_key skips the stages it shares with earlier ones.
+        # A (frames, channels) clip is transposed to (channels, frames) once
+        # here and back once at the end; stages and memo entries only ever
+        # see the channels-first layout.
+        first = 0
+        source = audio
+        audio = channels_first(audio)
+        if memo is not None:
+            first, cached = self.resume_point(memo, source_key)
+            if cached is not None:
+                audio = source = cached
+        for i in range(first, len(self.stages)):
+            name, func, args = self.stages[i]
+            if progress is not None:
+                progress(name, i / len(self.stages))
+            in_place = getattr(func, "in_place", False)
+            if audio is not source and in_place and audio.dtype == np.float32:
+                args = (audio,)
+            if profile is None:
+                audio = func(audio, *args)
+            else:
+                audio = profile.measure(name, func, audio, args)
+            if memo is not None and not in_place and i < len(self.stages) - 1:
+                memo.put(source_key, self.prefixes[i], audio)
+                source = audio
+        return channels_last(audio)
+
+
+@functools.lru_cache(maxsize=64)
+def _compile(key, sample_rate):
+    return Pipeline(dict(key), sample_rate)
+
+
+def compile_params(params, sample_rate):
+    return _compile(params_key(params), sample_rate)
+
+
+def apply_params(audio, sample_rate, params, profile=None):
+    return compile_params(params, sample_rate).run(audio, profile=profile)
\ No newline at end of file
@@ -0,0 +1,340 @@
+import functools
+import sys
+import time
+
+import numpy as np
+
+from fft_batch import irfft, rfft
+
+DEFAULT_FFT_SIZE = 2048
+CHUNK_SIZE = 1 << 16
+# Frames transformed per batch when rendering a range of a stretch
+RANGE_BATCH = 256
+
+
+@functools.lru_cache(maxsize=None)
+def hann_window(n_fft):
+    window = np.hanning(n_fft + 1)[:-1]
+    window.flags.writeable = False
+    return window
+
+
+@functools.lru_cache(maxsize=None)
+def bin_omega(n_fft):
+    omega = 2 * np.pi * np.arange(n_fft // 2 + 1) / n_fft
+    omega.flags.writeable = False
+    return omega
+
+
+def fft_size(sample_rate):
+    return DEFAULT_FFT_SIZE if sample_rate <= 48000 else DEFAULT_FFT_SIZE * 2
+
+
+def phase_advance(first, second, omega, hop):
+    # Per-bin phase advance over one hop, from two analysis frames a hop apart
+    expected = omega * hop
+    delta = np.angle(second) - np.angle(first) - expected
+    delta -= 2 * np.pi * np.round(delta / (2 * np.pi))
+    return expected + delta
+
+
+def overlap_add(frames, hop):
+    # frames is (count, size) or (channels, count, size)
+    channels = frames.shape[:-2]
+    count, size = frames.shape[-2:]
+    overlap = size // hop
+    out = np.zeros((*channels, (count + overlap - 1) * hop))
+    chunks = frames.reshape(*channels, count, overlap, hop)
+    # One pass per overlap position rather than per frame
+    for r in range(overlap):
+        out[..., r * hop:(r + count) * hop] += chunks[..., r, :].reshape(*channels, -1)
+    return out
+
+
+class TimeStretcher:
+    # Phase vocoder that consumes input in arbitrary blocks. Synthesis frames
+    # are hop samples apart and read the input every hop * rate samples; each
+    # frame's instantaneous frequency comes from a second analysis frame one
+    # hop later, so frames never need interpolating and every available frame
+    # in a block is transformed in one batched FFT. Blocks are (frames,) or
+    # (channels, frames); all channels share that FFT and keep their own
+    # phase. The layout is taken from the first block.
+    def __init__(self, rate, n_fft=DEFAULT_FFT_SIZE, hop=None):
+        self.rate = rate
+        self.n_fft = n_fft
+        self.hop = hop or n_fft // 4
+        self.window = hann_window(n_fft)
+        self.window_sq = self.window ** 2
+        self.omega = bin_omega(n_fft)
+        # Half a window of leading zeros centres the first frame on sample 0
+        self.buffer = np.zeros(n_fft // 2)
+        self.buffer_start = 0
+        self.frame = 0
+        self.phase = None
+        self.tail = np.zeros(n_fft - self.hop)
+        self.norm_tail = np.zeros(n_fft - self.hop)
+        self.skip = n_fft // 2
+        self.consumed = 0
+        self.produced = 0
+    
+    def process(self, block):
+        if self.consumed == 0 and np.ndim(block) > 1:
+            self._set_channels(block.shape[:-1])
+        self.consumed += block.shape[-1]
+        self.buffer = np.concatenate([self.buffer, block], axis=-1)
+        return self._emit()
+    
+    def _set_channels(self, channels):
+        self.buffer = np.zeros((*channels, len(self.buffer)))
+        self.tail = np.zeros((*channels, len(self.tail)))
+    
+    def flush(self):
+        target = int(round(self.consumed / self.rate))
+        padding = np.zeros((*self.buffer.shape[:-1], 2 * self.n_fft + int(self.hop * self.rate) + 1))
+        self.buffer = np.concatenate([self.buffer, padding], axis=-1)
+        out = self._emit()
+        count = out.shape[-1]
+        keep = max(target - (self.produced - count), 0)
+        self.produced += keep - count
+        if count < keep:
+            out = np.concatenate([out, np.zeros((*out.shape[:-1], keep - count))], axis=-1)
+        return out[..., :keep]
+    
+    def _emit(self):
+        step = self.hop * self.rate
+        reach = self.n_fft + self.hop
+        end = self.buffer_start + self.buffer.shape[-1]
+        channels = self.buffer.shape[:-1]
+        if end < reach:
+            return np.zeros((*channels, 0))
+        
+        last = int((end - reach) // step) + 2
+        positions = np.round(np.arange(self.frame, max(last, self.frame)) * step).astype(np.int64)
+        positions = positions[positions + reach <= end]
+        if len(positions) == 0:
+            return np.zeros((*channels, 0))
+        
+        index = (positions - self.buffer_start)[:, None] + np.arange(self.n_fft)
+        first = rfft(self.buffer[..., index] * self.window, axis=-1)
+        second = rfft(self.buffer[..., index + self.hop] * self.window, axis=-1)
+        
+        advance = phase_advance(first, second, self.omega, self.hop)
+        
+        start = np.angle(first[..., 0, :]) - advance[..., 0, :] if self.phase is None else self.phase
+        phase = start[..., None, :] + np.cumsum(advance, axis=-2)
+        self.phase = np.mod(phase[..., -1, :], 2 * np.pi)
+        
+        frames = irfft(np.abs(first) * np.exp(1j * phase), n=self.n_fft, axis=-1) * self.window
+        out = overlap_add(frames, self.hop)
+        norm = overlap_add(np.tile(self.window_sq, (len(positions), 1)), self.hop)
+        out[..., :self.tail.shape[-1]] += self.tail
+        norm[:len(self.norm_tail)] += self.norm_tail
+        
+        done = len(positions) * self.hop
+        self.tail = out[..., done:]
+        self.norm_tail = norm[done:]
+        result = out[..., :done] / np.maximum(norm[:done], 1e-6)
+        
+        self.frame += len(positions)
+        next_position = int(round(self.frame * step))
+        if next_position > self.buffer_start:
+            self.buffer = self.buffer[..., next_position - self.buffer_start:]
+            self.buffer_start = next_position
+        
+        if self.skip:
+            dropped = min(self.skip, result.shape[-1])
+            result = result[..., dropped:]
+            self.skip -= dropped
+        self.produced += result.shape[-1]
+        return result
+
+
+# Random access into a stretch. TimeStretcher output depends on earlier
+# frames only through the accumulated phase, which is the analysis phase of
+# frame 0 plus the sum of every later frame's phase advance. Given that sum,
+# any range of the output can be rendered on its own, so a long stretch can
+# be split across processes: one pass sums the advances per range, a second
+# renders each range from its starting phase.
+
+def stretch_frames(length, rate, n_fft=DEFAULT_FFT_SIZE):
+    # Number of frames TimeStretcher emits for a clip of this length
+    hop = n_fft // 4
+    step = hop * rate
+    total = n_fft // 2 + length + 2 * n_fft + int(hop * rate) + 1
+    count = int((total - n_fft - hop) // step) + 2
+    while count > 0 and int(np.round((count - 1) * step)) + n_fft + hop > total:
+        count -= 1
+    return count
+
+
+def frames_for_range(start, end, rate, length, n_fft=DEFAULT_FFT_SIZE):
+    # Frames [first, last) whose overlap-add reaches output samples [start, end)
+    hop = n_fft // 4
+    first = max((start + n_fft // 2 - n_fft) // hop + 1, 0)
+    last = min(-(-(end + n_fft // 2) // hop), stretch_frames(length, rate, n_fft))
+    return first, last
+
+
+def _spectra(audio, positions, n_fft, hop, window):
+    # Analysis frames at positions in the zero-padded coordinates TimeStretcher
+    # uses (half a window of leading zeros)
+    lead = n_fft // 2
+    low, high = positions[0], positions[-1] + n_fft + hop
+    buffer = np.zeros(high - low)
+    a, b = max(low - lead, 0), min(high - lead, len(audio))
+    if b > a:
+        buffer[a + lead - low:b + lead - low] = audio[a:b]
+    index = (positions - low)[:, None] + np.arange(n_fft)
+    first = np.fft.rfft(buffer[index] * window, axis=1)
+    second = np.fft.rfft(buffer[index + hop] * window, axis=1)
+    return first, second
+
+
+def advance_sum(audio, rate, first, last, n_fft=DEFAULT_FFT_SIZE, batch=RANGE_BATCH):
+    # Sum of the phase advances of frames [first, last), plus the starting
+    # phase TimeStretcher derives from frame 0 (only meaningful for first == 0)
+    hop = n_fft // 4
+    window, omega = hann_window(n_fft), bin_omega(n_fft)
+    total = np.zeros(n_fft // 2 + 1)
+    origin = None
+    for j in range(first, last, batch):
+        positions = np.round(np.arange(j, min(j + batch, last)) * hop * rate).astype(np.int64)
+        spectra = _spectra(audio, positions, n_fft, hop, window)
+        advance = phase_advance(*spectra, omega, hop)
+        if origin is None:
+            origin = np.angle(spectra[0][0]) - advance[0]
+        total += advance.sum(axis=0)
+    return total, origin
+
+
+def stretch_range(audio, rate, start, end, phase, n_fft=DEFAULT_FFT_SIZE, batch=RANGE_BATCH):
+    # Samples [start, end) of time_stretch(audio, rate); phase is the origin
+    # plus the advance sum of every frame before frames_for_range(...)[0]
+    hop = n_fft // 4
+    window, omega = hann_window(n_fft), bin_omega(n_fft)
+    first, last = frames_for_range(start, end, rate, len(audio), n_fft)
+    out = np.zeros(max(last - first - 1, 0) * hop + n_fft)
+    norm = np.zeros(len(out))
+    for j in range(first, last, batch):
+        positions = np.round(np.arange(j, min(j + batch, last)) * hop * rate).astype(np.int64)
+        spectra = _spectra(audio, positions, n_fft, hop, window)
+        frame_phase = phase + np.cumsum(phase_advance(*spectra, omega, hop), axis=0)
+        phase = np.mod(frame_phase[-1], 2 * np.pi)
+        frames = np.fft.irfft(np.abs(spectra[0]) * np.exp(1j * frame_phase), n=n_fft, axis=1) * window
+        offset = (j - first) * hop
+        part = overlap_add(frames, hop)
+        out[offset:offset + len(part)] += part
+        norm[offset:offset + len(part)] += overlap_add(np.tile(window ** 2, (len(positions), 1)), hop)
+    
+    begin = start + n_fft // 2 - first * hop
+    result = np.zeros(end - start)
+    count = max(min(end - start, len(out) - begin), 0)
+    result[:count] = out[begin:begin + count] / np.maximum(norm[begin:begin + count], 1e-6)
+    return result
+
+
+def interpolate(positions, buffer):
+    # np.interp for (frames,) or (channels, frames) buffers
+    if buffer.ndim == 1:
+        return np.interp(positions, np.arange(len(buffer)), buffer)
+    length = buffer.shape[-1]
+    positions = np.clip(positions, 0, length - 1)
+    index = np.minimum(positions.astype(np.int64), max(length - 2, 0))
+    fraction = positions - index
+    following = buffer[..., np.minimum(index + 1, length - 1)]
+    return buffer[..., index] * (1 - fraction) + following * fraction
+
+
+class LinearResampler:
+    # Output sample k is the input linearly interpolated at k * factor
+    def __init__(self, factor):
+        self.factor = factor
+        self.next_index = 0
+        self.previous = None
+        self.offset = 0
+    
+    def process(self, block):
+        buffer = block if self.previous is None else np.concatenate([self.previous, block], axis=-1)
+        if buffer.shape[-1] == 0:
+            return buffer
+        end = self.offset + buffer.shape[-1]
+        last = max(int((end - 1) // self.factor) + 1, self.next_index)
+        positions = np.arange(self.next_index, last) * self.factor - self.offset
+        out = interpolate(positions, buffer)
+        self.next_index = last
+        self.previous = buffer[..., -1:]
+        self.offset = end - 1
+        return out
+
+
+class PitchShifter:
+    # Stretch by 1/factor, then resample by factor: pitch moves, length doesn't
+    def __init__(self, factor, n_fft=DEFAULT_FFT_SIZE, hop=None):
+        self.stretcher = TimeStretcher(1 / factor, n_fft, hop)
+        self.resampler = LinearResampler(factor)
+        self.consumed = 0
+        self.produced = 0
+    
+    def process(self, block):
+        self.consumed += block.shape[-1]
+        out = self.resampler.process(self.stretcher.process(block))
+        self.produced += out.shape[-1]
+        return out
+    
+    def flush(self):
+        out = self.resampler.process(self.stretcher.flush())
+        keep = max(self.consumed - self.produced, 0)
+        if out.shape[-1] < keep:
+            out = np.concatenate([out, np.zeros((*out.shape[:-1], keep - out.shape[-1]))], axis=-1)
+        out = out[..., :keep]
+        self.produced += out.shape[-1]
+        return out
+
+
+def _run(processor, audio, length):
+    # Phase maths stays in float64 per chunk; the full-length result is
+    # written straight into one float32 buffer of the known output length.
+    # Chunks hold CHUNK_SIZE samples over all channels.
+    out = np.empty((*audio.shape[:-1], length), dtype=np.float32)
+    step = max(CHUNK_SIZE // int(np.prod(audio.shape[:-1])), 1)
+    filled = 0
+    for i in range(0, audio.shape[-1], step):
+        filled = _append(out, filled, processor.process(audio[..., i:i + step]))
+    filled = _append(out, filled, processor.flush())
+    return out[..., :filled]
+
+
+def _append(out, filled, part):
+    count = min(part.shape[-1], out.shape[-1] - filled)
+    out[..., filled:filled + count] = part[..., :count]
+    return filled + count
+
+
+def pitch_shift(audio, factor, sample_rate=44100):
+    return _run(PitchShifter(factor, fft_size(sample_rate)), audio, audio.shape[-1])
+
+
+def time_stretch(audio, rate, sample_rate=44100):
+    return _run(TimeStretcher(rate, fft_size(sample_rate)), audio, int(round(audio.shape[-1] / rate)))
+
+
+def benchmark(sample_rates=(44100, 48000), seconds=30, factors=(0.75, 1.6)):
+    results = []
+    for sample_rate in sample_rates:
+        t = np.arange(int(seconds * sample_rate)) / sample_rate
+        audio = 0.5 * np.sin(2 * np.pi * 220 * t) + 0.05 * np.random.randn(len(t))
+        for name, func in (("pitch_shift", pitch_shift), ("time_stretch", time_stretch)):
+            for factor in factors:
+                start = time.perf_counter()
+                func(audio, factor, sample_rate)
+                elapsed = time.perf_counter() - start
+                results.append({"op": name, "factor": factor, "sample_rate": sample_rate,
+                                "seconds": elapsed, "realtime_factor": seconds / elapsed})
+    return results
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    for r in benchmark(seconds=seconds):
+        print(f"{r['op']:<13} x{r['factor']:<5} {r['sample_rate']} Hz: "
+              f"{r['seconds']:.3f}s for {seconds:g}s of audio = {r['realtime_factor']:.1f}x realtime")
\ No newline at end of file
@@ -0,0 +1,237 @@
+import bisect
+import json
+import math
+import os
+import re
+
+from presets import VOICE_PRESETS, iter_presets
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# Every key pipeline.plan understands. Scalars may be numbers or booleans
+# (True counts as 1.0, like the built-in "intimate": True); descriptive tags
+# are accepted so libraries can carry them for search.
+SCALAR_KEYS = (
+    "pitch", "speed", "bass", "reverb", "echo", "volume", "raspy", "distortion",
+    "warmth", "clarity", "projection", "brightness", "twang",
+    "energy", "power", "punch", "authority", "grit", "smoky",
+    "soothing", "silky", "intimate",
+    "robotic", "weird", "muffled",
+    "dramatic", "theatrical", "lyrical", "soulful", "nature", "drawl", "versatile",
+    "holy", "spooky", "spacious", "large_space",
+)
+STRING_KEYS = ("room", "ir")
+POSITIVE_KEYS = ("pitch", "speed")
+NON_NEGATIVE_KEYS = ("bass", "reverb", "echo", "volume", "raspy", "distortion")
+MAX_REPORTED_ERRORS = 20
+
+FILTER_PATTERN = re.compile(r"^([a-z_]+)(<=|>=|<|>|=)(-?(?:\d+(?:\.\d*)?|\.\d+))$")
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class PresetError(ValueError):
+    pass
+
+
+def room_names():
+    # Imported here so loading a library at startup doesn't pull in scipy
+    from convolution import ROOMS
+    return tuple(ROOMS)
+
+
+def validate_params(params):
+    # Returns (params, problems); params is normalized the way the built-in
+    # presets are written (bandpass as a tuple)
+    problems = []
+    if not isinstance(params, dict):
+        return None, ["parameters must be a table of key = value"]
+    clean = {}
+    for key, value in params.items():
+        if key == "bandpass":
+            if (not isinstance(value, (list, tuple)) or len(value) != 2
+                    or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value)):
+                problems.append("bandpass must be a pair of frequencies [low, high]")
+            elif not 0 < value[0] < value[1]:
+                problems.append(f"bandpass {list(value)} needs 0 < low < high")
+            else:
+                clean[key] = (float(value[0]), float(value[1]))
+        elif key in STRING_KEYS:
+            if not isinstance(value, str) or not value:
+                problems.append(f"{key} must be a non-empty string")
+            elif key == "room" and value not in room_names():
+                problems.append(f"room must be one of {', '.join(room_names())}, got {value!r}")
+            else:
+                clean[key] = value
+        elif key in SCALAR_KEYS:
+            if not isinstance(value, (int, float)) or not math.isfinite(value):
+                problems.append(f"{key} must be a number or true/false, got {value!r}")
+            elif key in POSITIVE_KEYS and value <= 0:
+                problems.append(f"{key} must be greater than 0, got {value}")
+            elif key in NON_NEGATIVE_KEYS and value < 0:
+                problems.append(f"{key} must not be negative, got {value}")
+            else:
+                clean[key] = value if isinstance(value, bool) else float(value)
+        else:
+            problems.append(f"unknown key {key!r}")
+    return clean, problems
+
+
+def parse_library(data, source="<library>"):
+    # Libraries map category -> preset name -> parameters:
+    #   JSON: {"Robots": {"Tin Can": {"robotic": true, "pitch": 1.1}}}
+    #   TOML: [Robots."Tin Can"]
+    #         robotic = true
+    #         pitch = 1.1
+    if not isinstance(data, dict):
+        raise PresetError(f"{source}: expected a table of categories")
+    library = {}
+    problems = []
+    for category, voices in data.items():
+        if not isinstance(voices, dict):
+            problems.append(f"{category}: expected a table of presets")
+            continue
+        library[category] = []
+        for name, params in voices.items():
+            clean, errors = validate_params(params)
+            problems.extend(f"{category} / {name}: {error}" for error in errors)
+            if not errors:
+                library[category].append((name, clean))
+    if problems:
+        shown = problems[:MAX_REPORTED_ERRORS]
+        if len(problems) > len(shown):
+            shown.append(f"... and {len(problems) - len(shown)} more")
+        raise PresetError(f"{source}: {len(problems)} invalid entries\n  " + "\n  ".join(shown))
+    return library
+
+
+def load_library(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path, encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise PresetError(f"{path}: {e}") from None
+    elif extension == ".toml":
+        if tomllib is None:
+            raise PresetError("TOML preset libraries need Python 3.11+ or the tomli package")
+        with open(path, "rb") as f:
+            try:
+                data = tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise PresetError(f"{path}: {e}") from None
+    else:
+        raise PresetError(f"{path}: preset libraries must be .json or .toml")
+    return parse_library(data, path)
+
+
+def merge_libraries(*libraries, base=VOICE_PRESETS):
+    # Later libraries win: a preset whose name already exists (ignoring case)
+    # replaces the earlier one, wherever it was listed
+    merged = {category: list(voices) for category, voices in base.items()}
+    where = {name.lower(): (category, i) for category, voices in merged.items()
+             for i, (name, _) in enumerate(voices)}
+    for library in libraries:
+        for category, voices in library.items():
+            for name, params in voices:
+                if name.lower() in where:
+                    old_category, i = where[name.lower()]
+                    merged[old_category][i] = None
+                target = merged.setdefault(category, [])
+                where[name.lower()] = (category, len(target))
+                target.append((name, params))
+    return {category: [voice for voice in voices if voice is not None]
+            for category, voices in merged.items()}
+
+
+class PresetIndex:
+    # Search over a preset collection. Names and categories are split into
+    # lowercase words kept in a sorted list, so each query word is a prefix
+    # lookup by bisection. Numeric parameters keep a sorted (value, id) list
+    # per key for range filters. A query is a list of terms that must all
+    # match:
+    #   "bar"            a name or category word starting with "bar"
+    #   "reverb"         also matches presets that set the reverb key
+    #   "pitch<0.8"      numeric filters with < <= > >= =
+    def __init__(self, presets=None):
+        self.entries = list(iter_presets(presets))
+        postings = {}
+        values = {}
+        for i, (category, name, params) in enumerate(self.entries):
+            words = set(WORD_PATTERN.findall(name.lower())) | set(WORD_PATTERN.findall(category.lower()))
+            words |= {key.lower() for key in params}
+            for word in words:
+                postings.setdefault(word, []).append(i)
+            for key, value in params.items():
+                if isinstance(value, (int, float)):
+                    values.setdefault(key, []).append((float(value), i))
+        self.words = sorted(postings)
+        self.postings = postings
+        self.values = {key: sorted(pairs) for key, pairs in values.items()}
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def _prefix(self, prefix):
+        ids = set()
+        i = bisect.bisect_left(self.words, prefix)
+        while i < len(self.words) and self.words[i].startswith(prefix):
+            ids.update(self.postings[self.words[i]])
+            i += 1
+        return ids
+    
+    def _range(self, key, op, value):
+        pairs = self.values.get(key, [])
+        lo = bisect.bisect_left(pairs, (value, -1))
+        hi = bisect.bisect_right(pairs, (value, len(self.entries)))
+        if op == "<":
+            pairs = pairs[:lo]
+        elif op == "<=":
+            pairs = pairs[:hi]
+        elif op == ">":
+            pairs = pairs[hi:]
+        elif op == ">=":
+            pairs = pairs[lo:]
+        else:
+            pairs = pairs[lo:hi]
+        return {i for _, i in pairs}
+    
+    def search(self, query):
+        # Entry ids in library order
+        lookups = []
+        for term in query.lower().split():
+            match = FILTER_PATTERN.match(term)
+            if match:
+                lookups.append((self._range, (match.group(1), match.group(2), float(match.group(3)))))
+            else:
+                lookups.extend((self._prefix, (word,)) for word in WORD_PATTERN.findall(term))
+        result = None
+        for lookup, args in lookups:
+            ids = lookup(*args)
+            result = ids if result is None else result & ids
+            if not result:
+                return []
+        if result is None:
+            return list(range(len(self.entries)))
+        return sorted(result)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    
+    libraries = [load_library(path) for path in sys.argv[1:]]
+    presets = merge_libraries(*libraries)
+    started = time.perf_counter()
+    index = PresetIndex(presets)
+    print(f"{len(index)} presets indexed in {(time.perf_counter() - started) * 1000:.1f} ms")
+    for query in ("ba", "deep bar", "reverb>0.4", "pitch<0.8 bass>=1.5", "robot"):
+        started = time.perf_counter()
+        ids = index.search(query)
+        print(f"{query!r}: {len(ids)} matches in {(time.perf_counter() - started) * 1000:.2f} ms")
\ No newline at end of file
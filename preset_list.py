@@ -0,0 +1,158 @@
+import tkinter as tk
+
+from preset_library import PresetIndex
+
+ROW_HEIGHT = 30
+MARKS = {"done": "✓ ", "error": "✗ "}
+
+
+class PresetList(tk.Frame):
+    # Search box plus a scrolling list of presets grouped by category. Only
+    # the rows in view are drawn: a fixed pool of canvas items (one slot per
+    # visible row) is re-labelled on scroll, so the cost of a redraw depends
+    # on the window height and not on the size of the library.
+    def __init__(self, parent, presets, on_select):
+        super().__init__(parent, bg="#0f3460")
+        self.on_select = on_select
+        self.index = PresetIndex(presets)
+        self.rows = []
+        self.top = 0
+        self.hover = None
+        self.slots = []
+        self.marks = {}
+        self.query = tk.StringVar()
+        
+        search_row = tk.Frame(self, bg="#0f3460")
+        search_row.pack(fill=tk.X, pady=(0, 6))
+        tk.Label(search_row, text="🔍", font=("Papyrus", 9), bg="#0f3460", fg="#95afc0").pack(side=tk.LEFT)
+        entry = tk.Entry(search_row, textvariable=self.query, font=("Papyrus", 9),
+                         bg="#1a1a2e", fg="white", insertbackground="white", relief=tk.FLAT)
+        entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(4, 8))
+        self.count_label = tk.Label(search_row, text="", font=("Papyrus", 8), bg="#0f3460", fg="#95afc0")
+        self.count_label.pack(side=tk.RIGHT)
+        
+        list_frame = tk.Frame(self, bg="#0f3460")
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        self.canvas = tk.Canvas(list_frame, bg="#1a1a2e", highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=self.on_scroll)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        self.query.trace_add("write", lambda *args: self.filter())
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll_by(-e.delta / 120 * 3 * ROW_HEIGHT))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll_by(-3 * ROW_HEIGHT))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll_by(3 * ROW_HEIGHT))
+        self.canvas.bind("<Motion>", self.on_motion)
+        self.canvas.bind("<Leave>", lambda e: self.set_hover(None))
+        self.canvas.bind("<ButtonRelease-1>", self.on_click)
+        self.filter()
+    
+    def set_presets(self, presets):
+        self.index = PresetIndex(presets)
+        self.marks = {}
+        self.filter()
+    
+    def filter(self):
+        # Flatten the matches into rows: a header whenever the category
+        # changes, then one row per preset
+        ids = self.index.search(self.query.get())
+        self.rows = []
+        category = None
+        for i in ids:
+            entry = self.index.entries[i]
+            if entry[0] != category:
+                category = entry[0]
+                self.rows.append(("header", category))
+            self.rows.append(("preset", entry))
+        total = len(self.index)
+        self.count_label.config(text=f"{len(ids)}" if len(ids) == total else f"{len(ids)} / {total}")
+        self.top = 0
+        self.hover = None
+        self.redraw()
+    
+    def set_mark(self, name, mark):
+        self.marks[name] = mark
+        self.redraw()
+    
+    def clear_marks(self):
+        self.marks = {}
+        self.redraw()
+    
+    @property
+    def content_height(self):
+        return len(self.rows) * ROW_HEIGHT
+    
+    def scroll_by(self, pixels):
+        height = self.canvas.winfo_height()
+        self.top = int(min(max(self.top + pixels, 0), max(self.content_height - height, 0)))
+        self.redraw()
+    
+    def on_scroll(self, action, value, unit=None):
+        if action == "moveto":
+            self.top = 0
+            self.scroll_by(float(value) * self.content_height)
+        else:
+            step = self.canvas.winfo_height() if unit == "pages" else ROW_HEIGHT
+            self.scroll_by(int(value) * step)
+    
+    def row_at(self, y):
+        row = (self.top + y) // ROW_HEIGHT
+        return row if 0 <= row < len(self.rows) else None
+    
+    def on_motion(self, event):
+        row = self.row_at(event.y)
+        self.set_hover(row if row is not None and self.rows[row][0] == "preset" else None)
+    
+    def set_hover(self, row):
+        if row != self.hover:
+            self.hover = row
+            self.redraw()
+    
+    def on_click(self, event):
+        row = self.row_at(event.y)
+        if row is not None and self.rows[row][0] == "preset":
+            _, name, params = self.rows[row][1]
+            self.on_select(name, params)
+    
+    def _slot(self, i):
+        while len(self.slots) <= i:
+            self.slots.append((self.canvas.create_rectangle(0, 0, 0, 0, width=0),
+                               self.canvas.create_text(0, 0, anchor=tk.W)))
+        return self.slots[i]
+    
+    def redraw(self):
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if width < 2:
+            return
+        self.top = int(min(self.top, max(self.content_height - height, 0)))
+        first = self.top // ROW_HEIGHT
+        visible = min(height // ROW_HEIGHT + 2, len(self.rows) - first)
+        
+        for i in range(visible):
+            row = first + i
+            y = row * ROW_HEIGHT - self.top
+            box, text = self._slot(i)
+            kind, value = self.rows[row]
+            if kind == "header":
+                self.canvas.itemconfigure(box, fill="#1a1a2e", state=tk.NORMAL)
+                self.canvas.coords(box, 0, y, width, y + ROW_HEIGHT)
+                self.canvas.itemconfigure(text, text=value, fill="#00d9ff", font=("Papyrus", 10, "bold"),
+                                          state=tk.NORMAL)
+                self.canvas.coords(text, 10, y + ROW_HEIGHT / 2)
+            else:
+                _, name, _ = value
+                hover = row == self.hover
+                self.canvas.itemconfigure(box, fill="#00d9ff" if hover else "#2d3561", state=tk.NORMAL)
+                self.canvas.coords(box, 18, y + 2, width - 8, y + ROW_HEIGHT - 1)
+                self.canvas.itemconfigure(text, text=MARKS.get(self.marks.get(name), "") + name,
+                                          fill="#1a1a2e" if hover else "white", font=("Papyrus", 9),
+                                          state=tk.NORMAL)
+                self.canvas.coords(text, 32, y + ROW_HEIGHT / 2)
+        for box, text in self.slots[max(visible, 0):]:
+            self.canvas.itemconfigure(box, state=tk.HIDDEN)
+            self.canvas.itemconfigure(text, state=tk.HIDDEN)
+        
+        self.canvas.configure(cursor="hand2" if self.hover is not None else "")
+        total = max(self.content_height, 1)
+        self.scrollbar.set(self.top / total, min((self.top + height) / total, 1.0))
\ No newline at end of file
@@ -0,0 +1,78 @@
+VOICE_PRESETS = {
+    "Masculine Deep Voices": [
+        ("Smooth Baritone", {"pitch": 0.75, "bass": 1.5, "reverb": 0.2}),
+        ("Heavy Bass", {"pitch": 0.7, "bass": 2.0, "reverb": 0.1}),
+        ("Radio Announcer", {"pitch": 0.85, "bass": 1.3, "bandpass": (300, 3000)}),
+        ("News Anchor", {"pitch": 0.9, "bass": 1.2, "clarity": 1.5}),
+        ("Documentary Narrator", {"pitch": 0.8, "bass": 1.4, "reverb": 0.3}),
+        ("Movie Trailer", {"pitch": 0.65, "bass": 2.5, "reverb": 0.4, "dramatic": True}),
+        ("Motivational Speaker", {"pitch": 0.85, "bass": 1.6, "energy": 1.2}),
+        ("Jazz Singer", {"pitch": 0.8, "bass": 1.3, "warmth": 1.4}),
+    ],
+    "Character Archetypes": [
+        ("Wise Elder", {"pitch": 0.75, "raspy": 0.3, "reverb": 0.25}),
+        ("Military Commander", {"pitch": 0.8, "bass": 1.5, "authority": 1.3}),
+        ("Action Hero", {"pitch": 0.85, "bass": 1.4, "grit": 1.2}),
+        ("Detective Noir", {"pitch": 0.78, "bass": 1.3, "smoky": 1.4}),
+        ("Space Captain", {"pitch": 0.82, "bass": 1.2, "reverb": 0.3}),
+        ("Medieval Knight", {"pitch": 0.77, "bass": 1.6, "echo": 0.4}),
+        ("Pirate Captain", {"pitch": 0.8, "raspy": 0.4, "grit": 1.3}),
+        ("Wild West Sheriff", {"pitch": 0.83, "bass": 1.3, "drawl": 1.2}),
+    ],
+    "Professional Voices": [
+        ("Corporate CEO", {"pitch": 0.88, "bass": 1.2, "authority": 1.4}),
+        ("Sports Commentator", {"pitch": 0.95, "energy": 1.5, "clarity": 1.3}),
+        ("Game Show Host", {"pitch": 1.0, "energy": 1.6, "brightness": 1.2}),
+        ("Podcast Host", {"pitch": 0.9, "bass": 1.1, "warmth": 1.3}),
+        ("Audio Book Narrator", {"pitch": 0.85, "bass": 1.2, "clarity": 1.5}),
+        ("Voice Actor", {"pitch": 0.9, "versatile": 1.0}),
+        ("Radio DJ", {"pitch": 0.88, "bass": 1.4, "energy": 1.3}),
+        ("Meditation Guide", {"pitch": 0.75, "bass": 1.1, "soothing": 1.5}),
+    ],
+    "Dramatic Styles": [
+        ("Shakespearean", {"pitch": 0.82, "bass": 1.3, "theatrical": 1.4}),
+        ("Opera Singer", {"pitch": 0.8, "bass": 1.5, "reverb": 0.5}),
+        ("Stage Actor", {"pitch": 0.88, "projection": 1.4, "clarity": 1.3}),
+        ("Poetry Reader", {"pitch": 0.85, "bass": 1.2, "lyrical": 1.3}),
+        ("Orator", {"pitch": 0.87, "bass": 1.3, "authority": 1.5}),
+    ],
+    "Modern Styles": [
+        ("Hip Hop Vocal", {"pitch": 0.85, "bass": 1.8, "punch": 1.4}),
+        ("Rock Vocalist", {"pitch": 0.9, "grit": 1.5, "power": 1.4}),
+        ("Blues Singer", {"pitch": 0.78, "raspy": 0.4, "soulful": 1.4}),
+        ("Country Singer", {"pitch": 0.88, "warmth": 1.3, "twang": 1.2}),
+        ("R&B Smooth", {"pitch": 0.82, "bass": 1.4, "silky": 1.3}),
+    ],
+    "Fun & Creative": [
+        ("Robot", {"pitch": 1.0, "robotic": True}),
+        ("Chipmunk", {"pitch": 1.6, "speed": 1.2}),
+        ("Monster", {"pitch": 0.5, "bass": 3.0, "distortion": 1.5}),
+        ("Alien", {"pitch": 1.2, "weird": True, "reverb": 0.3}),
+        ("Cave Troll", {"pitch": 0.55, "bass": 2.5, "echo": 0.6}),
+        ("Telephone", {"pitch": 1.0, "bandpass": (300, 3400)}),
+        ("Underwater", {"pitch": 0.8, "muffled": True}),
+        ("Stadium Announcer", {"pitch": 0.9, "reverb": 0.4, "echo": 0.4, "large_space": True}),
+        ("Whisper", {"pitch": 0.9, "volume": 0.3, "intimate": True}),
+        ("Megaphone", {"pitch": 1.0, "bandpass": (400, 4000), "distortion": 0.5}),
+    ],
+    "Atmospheric": [
+        ("Haunted House", {"pitch": 0.7, "reverb": 0.6, "spooky": True}),
+        ("Cathedral", {"pitch": 0.85, "reverb": 0.7, "holy": True}),
+        ("Small Room", {"pitch": 1.0, "reverb": 0.1}),
+        ("Concert Hall", {"pitch": 0.9, "reverb": 0.5, "spacious": True}),
+        ("Forest Echo", {"pitch": 0.88, "echo": 0.5, "nature": True}),
+    ]
+}
+
+
+def iter_presets(presets=None):
+    for category, voices in (presets or VOICE_PRESETS).items():
+        for name, params in voices:
+            yield category, name, params
+
+
+def find_preset(name, presets=None):
+    for _, voice_name, params in iter_presets(presets):
+        if voice_name.lower() == name.lower():
+            return voice_name, params
+    raise KeyError(f"Unknown preset: {name}")
\ No newline at end of file
@@ -0,0 +1,60 @@
+import time
+import tracemalloc
+
+
+class ChainProfile:
+    # Per-stage timings for one render. Stages with the same name (a
+    # streaming chain calls each stage once per block) are accumulated.
+    # Allocated bytes are the tracemalloc peak above the level at stage
+    # entry, so they are only filled in when trace_memory is on.
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self._started_tracing = False
+    
+    def measure(self, name, func, audio, args=()):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.trace_memory:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        
+        start = time.perf_counter()
+        out = func(audio, *args)
+        elapsed = time.perf_counter() - start
+        
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = {"name": name, "calls": 0, "seconds": 0.0, "frames_in": 0,
+                                         "frames_out": 0, "bytes_in": 0, "bytes_out": 0,
+                                         "peak_allocated": 0 if self.trace_memory else None}
+        stage["calls"] += 1
+        stage["seconds"] += elapsed
+        stage["frames_in"] += audio.shape[-1]
+        stage["frames_out"] += out.shape[-1]
+        stage["bytes_in"] += audio.nbytes
+        stage["bytes_out"] += out.nbytes
+        if self.trace_memory:
+            stage["peak_allocated"] = max(stage["peak_allocated"], tracemalloc.get_traced_memory()[1] - base)
+        return out
+    
+    def stop(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+    
+    @property
+    def total(self):
+        return sum(stage["seconds"] for stage in self.stages.values())
+    
+    def as_dict(self):
+        return {"total_seconds": self.total, "stages": list(self.stages.values())}
+    
+    def summary(self, limit=4):
+        # Slowest stages first, short enough for a status bar
+        stages = sorted(self.stages.values(), key=lambda s: s["seconds"], reverse=True)
+        parts = [f"{s['name']} {s['seconds'] * 1000:.0f}ms"
+                 + (f" {s['peak_allocated'] / 1e6:.0f}MB" if s["peak_allocated"] is not None else "")
+                 for s in stages[:limit]]
+        return f"{self.total * 1000:.0f}ms: " + ", ".join(parts)
\ No newline at end of file
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import threading
+
+import numpy as np
+import soundfile as sf
+
+DEFAULT_CAPACITY_SECONDS = 10
+
+
+class RingRecorder:
+    # callback() only copies into a preallocated float32 ring and bumps a
+    # counter; a writer thread drains the ring into a temporary file so long
+    # takes never accumulate in memory. on_block, if given, sees each chunk
+    # the writer saves (on the writer thread), e.g. to follow the take live.
+    # An exception on the writer thread stops the writer; it shows up in
+    # stats() and is raised again by stop().
+    def __init__(self, sample_rate=44100, channels=1, capacity_seconds=DEFAULT_CAPACITY_SECONDS,
+                 path=None, format="WAV", subtype="FLOAT", on_block=None):
+        self.sample_rate = sample_rate
+        self.on_block = on_block
+        self.channels = channels
+        self.ring = np.zeros((int(capacity_seconds * sample_rate), channels), dtype='float32')
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="voice_take_", suffix="." + format.lower())
+            os.close(fd)
+        self.path = path
+        self.format = format
+        self.subtype = subtype
+        self.written = 0
+        self.saved = 0
+        self.dropped_blocks = 0
+        self.dropped_frames = 0
+        self.overflows = 0
+        self.max_fill = 0
+        self.error = None
+        self.wake = threading.Event()
+        self.stopping = False
+        self.thread = None
+    
+    def start(self):
+        self.file = sf.SoundFile(self.path, "w", samplerate=self.sample_rate, channels=self.channels,
+                                 format=self.format, subtype=self.subtype)
+        self.thread = threading.Thread(target=self._drain, daemon=True)
+        self.thread.start()
+    
+    def callback(self, indata, frames, time, status):
+        if status and status.input_overflow:
+            self.overflows += 1
+        capacity = len(self.ring)
+        fill = self.written - self.saved
+        if frames > capacity - fill:
+            self.dropped_blocks += 1
+            self.dropped_frames += frames
+            self.wake.set()
+            return
+        
+        start = self.written % capacity
+        first = min(frames, capacity - start)
+        self.ring[start:start + first] = indata[:first]
+        if first < frames:
+            self.ring[:frames - first] = indata[first:]
+        self.written += frames
+        self.max_fill = max(self.max_fill, fill + frames)
+        self.wake.set()
+    
+    def _drain(self):
+        capacity = len(self.ring)
+        try:
+            with self.file:
+                while True:
+                    self.wake.wait(0.1)
+                    self.wake.clear()
+                    written = self.written
+                    while self.saved < written:
+                        start = self.saved % capacity
+                        count = min(written - self.saved, capacity - start)
+                        self.file.write(self.ring[start:start + count])
+                        if self.on_block is not None:
+                            self.on_block(self.ring[start:start + count])
+                        self.saved += count
+                    if self.stopping and self.saved == self.written:
+                        break
+        except Exception as e:
+            # Once the ring fills up, callback() drops every further block
+            self.error = e
+    
+    def stop(self):
+        self.stopping = True
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.path
+    
+    def stats(self):
+        return {
+            "frames": self.written,
+            "seconds": self.written / self.sample_rate,
+            "saved": self.saved,
+            "dropped_blocks": self.dropped_blocks,
+            "dropped_frames": self.dropped_frames,
+            "overflows": self.overflows,
+            "max_fill": self.max_fill / len(self.ring),
+            "error": None if self.error is None else str(self.error),
+        }
\ No newline at end of file
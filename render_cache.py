@@ -0,0 +1,98 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def audio_fingerprint(audio):
+    audio = np.ascontiguousarray(audio)
+    digest = hashlib.blake2b(audio.view(np.uint8), digest_size=16)
+    digest.update(f"{audio.dtype}{audio.shape}".encode())
+    return digest.hexdigest()
+
+
+def _normalize_value(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return round(float(value), 6)
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize_value(v) for v in value)
+    if isinstance(value, dict):
+        return params_key(value)
+    return value
+
+
+def params_key(params):
+    return tuple(sorted((key, _normalize_value(value)) for key, value in params.items()))
+
+
+class RenderCache:
+    # Rendered clips keyed by (source fingerprint, normalized params), evicted
+    # least-recently-used first once the total size exceeds max_bytes.
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+    
+    def _key(self, source_key, params):
+        return (source_key, params_key(params))
+    
+    def get(self, source_key, params):
+        key = self._key(source_key, params)
+        with self.lock:
+            audio = self.entries.get(key)
+            if audio is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return audio
+    
+    def has(self, source_key, params):
+        with self.lock:
+            return self._key(source_key, params) in self.entries
+    
+    def put(self, source_key, params, audio):
+        if audio.nbytes > self.max_bytes:
+            return
+        audio.flags.writeable = False
+        key = self._key(source_key, params)
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old.nbytes
+            self.entries[key] = audio
+            self.bytes += audio.nbytes
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+    
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class StageCache(RenderCache):
+    # Intermediate stage outputs keyed by (source key, the plan steps that
+    # produced them). A render whose plan starts with the same steps as an
+    # earlier one resumes from the longest cached prefix.
+    def _key(self, source_key, steps):
+        return (source_key, steps)
\ No newline at end of file
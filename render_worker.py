@@ -0,0 +1,142 @@
+import queue
+import threading
+import time
+
+import activity
+import pipeline
+from profiling import ChainProfile
+
+
+class RenderCancelled(Exception):
+    pass
+
+
+class RenderJob:
+    def __init__(self, name, params, audio, sample_rate, key=None, preview=None, skip_silence=False, full=True):
+        self.name = name
+        self.params = params
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.key = key
+        self.preview = preview
+        self.skip_silence = skip_silence
+        self.full = full
+        self.preview_result = None
+        self.preview_seconds = None
+        self.submitted = time.perf_counter()
+        self.cancel_event = threading.Event()
+        self.result = None
+        self.profile = None
+    
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+    
+    def cancel(self):
+        self.cancel_event.set()
+
+
+class RenderWorker:
+    # Renders one job at a time on a background thread. Submitting a new job
+    # cancels whatever is running or waiting, so only the latest click wins.
+    # Events are queued for the Tk thread to pick up with poll(). With
+    # profile set, each job carries a ChainProfile of its stage timings;
+    # trace_memory adds per-stage peak allocations, which turns tracemalloc
+    # on for the whole process while a render runs and slows it down.
+    #
+    # Jobs with a key share a StageCache, so a render only recomputes the
+    # stages after the first one whose settings changed. A job with a
+    # preview (start, end) range renders that slice first and reports it
+    # with a "preview" event before starting on the whole clip; with full
+    # unset it stops there, which is how slider drags get a quick look. With
+    # skip_silence the full render runs over the clip's active regions only
+    # (activity.render_active) and bypasses the stage cache.
+    def __init__(self, profile=False, memo=None, trace_memory=False):
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.memo = memo
+        self.events = queue.Queue()
+        self.condition = threading.Condition()
+        self.pending = None
+        self.current = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+    
+    @property
+    def busy(self):
+        with self.condition:
+            return self.pending is not None or self.current is not None
+    
+    def submit(self, name, params, audio, sample_rate, key=None, preview=None, skip_silence=False, full=True):
+        job = RenderJob(name, params, audio, sample_rate, key, preview, skip_silence, full)
+        with self.condition:
+            self._cancel_locked()
+            self.pending = job
+            self.condition.notify()
+        return job
+    
+    def cancel(self):
+        with self.condition:
+            self._cancel_locked()
+    
+    def _cancel_locked(self):
+        for job in (self.pending, self.current):
+            if job is not None:
+                job.cancel()
+        self.pending = None
+    
+    def poll(self):
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+    
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                job, self.pending = self.pending, None
+                self.current = job
+            
+            def check(stage, fraction):
+                if job.cancelled:
+                    raise RenderCancelled()
+            
+            def progress(stage, fraction):
+                check(stage, fraction)
+                self.events.put(("progress", job, stage, fraction))
+            
+            memo = self.memo if job.key is not None else None
+            
+            if self.profile and job.full and not job.skip_silence:
+                job.profile = ChainProfile(trace_memory=self.trace_memory)
+            
+            try:
+                compiled = pipeline.compile_params(job.params, job.sample_rate)
+                if job.preview is not None:
+                    start, end = job.preview
+                    job.preview_result = compiled.run(job.audio[start:end], check, None, memo,
+                                                      (job.key, start, end))
+                    job.preview_seconds = time.perf_counter() - job.submitted
+                    self.events.put(("preview", job))
+                if job.full:
+                    if job.skip_silence:
+                        job.result = activity.render_active(job.audio, job.sample_rate, job.params,
+                                                            progress=progress, key=job.key)
+                    else:
+                        job.result = compiled.run(job.audio, progress, job.profile, memo, job.key)
+                    if job.cancelled:
+                        raise RenderCancelled()
+                    self.events.put(("done", job))
+            except RenderCancelled:
+                self.events.put(("cancelled", job))
+            except Exception as e:
+                self.events.put(("error", job, e))
+            finally:
+                if job.profile is not None:
+                    job.profile.stop()
+                with self.condition:
+                    self.current = None
\ No newline at end of file
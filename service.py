@@ -0,0 +1,398 @@
+import argparse
+import io
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import soundfile as sf
+
+import pipeline
+from preset_library import PresetError, load_library, merge_libraries, validate_params
+from presets import find_preset, iter_presets
+
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE = 8
+WARM_RATES = (44100, 48000)
+WARM_SECONDS = 0.25
+LATENCY_WINDOW = 1024
+# About ten minutes of 48 kHz stereo as a 32-bit float WAV
+MAX_BODY_BYTES = 256 * 1024 * 1024
+
+
+def _warm(presets, sample_rates):
+    # Worker initializer: compile every preset and push a short clip through
+    # it, so filter designs, impulse responses and pipelines are cached
+    # before the first real request arrives
+    for sample_rate in sample_rates:
+        clip = np.zeros(int(WARM_SECONDS * sample_rate), dtype=np.float32)
+        for _, _, params in iter_presets(presets):
+            pipeline.apply_params(clip, sample_rate, params)
+
+
+def _render(audio, sample_rate, params):
+    start = time.perf_counter()
+    processed = pipeline.apply_params(audio, sample_rate, params)
+    return processed, time.perf_counter() - start
+
+
+def decode_audio(data):
+    audio, sample_rate = sf.read(io.BytesIO(data), dtype='float32', always_2d=True)
+    if audio.shape[1] == 1:
+        return np.ascontiguousarray(audio[:, 0]), sample_rate
+    return audio, sample_rate
+
+
+def encode_audio(audio, sample_rate):
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sample_rate, format='WAV', subtype='FLOAT')
+    return buffer.getvalue()
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+class ServiceMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counts = {"accepted": 0, "completed": 0, "rejected": 0, "failed": 0}
+        self.in_flight = 0
+        self.audio_seconds = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.render_times = deque(maxlen=LATENCY_WINDOW)
+        self.finished_at = deque(maxlen=LATENCY_WINDOW)
+    
+    def count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+    
+    def begin(self):
+        with self.lock:
+            self.counts["accepted"] += 1
+            self.in_flight += 1
+    
+    def end(self, latency=None, render=None, audio_seconds=0.0):
+        with self.lock:
+            self.in_flight -= 1
+            if latency is None:
+                self.counts["failed"] += 1
+                return
+            self.counts["completed"] += 1
+            self.audio_seconds += audio_seconds
+            self.latencies.append(latency)
+            self.render_times.append(render)
+            self.finished_at.append(time.time())
+    
+    def snapshot(self):
+        with self.lock:
+            latencies = np.array(self.latencies)
+            renders = np.array(self.render_times)
+            uptime = time.time() - self.started
+            # Throughput over the recent window rather than since startup
+            window = self.finished_at[-1] - self.finished_at[0] if len(self.finished_at) > 1 else 0.0
+            result = {
+                "uptime": uptime,
+                **self.counts,
+                "in_flight": self.in_flight,
+                "audio_seconds": self.audio_seconds,
+                "requests_per_second": (len(self.finished_at) - 1) / window if window else 0.0,
+            }
+        for name, values in (("latency", latencies), ("render", renders)):
+            if len(values):
+                p50, p95, p99 = np.percentile(values, [50, 95, 99])
+                result[name] = {"p50": p50, "p95": p95, "p99": p99, "max": float(values.max())}
+        return result
+
+
+class RenderService:
+    # A warm process pool behind a bounded admission count. At most
+    # workers + queue_size requests are accepted at once; anything beyond
+    # that is refused straight away (HTTP 503) instead of piling up.
+    def __init__(self, presets=None, workers=None, queue_size=DEFAULT_QUEUE, warm_rates=WARM_RATES,
+                 max_body=MAX_BODY_BYTES):
+        self.presets = presets
+        self.max_body = max_body
+        self.workers = workers or max((os.cpu_count() or 2) - 1, 1)
+        self.queue_size = queue_size
+        self.slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self.metrics = ServiceMetrics()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm,
+                                        initargs=(presets, tuple(warm_rates)))
+    
+    def warm_up(self):
+        # Block until every worker has run its initializer
+        futures = [self.pool.submit(time.sleep, 0.05) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+    
+    def resolve(self, preset=None, params=None):
+        # Request parameters may not name an impulse response file: that
+        # would let any local client have the server read arbitrary paths.
+        # Presets from the server's own libraries can still use one.
+        if preset is not None:
+            return find_preset(preset, self.presets)
+        params = params if params is not None else {}
+        if isinstance(params, dict) and "ir" in params:
+            raise PresetError("ir files can only be used from a preset library loaded by the server")
+        clean, problems = validate_params(params)
+        if problems:
+            raise PresetError("; ".join(problems))
+        return "custom", clean
+    
+    def admit(self):
+        # Takes a slot or raises ServiceBusy; the caller releases it
+        if not self.slots.acquire(blocking=False):
+            self.metrics.count("rejected")
+            raise ServiceBusy(f"{self.workers + self.queue_size} requests already in progress")
+    
+    def release(self):
+        self.slots.release()
+    
+    def render(self, audio, sample_rate, params, admitted=False):
+        if not admitted:
+            self.admit()
+        start = time.perf_counter()
+        self.metrics.begin()
+        try:
+            processed, render_seconds = self.pool.submit(_render, audio, sample_rate, params).result()
+        except BaseException:
+            self.metrics.end()
+            raise
+        finally:
+            if not admitted:
+                self.release()
+        self.metrics.end(time.perf_counter() - start, render_seconds, len(audio) / sample_rate)
+        return processed
+    
+    def shutdown(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    # POST /render?preset=NAME  (or ?params={"pitch": 0.8, ...})
+    #   body: an audio file; reply: the render as a 32-bit float WAV
+    # GET /metrics, GET /presets, GET /health
+    service = None
+    
+    def do_GET(self):
+        path = urllib.parse.urlparse(self.path).path
+        if path == "/metrics":
+            self._json(200, {**self.service.metrics.snapshot(), "workers": self.service.workers,
+                             "queue_size": self.service.queue_size})
+        elif path == "/presets":
+            self._json(200, [{"category": c, "name": n, "params": p} for c, n, p in iter_presets(self.service.presets)])
+        elif path == "/health":
+            self._json(200, {"ok": True})
+        else:
+            self._json(404, {"error": f"no such endpoint: {path}"})
+    
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path != "/render":
+            self._json(404, {"error": f"no such endpoint: {url.path}"})
+            return
+        # The declared length is checked, then admission, so a refused
+        # request costs neither the upload nor the decode; its body is left
+        # unread and the connection closed
+        length = self.headers.get("Content-Length")
+        if length is None or not length.strip().isdigit():
+            self._refuse(400, "Content-Length must be given as a whole number of bytes")
+            return
+        if int(length) > self.service.max_body:
+            self._refuse(413, f"upload of {int(length)} bytes is over the {self.service.max_body} byte limit")
+            return
+        try:
+            self.service.admit()
+        except ServiceBusy as e:
+            self._refuse(503, str(e), {"Retry-After": "1"})
+            return
+        try:
+            query = urllib.parse.parse_qs(url.query)
+            body = self.rfile.read(int(length))
+            try:
+                params = json.loads(query["params"][0]) if "params" in query else None
+                name, params = self.service.resolve(query.get("preset", [None])[0], params)
+                audio, sample_rate = decode_audio(body)
+            except (KeyError, ValueError, RuntimeError) as e:
+                self._json(400, {"error": str(e.args[0] if isinstance(e, KeyError) else e)})
+                return
+            try:
+                processed = self.service.render(audio, sample_rate, params, admitted=True)
+            except Exception as e:
+                self._json(500, {"error": str(e)})
+                return
+        finally:
+            self.service.release()
+        self._reply(200, encode_audio(processed, sample_rate), "audio/wav", {"X-Preset": name})
+    
+    def _refuse(self, status, message, headers=None):
+        self.close_connection = True
+        self._json(status, {"error": message}, {**(headers or {}), "Connection": "close"})
+    
+    def _json(self, status, payload, headers=None):
+        self._reply(status, json.dumps(payload, default=float).encode(), "application/json", headers)
+    
+    def _reply(self, status, data, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(service, port=DEFAULT_PORT, host="127.0.0.1"):
+    handler = type("Handler", (RenderHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+class ServiceClient:
+    def __init__(self, url=f"http://127.0.0.1:{DEFAULT_PORT}", timeout=300):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+    
+    def _request(self, path, data=None):
+        request = urllib.request.Request(self.url + path, data=data, method="POST" if data is not None else "GET")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            message = json.loads(e.read() or b"{}").get("error", e.reason)
+            if e.code == 503:
+                raise ServiceBusy(message) from None
+            raise RuntimeError(f"{e.code}: {message}") from None
+        except (ConnectionResetError, BrokenPipeError) as e:
+            # A refused upload is cut off before the server reads it, and
+            # the reset can arrive before the 503 does
+            raise ServiceBusy(f"connection closed during upload: {e}") from None
+        except urllib.error.URLError as e:
+            if isinstance(e.reason, (ConnectionResetError, BrokenPipeError)):
+                raise ServiceBusy(f"connection closed during upload: {e.reason}") from None
+            raise
+    
+    def render(self, audio, sample_rate, preset=None, params=None):
+        query = {"preset": preset} if preset is not None else {"params": json.dumps(params or {})}
+        data = self._request("/render?" + urllib.parse.urlencode(query), encode_audio(audio, sample_rate))
+        return decode_audio(data)
+    
+    def metrics(self):
+        return json.loads(self._request("/metrics"))
+    
+    def presets(self):
+        return json.loads(self._request("/presets"))
+
+
+def load_test(client, audio, sample_rate, presets, requests, concurrency, backoff=0.05):
+    # Fires requests from several threads at once. A refused request is
+    # retried after a short pause, the way a well-behaved caller would.
+    outcomes = {"ok": 0, "busy": 0, "failed": 0}
+    lock = threading.Lock()
+    jobs = iter(range(requests))
+    
+    def run():
+        for i in jobs:
+            while True:
+                try:
+                    client.render(audio, sample_rate, preset=presets[i % len(presets)])
+                    key = "ok"
+                except ServiceBusy:
+                    with lock:
+                        outcomes["busy"] += 1
+                    time.sleep(backoff)
+                    continue
+                except Exception:
+                    key = "failed"
+                break
+            with lock:
+                outcomes[key] += 1
+    
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    outcomes["elapsed"] = time.perf_counter() - start
+    return outcomes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless render service on localhost")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: cores - 1)")
+    parser.add_argument("--queue", type=int, default=DEFAULT_QUEUE,
+                        help="requests allowed to wait for a worker before new ones get 503")
+    parser.add_argument("--max-body", type=float, default=MAX_BODY_BYTES / 2 ** 20, metavar="MB",
+                        help="largest upload accepted; bigger ones get 413")
+    parser.add_argument("--presets", action="append", default=[], metavar="FILE",
+                        help="load a JSON or TOML preset library (repeatable)")
+    parser.add_argument("--self-test", action="store_true",
+                        help="start on a free port, drive it with a local client, print metrics and exit")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent clients for --self-test")
+    parser.add_argument("--requests", type=int, default=64, help="requests for --self-test")
+    args = parser.parse_args(argv)
+    
+    try:
+        library = merge_libraries(*(load_library(path) for path in args.presets))
+    except (OSError, PresetError) as e:
+        parser.error(str(e))
+    
+    service = RenderService(library, args.workers, args.queue, max_body=int(args.max_body * 2 ** 20))
+    start = time.perf_counter()
+    service.warm_up()
+    print(f"{service.workers} workers warm in {time.perf_counter() - start:.2f}s")
+    server = serve(service, 0 if args.self_test else args.port)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    if not args.self_test:
+        print(f"Listening on {url} (queue {args.queue})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            service.shutdown()
+        return 0
+    
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = ServiceClient(url)
+    try:
+        from benchmark import synthetic_voice
+        audio = synthetic_voice(2, 44100)
+        names = [entry["name"] for entry in client.presets()]
+        for bad in ({"pitch": 0}, {"reverb": 0.5, "ir": __file__}):
+            try:
+                client.render(audio, 44100, params=bad)
+                print(f"invalid params were accepted: {bad}")
+                return 1
+            except RuntimeError as e:
+                print(f"invalid params rejected: {e}")
+        outcomes = load_test(client, audio, 44100, names, args.requests, args.clients)
+        print(f"{outcomes['ok']} rendered, {outcomes['busy']} refusals (503) retried, "
+              f"{outcomes['failed']} failed in {outcomes['elapsed']:.2f}s")
+        print(json.dumps(client.metrics(), indent=2))
+        return 1 if outcomes["failed"] else 0
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
\ No newline at end of file
@@ -0,0 +1,242 @@
+import os
+import time
+
+import numpy as np
+import soundfile as sf
+from scipy import signal
+
+import effects
+from convolution import PARTITION_SIZE, PartitionedConvolver
+from filterbank import get_sos
+from pipeline import plan
+from pitchshift import PitchShifter, TimeStretcher, fft_size
+
+DEFAULT_BLOCKSIZE = 65536
+
+
+class SosFilter:
+    def __init__(self, sos):
+        self.sos = sos
+        self.zi = None
+    
+    def process(self, block):
+        if self.zi is None:
+            self.zi = np.zeros((self.sos.shape[0], *block.shape[:-1], 2))
+        out, self.zi = signal.sosfilt(self.sos, block, zi=self.zi)
+        return out
+
+
+class Tone:
+    def __init__(self, sos, gain):
+        self.band = SosFilter(sos)
+        self.gain = gain
+    
+    def process(self, block):
+        return block + self.band.process(block) * self.gain
+
+
+class Reverb:
+    def __init__(self, spec, amount, block):
+        self.convolver = PartitionedConvolver(spec, block)
+        self.dry = None
+        self.amount = amount
+    
+    def process(self, block):
+        # The convolver releases whole partitions, so dry samples wait here
+        # until their wet counterpart is ready.
+        self.dry = block if self.dry is None else np.concatenate([self.dry, block], axis=-1)
+        wet = self.convolver.process(block)
+        out = self.dry[..., :wet.shape[-1]] + wet * self.amount
+        self.dry = self.dry[..., wet.shape[-1]:]
+        return out
+    
+    def flush(self):
+        wet = self.convolver.flush()
+        dry = self.dry if self.dry is not None else np.zeros(wet.shape)
+        return dry[..., :wet.shape[-1]] + wet * self.amount
+
+
+class Echo:
+    def __init__(self, sample_rate, amount):
+        self.taps = effects.echo_taps(sample_rate, amount)
+        self.length = max((offset for offset, _ in self.taps), default=0)
+        self.history = None
+    
+    def process(self, block):
+        if self.history is None:
+            self.history = np.zeros((*block.shape[:-1], self.length))
+        buffer = np.concatenate([self.history, block], axis=-1)
+        out = np.array(block, dtype=float)
+        end, count = buffer.shape[-1], block.shape[-1]
+        for offset, gain in self.taps:
+            out += buffer[..., end - count - offset:end - offset] * gain
+        self.history = buffer[..., end - self.length:]
+        return out
+
+
+class RingModulator:
+    def __init__(self, sample_rate, freq, mix):
+        self.sample_rate = sample_rate
+        self.freq = freq
+        self.mix = mix
+        self.position = 0
+    
+    def process(self, block):
+        t = np.arange(self.position, self.position + block.shape[-1]) / self.sample_rate
+        self.position += block.shape[-1]
+        return block * (1 - self.mix + self.mix * np.sin(2 * np.pi * self.freq * t))
+
+
+class Pointwise:
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+    
+    def process(self, block):
+        return self.func(block, *self.args)
+
+
+class StreamingChain:
+    # Same stages as the compiled offline pipeline (pipeline.plan), but every
+    # stage keeps its state between blocks. Filters are causal (sosfilt)
+    # rather than the zero-phase filtfilt used for offline renders. Pitch,
+    # speed and reverb stages hold back up to one frame or partition, which
+    # flush() releases. Normalization is left to the caller; output_gain is
+    # the preset's volume to apply after it. Blocks are (frames,) or
+    # (channels, frames), as in the offline stages.
+    def __init__(self, params, sample_rate, n_fft=None, partition_size=PARTITION_SIZE, profile=None):
+        self.sample_rate = sample_rate
+        self.profile = profile
+        self.output_gain = 1.0
+        self.channels = ()
+        self.consumed = 0
+        self.produced = 0
+        self.stages = []
+        n_fft = n_fft or fft_size(sample_rate)
+        
+        for kind, args in plan(params, sample_rate):
+            if kind == "pitch":
+                self.stages.append(PitchShifter(args[0], n_fft))
+            elif kind == "tone":
+                _, btype, cutoff, gain = args
+                self.stages.append(Tone(get_sos(btype, effects.FILTER_ORDER, cutoff, sample_rate), gain))
+            elif kind == "filter":
+                _, btype, cutoff = args
+                self.stages.append(SosFilter(get_sos(btype, effects.FILTER_ORDER, cutoff, sample_rate)))
+            elif kind == "reverb":
+                amount, spec = args
+                self.stages.append(Reverb(spec, amount, partition_size))
+            elif kind == "echo":
+                self.stages.append(Echo(sample_rate, args[0]))
+            elif kind == "speed":
+                self.stages.append(TimeStretcher(args[0], n_fft))
+            elif kind == "ring":
+                self.stages.append(RingModulator(sample_rate, *args))
+            elif kind == "drive":
+                self.stages.append(Pointwise(effects.add_drive, args[0]))
+            elif kind == "rasp":
+                self.stages.append(Pointwise(effects.add_rasp, args[0]))
+            elif kind == "distortion":
+                self.stages.append(Pointwise(effects.add_distortion, args[0]))
+            elif kind == "gain":
+                self.output_gain *= args[0]
+    
+    def process(self, block):
+        # Pitch and speed stages return nothing until they have a whole
+        # frame, and the stages after them are not fed empty blocks
+        self.channels = block.shape[:-1]
+        self.consumed += block.shape[-1]
+        for stage in self.stages:
+            if not block.shape[-1]:
+                break
+            if self.profile is not None:
+                block = self.profile.measure(type(stage).__name__, stage.process, block)
+            else:
+                block = stage.process(block)
+        self.produced += block.shape[-1]
+        return block
+    
+    @property
+    def held(self):
+        # Frames taken in but not yet released: the chain's own delay for
+        # stages that keep the length (pitch, reverb)
+        return self.consumed - self.produced
+    
+    def flush(self):
+        tail = np.zeros((*self.channels, 0))
+        for stage in self.stages:
+            if tail.shape[-1]:
+                tail = stage.process(tail)
+            if hasattr(stage, "flush"):
+                tail = np.concatenate([tail, stage.flush()], axis=-1)
+        return tail
+
+
+def iter_blocks(path, blocksize=DEFAULT_BLOCKSIZE):
+    # Multichannel files come out as (channels, frames) blocks
+    with sf.SoundFile(path) as f:
+        sample_rate = f.samplerate
+        for block in f.blocks(blocksize, dtype='float32', always_2d=f.channels > 1):
+            yield np.ascontiguousarray(block.T), sample_rate
+
+
+def write_block(out, block, stats, start):
+    if not block.shape[-1]:
+        return
+    out.write(block.T)
+    stats["frames_out"] += block.shape[-1]
+    stats["peak"] = max(stats["peak"], float(np.max(np.abs(block))))
+    if stats["first_output"] is None:
+        stats["first_output"] = time.perf_counter() - start
+
+
+def render_file(in_path, out_path, params, blocksize=DEFAULT_BLOCKSIZE, normalize=True, subtype=None,
+                profile=None):
+    start = time.perf_counter()
+    info = sf.info(in_path)
+    chain = StreamingChain(params, info.samplerate, profile=profile)
+    stats = {"frames_in": 0, "frames_out": 0, "peak": 0.0, "first_output": None, "clipped_frames": 0}
+    
+    # Peak normalization needs the whole render, so the first pass goes to a
+    # float32 scratch file that is rescaled block by block in a second pass.
+    # The scratch file is RF64, which has no 4 GB limit, and first_output is
+    # when the caller's file gets its first block, so it comes after the
+    # whole first pass. Without normalization there is one pass: blocks get
+    # the preset's volume and a clip guard, as in the live monitor, and are
+    # written as they are produced.
+    first_path = out_path + ".part.rf64" if normalize else out_path
+    first_subtype = "FLOAT" if normalize else subtype
+    
+    def finish(block):
+        if normalize:
+            return block
+        block = block * chain.output_gain
+        clipped = np.abs(block) > 1.0
+        if clipped.any():
+            stats["clipped_frames"] += int(clipped.sum())
+            np.clip(block, -1.0, 1.0, out=block)
+        return block
+    
+    try:
+        with sf.SoundFile(first_path, "w", samplerate=info.samplerate, channels=info.channels, subtype=first_subtype,
+                          format="RF64" if normalize else None) as out:
+            for block, _ in iter_blocks(in_path, blocksize):
+                stats["frames_in"] += block.shape[-1]
+                write_block(out, finish(chain.process(block)), stats, start)
+            write_block(out, finish(chain.flush()), stats, start)
+        
+        if normalize:
+            gain = chain.output_gain / (stats["peak"] + 0.0001)
+            stats["first_output"] = None
+            with sf.SoundFile(out_path, "w", samplerate=info.samplerate, channels=info.channels, subtype=subtype) as out:
+                for block, _ in iter_blocks(first_path, blocksize):
+                    out.write((block * gain).T)
+                    if stats["first_output"] is None:
+                        stats["first_output"] = time.perf_counter() - start
+    finally:
+        if normalize and os.path.exists(first_path):
+            os.remove(first_path)
+    
+    stats["sample_rate"] = info.samplerate
+    stats["seconds"] = time.perf_counter() - start
+    return stats
\ No newline at end of file
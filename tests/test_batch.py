@@ -0,0 +1,24 @@
+import json
+
+import pytest
+import soundfile as sf
+
+import batch
+from benchmark import synthetic_voice
+
+
+def test_no_normalize_needs_stream(tmp_path):
+    with pytest.raises(SystemExit):
+        batch.main([str(tmp_path), "-p", "Heavy Bass", "--no-normalize"])
+
+
+def test_stream_without_normalization(tmp_path):
+    source = tmp_path / "in"
+    source.mkdir()
+    sf.write(str(source / "take.wav"), synthetic_voice(1, 44100), 44100)
+    output = tmp_path / "out"
+    assert batch.main([str(source), "-p", "Heavy Bass", "-o", str(output), "-j", "1",
+                       "--stream", "--no-normalize"]) == 0
+    manifest = json.loads((output / "manifest.json").read_text())
+    assert manifest["summary"]["normalize"] is False
+    assert sf.info(manifest["results"][0]["outputs"][0]["path"]).frames == 44100
\ No newline at end of file
@@ -0,0 +1,71 @@
+import json
+
+import numpy as np
+
+import benchmark
+
+
+def test_count_allocations_counts_buffer_sized_operations():
+    def run(audio, sample_rate):
+        doubled = audio * 2
+        shifted = audio + 1
+        return doubled, shifted, audio.copy()
+    
+    audio = np.zeros(100_000, dtype=np.float32)
+    assert benchmark.count_allocations(run, audio, 8000) == 3
+    assert benchmark.count_allocations(lambda audio, sr: audio[::2], audio, 8000) == 0
+
+
+def test_results_report_allocations(tmp_path):
+    output = tmp_path / "bench.json"
+    assert benchmark.main(["-d", "4", "-r", "8000", "-e", "normalize", "-e", "Heavy Bass",
+                           "-o", str(output)]) == 0
+    results = json.loads(output.read_text())["results"]
+    assert [r["name"] for r in results] == ["normalize", "Heavy Bass"]
+    assert all(r["allocations"] >= 1 for r in results)
+
+
+def test_channels_work_with_budget_and_compare(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    args = ["--channels", "2", "-d", "0.5", "-r", "8000", "-e", "normalize", "-e", "Heavy Bass"]
+    assert benchmark.main(args + ["-o", str(baseline)]) == 0
+    results = json.loads(baseline.read_text())["results"]
+    assert all(r["channels"] == 2 and r["peak_bytes"] > 0 for r in results)
+    
+    assert benchmark.main(args + ["--memory-budget", "1000", "--compare", str(baseline),
+                                  "--threshold", "1000"]) == 0
+    # A mono baseline with the same durations doesn't stand in for channel runs
+    mono = tmp_path / "mono.json"
+    assert benchmark.main(["-d", "0.5", "-r", "8000", "-e", "normalize", "-o", str(mono)]) == 0
+    assert benchmark.compare(json.loads(mono.read_text()), results, log=lambda line: None) == []
+
+
+def test_compare_flags_allocation_regressions():
+    old = {"kind": "effect", "name": "normalize", "sample_rate": 8000, "duration": 1,
+           "seconds": 1.0, "peak_bytes": 100, "allocations": 2}
+    new = dict(old, allocations=4)
+    assert benchmark.compare({"results": [old]}, [new], log=lambda line: None) == [new]
+    del old["allocations"]
+    assert benchmark.compare({"results": [old]}, [new], log=lambda line: None) == []
+
+def test_long_renders_stay_near_twice_the_clip():
+    # Five minutes is long enough that the chunk allowance is a fraction of
+    # the 2x budget; float64 stages or an extra full-length copy would fail
+    audio = benchmark.synthetic_voice(300, 44100)
+    results = []
+    for kind, name, run in benchmark.cases({"change_pitch", "Haunted House", "Smooth Baritone"}):
+        peak = benchmark.peak_memory(run, audio, 44100)
+        results.append({"kind": kind, "name": name, "sample_rate": 44100, "duration": 300,
+                        "peak_bytes": peak, "peak_over_signal": peak / audio.nbytes})
+    notes = []
+    assert benchmark.over_budget(results, 2, log=notes.append) == []
+    assert notes == []
+    assert max(r["peak_over_signal"] for r in results) < 2.6
+
+
+def test_short_clips_are_reported_as_allowance_only():
+    results = [{"kind": "effect", "name": "normalize", "sample_rate": 8000, "duration": 1,
+                "peak_bytes": 64_000, "peak_over_signal": 2.0}]
+    notes = []
+    assert benchmark.over_budget(results, 2, log=notes.append) == []
+    assert len(notes) == 1 and "allowance" in notes[0]
\ No newline at end of file
@@ -0,0 +1,9 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import fft_batch
+
+
+def test_pool_workers_transform_on_one_thread():
+    assert fft_batch.fft_workers() == fft_batch.FFT_WORKERS
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(fft_batch.fft_workers).result() == 1
\ No newline at end of file
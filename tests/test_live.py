@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from benchmark import synthetic_voice
+from live import LiveMonitor
+
+STATUS = SimpleNamespace(input_overflow=False, output_underflow=False)
+
+
+def run(monitor, audio, round_trip=0.005):
+    time_info = SimpleNamespace(inputBufferAdcTime=1.0, outputBufferDacTime=1.0 + round_trip)
+    out = []
+    for i in range(0, len(audio) - monitor.blocksize + 1, monitor.blocksize):
+        outdata = np.zeros((monitor.blocksize, 1), dtype=np.float32)
+        monitor._callback(audio[i:i + monitor.blocksize, None], outdata, monitor.blocksize, time_info, STATUS)
+        out.append(outdata[:, 0])
+    return np.concatenate(out)
+
+
+def test_latency_includes_the_chain_delay():
+    audio = synthetic_voice(1, 44100)
+    dry = LiveMonitor({})
+    run(dry, audio)
+    assert dry.stats()["chain_latency"] == 0
+    
+    monitor = LiveMonitor({"pitch": 0.8, "reverb": 0.3})
+    run(monitor, audio)
+    stats = monitor.stats()
+    # At least one pitch FFT frame is held back on top of the device round trip
+    assert stats["chain_latency"] * 44100 >= 512
+    assert stats["latency"] == stats["device_latency"] + stats["chain_latency"]
+    assert abs(stats["device_latency"] - 0.005) < 1e-12
+    assert not stats["within_target"]
+
+
+def test_output_applies_volume_and_stays_in_range():
+    audio = synthetic_voice(1, 44100) * np.float32(3)
+    quiet = run(LiveMonitor({"volume": 0.5}), audio * np.float32(0.1))
+    np.testing.assert_allclose(quiet, audio[:len(quiet)] * np.float32(0.05), atol=1e-6)
+    
+    monitor = LiveMonitor({"volume": 2.0})
+    loud = run(monitor, audio)
+    assert np.max(np.abs(loud)) <= 1.0
+    assert monitor.stats()["clipped_frames"] > 0
\ No newline at end of file
@@ -0,0 +1,48 @@
+import os
+import tracemalloc
+
+import numpy as np
+import soundfile as sf
+
+import loader
+import pipeline
+from benchmark import multichannel, synthetic_voice
+
+
+def traced_peak(func, *args, **kwargs):
+    tracemalloc.start()
+    try:
+        result = func(*args, **kwargs)
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_float_wav_renders_from_the_map(tmp_path):
+    path = str(tmp_path / "clip.wav")
+    sf.write(path, synthetic_voice(30, 44100), 44100, subtype="FLOAT")
+    (audio, sample_rate), load_peak = traced_peak(loader.load, path)
+    assert isinstance(audio, np.memmap)
+    assert load_peak < audio.nbytes / 100
+    
+    # Reading every page for the render allocates the output and the band,
+    # never a second copy of the input
+    out, render_peak = traced_peak(pipeline.apply_params, audio, sample_rate, {"bass": 1.5})
+    assert len(out) == len(audio)
+    assert render_peak < 1.5 * audio.nbytes
+    
+    # A 16-bit file has to be converted, so loading it allocates the clip
+    pcm = str(tmp_path / "clip16.wav")
+    sf.write(pcm, np.asarray(audio), 44100, subtype="PCM_16")
+    (converted, _), converted_peak = traced_peak(loader.load, pcm)
+    assert converted_peak >= converted.nbytes
+
+
+def test_copy_survives_removing_the_file(tmp_path):
+    path = str(tmp_path / "take.wav")
+    take = multichannel(synthetic_voice(2, 44100), 2)
+    sf.write(path, take, 44100, subtype="FLOAT")
+    audio, _ = loader.load(path, copy=True)
+    assert not isinstance(audio, np.memmap)
+    os.remove(path)
+    np.testing.assert_array_equal(audio, take)
\ No newline at end of file
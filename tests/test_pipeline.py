@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import pipeline
+import streaming
+from benchmark import synthetic_voice
+from presets import iter_presets
+
+PRESETS = [(name, params) for _, name, params in iter_presets()]
+
+
+@pytest.mark.parametrize("sample_rate", [8000, 11025])
+def test_presets_at_low_sample_rates(sample_rate):
+    audio = synthetic_voice(0.5, sample_rate)
+    for name, params in PRESETS:
+        out = pipeline.apply_params(audio, sample_rate, params)
+        assert np.all(np.isfinite(out)), name
+        chain = streaming.StreamingChain(params, sample_rate)
+        chain.process(audio)
+        chain.flush()
+
+
+def test_tone_cutoffs_stay_below_nyquist():
+    steps = dict((args[0], args) for kind, args in pipeline.plan({"clarity": 1.5, "brightness": 1.5}, 8000)
+                 if kind == "tone")
+    assert steps["clarity"][2] == (2000, 8000 * 0.45)
+    assert "brightness" not in steps
+    full = dict((args[0], args) for kind, args in pipeline.plan({"clarity": 1.5, "brightness": 1.5}, 44100)
+                if kind == "tone")
+    assert full["clarity"][2] == (2000, 5000) and full["brightness"][2] == 5000
+
+def test_echo_below_the_quietest_tap():
+    audio = synthetic_voice(0.5, 44100)
+    params = {"pitch": 0.9, "echo": 0.005}
+    assert "echo" not in [kind for kind, _ in pipeline.plan(params, 44100)]
+    assert np.all(np.isfinite(pipeline.apply_params(audio, 44100, params)))
+    chain = streaming.StreamingChain(params, 44100)
+    chain.process(audio)
+    chain.flush()
+    echo = streaming.Echo(44100, 0.005)
+    assert np.array_equal(echo.process(audio[:256]), audio[:256])
\ No newline at end of file
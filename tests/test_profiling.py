@@ -0,0 +1,15 @@
+import numpy as np
+
+import pipeline
+from benchmark import multichannel, synthetic_voice
+from profiling import ChainProfile
+
+
+def test_stereo_profile_counts_frames():
+    audio = multichannel(synthetic_voice(0.5, 44100), 2)
+    profile = ChainProfile()
+    out = pipeline.apply_params(audio, 44100, {"pitch": 1.2, "bass": 1.5}, profile)
+    assert out.shape == audio.shape
+    for stage in profile.stages.values():
+        assert stage["frames_in"] == stage["frames_out"] == len(audio)
+        assert stage["bytes_in"] == audio.nbytes
\ No newline at end of file
@@ -0,0 +1,62 @@
+import http.client
+import json
+import threading
+
+import numpy as np
+import pytest
+
+import service
+
+
+@pytest.fixture
+def server():
+    # One slot and no warm-up, so a leaked slot shows up as a 503 and the
+    # pool only starts when something is rendered
+    render_service = service.RenderService(workers=1, queue_size=0, warm_rates=(), max_body=1 << 20)
+    httpd = service.serve(render_service, 0)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    render_service.shutdown()
+
+
+def post(httpd, headers, body=b""):
+    connection = http.client.HTTPConnection("127.0.0.1", httpd.server_address[1], timeout=60)
+    try:
+        connection.putrequest("POST", "/render?preset=Heavy%20Bass")
+        for key, value in headers.items():
+            connection.putheader(key, value)
+        connection.endheaders(body)
+        response = connection.getresponse()
+        return response.status, response.getheader("Connection"), response.read()
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize("headers", [{}, {"Content-Length": "abc"}, {"Content-Length": "-5"},
+                                     {"Content-Length": "1.5"}])
+def test_bad_content_length_is_refused_before_reading(server, headers):
+    status, connection, body = post(server, headers)
+    assert status == 400
+    assert connection == "close"
+    assert "Content-Length" in json.loads(body)["error"]
+
+
+def test_oversized_upload_is_refused_before_reading(server):
+    # The body is never sent; the server must answer from the header alone
+    status, connection, body = post(server, {"Content-Length": str(2 << 20)})
+    assert status == 413
+    assert connection == "close"
+    assert "limit" in json.loads(body)["error"]
+
+
+def test_refusals_leave_the_slot_free(server):
+    for headers in ({}, {"Content-Length": "x"}, {"Content-Length": str(2 << 20)}):
+        post(server, headers)
+    audio = np.zeros(800, dtype=np.float32)
+    data = service.encode_audio(audio, 8000)
+    status, _, body = post(server, {"Content-Length": str(len(data))}, data)
+    assert status == 200
+    rendered, sample_rate = service.decode_audio(body)
+    assert sample_rate == 8000 and len(rendered) == len(audio)
\ No newline at end of file
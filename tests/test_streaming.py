@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+import streaming
+from benchmark import multichannel, synthetic_voice
+from presets import iter_presets
+
+PRESETS = [(name, params) for _, name, params in iter_presets()]
+
+
+@pytest.mark.parametrize("name, params", PRESETS, ids=[name for name, _ in PRESETS])
+def test_live_sized_blocks(name, params):
+    # The live monitor's chain: 512-point FFT, 256-frame blocks, no speed
+    params = {key: value for key, value in params.items() if key != "speed"}
+    chain = streaming.StreamingChain(params, 44100, 512, 256)
+    audio = synthetic_voice(0.2, 44100)
+    out = [chain.process(audio[i:i + 256]) for i in range(0, len(audio) - 255, 256)]
+    out = np.concatenate(out + [chain.flush()])
+    assert np.all(np.isfinite(out))
+
+
+@pytest.mark.parametrize("name, params", PRESETS, ids=[name for name, _ in PRESETS])
+def test_odd_length_file(tmp_path, name, params):
+    # The last block is shorter than one pitch frame
+    in_path, out_path = str(tmp_path / "in.wav"), str(tmp_path / "out.wav")
+    sf.write(in_path, synthetic_voice(1, 44100)[:3 * 4096 + 100], 44100)
+    stats = streaming.render_file(in_path, out_path, params, blocksize=4096)
+    assert stats["frames_in"] == 3 * 4096 + 100
+    assert sf.info(out_path).frames == stats["frames_out"] > 0
+
+
+@pytest.mark.parametrize("frames", [100, 65546, 196658])
+def test_default_blocksize_tail(tmp_path, frames):
+    in_path, out_path = str(tmp_path / "in.wav"), str(tmp_path / "out.wav")
+    sf.write(in_path, synthetic_voice(5, 44100)[:frames], 44100)
+    stats = streaming.render_file(in_path, out_path, {"pitch": 0.7, "bass": 2.0})
+    assert stats["frames_out"] == frames
+
+
+def test_stereo_stream_keeps_channels(tmp_path):
+    params = {"pitch": 0.8, "bass": 1.5, "reverb": 0.3, "echo": 0.3, "robotic": True}
+    stereo = multichannel(synthetic_voice(1, 44100), 2)
+    rows = np.ascontiguousarray(stereo.T)
+    
+    chain = streaming.StreamingChain(params, 44100)
+    out = np.concatenate([chain.process(rows[:, i:i + 5000]) for i in range(0, rows.shape[1], 5000)]
+                         + [chain.flush()], axis=-1)
+    for c in range(2):
+        mono = streaming.StreamingChain(params, 44100)
+        expected = np.concatenate([mono.process(rows[c, i:i + 5000]) for i in range(0, rows.shape[1], 5000)]
+                                  + [mono.flush()])
+        np.testing.assert_allclose(out[c], expected, atol=1e-9)
+    
+    in_path, out_path = str(tmp_path / "in.wav"), str(tmp_path / "out.wav")
+    sf.write(in_path, stereo, 44100)
+    stats = streaming.render_file(in_path, out_path, params, blocksize=5000)
+    assert sf.info(out_path).channels == 2
+    assert stats["frames_out"] == len(stereo)
+
+
+def test_one_pass_writes_as_it_renders(tmp_path):
+    in_path, out_path = str(tmp_path / "in.wav"), str(tmp_path / "out.wav")
+    audio = synthetic_voice(20, 44100)
+    sf.write(in_path, audio, 44100, subtype="FLOAT")
+    params = {"pitch": 0.8, "bass": 2.0, "volume": 4.0}
+    stats = streaming.render_file(in_path, out_path, params, normalize=False)
+    # The first block lands long before the render is done, and nothing is
+    # left behind in a scratch file
+    assert stats["first_output"] < stats["seconds"] / 4
+    assert not (tmp_path / "out.wav.part.rf64").exists()
+    
+    # The preset's volume is applied and the overs are clipped
+    out, _ = sf.read(out_path, dtype="float32")
+    chain = streaming.StreamingChain(params, 44100)
+    expected = np.concatenate([chain.process(audio[i:i + streaming.DEFAULT_BLOCKSIZE])
+                               for i in range(0, len(audio), streaming.DEFAULT_BLOCKSIZE)] + [chain.flush()])
+    expected = expected * 4.0
+    assert stats["clipped_frames"] == np.count_nonzero(np.abs(expected) > 1.0) > 0
+    # The output file is 16-bit, one step is 2 ** -15
+    np.testing.assert_allclose(out, np.clip(expected, -1.0, 1.0), atol=2 ** -14)
\ No newline at end of file
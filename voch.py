@@ -1,105 +1,139 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import os
+import threading
+import time
 from datetime import datetime
 
-try:
-    import sounddevice as sd
-    import soundfile as sf
-    import numpy as np
-    from scipy import signal
-    AUDIO_AVAILABLE = True
-except ImportError:
-    AUDIO_AVAILABLE = False
+from preset_library import PresetError, load_library, merge_libraries
+from preset_list import PresetList
+
+STARTUP_STARTED = time.perf_counter()
+
+# The audio stack (scipy, PortAudio, soundfile) takes over a second to
+# import, so it is loaded on a background thread after the window paints.
+# None until load_audio_modules() has run.
+AUDIO_AVAILABLE = None
+
+# While a slider moves, a preview of this much audio from the playhead (or
+# the left edge of the view) is rendered at most every PREVIEW_THROTTLE_MS;
+# the whole clip re-renders once the slider pauses for LIVE_DEBOUNCE_MS
+LIVE_DEBOUNCE_MS = 150
+PREVIEW_THROTTLE_MS = 30
+PREVIEW_SECONDS = 1.5
+# Takes keep the input device's channels up to this many (some host APIs
+# report dozens of virtual inputs)
+MAX_RECORD_CHANNELS = 2
+
+
+def load_audio_modules():
+    global sd, sf, np, LiveMonitor, RenderWorker, RenderCache, StageCache, audio_fingerprint
+    global RingRecorder, load_audio_file, AuditionGrid, WaveformView, Exporter, targets_for, activity
+    global AUDIO_AVAILABLE
+    try:
+        import sounddevice as sd
+        import soundfile as sf
+        import numpy as np
+        from live import LiveMonitor
+        from render_worker import RenderWorker
+        from render_cache import RenderCache, StageCache, audio_fingerprint
+        from recorder import RingRecorder
+        from loader import load as load_audio_file
+        from audition import AuditionGrid
+        from waveview import WaveformView
+        from exporter import Exporter, targets_for
+        import activity
+        AUDIO_AVAILABLE = True
+    except ImportError:
+        AUDIO_AVAILABLE = False
+    return AUDIO_AVAILABLE
 
 class VoiceEffectsStudio:
-    def __init__(self, root):
+    def __init__(self, root, library_paths=(), trace_memory=False):
         self.root = root
         self.root.title("Voice Effects Studio - 50+ Voices")
-        self.root.geometry("1100x800")
+        self.root.geometry("1100x980")
         self.root.configure(bg="#1a1a2e")
         
-        if not AUDIO_AVAILABLE:
-            self.show_installation_guide()
-            return
+        self.startup_times = {}
+        self.on_ready = None
+        self.trace_memory = trace_memory
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.import_thread = threading.Thread(target=self.import_audio_modules, daemon=True)
+        self.import_thread.start()
         
         self.audio_data = None
         self.sample_rate = None
         self.output_path = os.path.join(os.path.expanduser("~"), "Downloads", "VoiceEffects")
         self.is_recording = False
         self.is_playing = False
-        self.recording_data = []
+        self.recorder = None
+        self.recording_path = None
+        self.current_params = {}
+        self.live_monitor = None
+        self.render_worker = None
+        self.render_polling = False
+        self.render_cache = None
+        self.source_key = None
+        self.audition = None
+        self.record_pyramid = None
+        self.exporter = None
+        self.slider_job = None
+        self.preview_job = None
+        self.preview_sent = 0.0
         
         os.makedirs(self.output_path, exist_ok=True)
         
-        # Define voice presets
-        self.voice_presets = {
-            "Masculine Deep Voices": [
-                ("Smooth Baritone", {"pitch": 0.75, "bass": 1.5, "reverb": 0.2}),
-                ("Heavy Bass", {"pitch": 0.7, "bass": 2.0, "reverb": 0.1}),
-                ("Radio Announcer", {"pitch": 0.85, "bass": 1.3, "bandpass": (300, 3000)}),
-                ("News Anchor", {"pitch": 0.9, "bass": 1.2, "clarity": 1.5}),
-                ("Documentary Narrator", {"pitch": 0.8, "bass": 1.4, "reverb": 0.3}),
-                ("Movie Trailer", {"pitch": 0.65, "bass": 2.5, "reverb": 0.4, "dramatic": True}),
-                ("Motivational Speaker", {"pitch": 0.85, "bass": 1.6, "energy": 1.2}),
-                ("Jazz Singer", {"pitch": 0.8, "bass": 1.3, "warmth": 1.4}),
-            ],
-            "Character Archetypes": [
-                ("Wise Elder", {"pitch": 0.75, "raspy": 0.3, "reverb": 0.25}),
-                ("Military Commander", {"pitch": 0.8, "bass": 1.5, "authority": 1.3}),
-                ("Action Hero", {"pitch": 0.85, "bass": 1.4, "grit": 1.2}),
-                ("Detective Noir", {"pitch": 0.78, "bass": 1.3, "smoky": 1.4}),
-                ("Space Captain", {"pitch": 0.82, "bass": 1.2, "reverb": 0.3}),
-                ("Medieval Knight", {"pitch": 0.77, "bass": 1.6, "echo": 0.4}),
-                ("Pirate Captain", {"pitch": 0.8, "raspy": 0.4, "grit": 1.3}),
-                ("Wild West Sheriff", {"pitch": 0.83, "bass": 1.3, "drawl": 1.2}),
-            ],
-            "Professional Voices": [
-                ("Corporate CEO", {"pitch": 0.88, "bass": 1.2, "authority": 1.4}),
-                ("Sports Commentator", {"pitch": 0.95, "energy": 1.5, "clarity": 1.3}),
-                ("Game Show Host", {"pitch": 1.0, "energy": 1.6, "brightness": 1.2}),
-                ("Podcast Host", {"pitch": 0.9, "bass": 1.1, "warmth": 1.3}),
-                ("Audio Book Narrator", {"pitch": 0.85, "bass": 1.2, "clarity": 1.5}),
-                ("Voice Actor", {"pitch": 0.9, "versatile": 1.0}),
-                ("Radio DJ", {"pitch": 0.88, "bass": 1.4, "energy": 1.3}),
-                ("Meditation Guide", {"pitch": 0.75, "bass": 1.1, "soothing": 1.5}),
-            ],
-            "Dramatic Styles": [
-                ("Shakespearean", {"pitch": 0.82, "bass": 1.3, "theatrical": 1.4}),
-                ("Opera Singer", {"pitch": 0.8, "bass": 1.5, "reverb": 0.5}),
-                ("Stage Actor", {"pitch": 0.88, "projection": 1.4, "clarity": 1.3}),
-                ("Poetry Reader", {"pitch": 0.85, "bass": 1.2, "lyrical": 1.3}),
-                ("Orator", {"pitch": 0.87, "bass": 1.3, "authority": 1.5}),
-            ],
-            "Modern Styles": [
-                ("Hip Hop Vocal", {"pitch": 0.85, "bass": 1.8, "punch": 1.4}),
-                ("Rock Vocalist", {"pitch": 0.9, "grit": 1.5, "power": 1.4}),
-                ("Blues Singer", {"pitch": 0.78, "raspy": 0.4, "soulful": 1.4}),
-                ("Country Singer", {"pitch": 0.88, "warmth": 1.3, "twang": 1.2}),
-                ("R&B Smooth", {"pitch": 0.82, "bass": 1.4, "silky": 1.3}),
-            ],
-            "Fun & Creative": [
-                ("Robot", {"pitch": 1.0, "robotic": True}),
-                ("Chipmunk", {"pitch": 1.6, "speed": 1.2}),
-                ("Monster", {"pitch": 0.5, "bass": 3.0, "distortion": 1.5}),
-                ("Alien", {"pitch": 1.2, "weird": True, "reverb": 0.3}),
-                ("Cave Troll", {"pitch": 0.55, "bass": 2.5, "echo": 0.6}),
-                ("Telephone", {"pitch": 1.0, "bandpass": (300, 3400)}),
-                ("Underwater", {"pitch": 0.8, "muffled": True}),
-                ("Stadium Announcer", {"pitch": 0.9, "echo": 0.4, "large_space": True}),
-                ("Whisper", {"pitch": 0.9, "volume": 0.3, "intimate": True}),
-                ("Megaphone", {"pitch": 1.0, "bandpass": (400, 4000), "distortion": 0.5}),
-            ],
-            "Atmospheric": [
-                ("Haunted House", {"pitch": 0.7, "reverb": 0.6, "spooky": True}),
-                ("Cathedral", {"pitch": 0.85, "reverb": 0.7, "holy": True}),
-                ("Small Room", {"pitch": 1.0, "reverb": 0.1}),
-                ("Concert Hall", {"pitch": 0.9, "reverb": 0.5, "spacious": True}),
-                ("Forest Echo", {"pitch": 0.88, "echo": 0.5, "nature": True}),
-            ]
-        }
+        self.libraries = []
+        library_errors = []
+        for path in library_paths:
+            try:
+                self.libraries.append(load_library(path))
+            except (OSError, PresetError) as e:
+                library_errors.append(str(e))
+        self.voice_presets = merge_libraries(*self.libraries)
         
         self.create_widgets()
+        self.root.update()
+        self.startup_times["first_paint"] = time.perf_counter() - STARTUP_STARTED
+        self.root.after(20, self.check_startup)
+        for error in library_errors:
+            messagebox.showerror("Preset Library", error)
+    
+    def import_audio_modules(self):
+        started = time.perf_counter()
+        load_audio_modules()
+        self.startup_times["import"] = time.perf_counter() - started
+    
+    def check_startup(self):
+        if self.import_thread.is_alive():
+            self.root.after(20, self.check_startup)
+            return
+        
+        if not AUDIO_AVAILABLE:
+            for child in self.root.winfo_children():
+                child.destroy()
+            self.show_installation_guide()
+            if self.on_ready is not None:
+                self.on_ready()
+            return
+        
+        self.render_worker = RenderWorker(profile=True, memo=StageCache(), trace_memory=self.trace_memory)
+        self.render_cache = RenderCache()
+        self.waveform = WaveformView(self.waveform_slot)
+        self.waveform.pack(fill=tk.X)
+        for widget in self.startup_controls:
+            widget.config(state=tk.NORMAL)
+        self.startup_times["ready"] = time.perf_counter() - STARTUP_STARTED
+        self.status_label.config(text="Ready - Load or record audio to begin")
+        self.profile_label.config(text=self.startup_report())
+        if self.on_ready is not None:
+            self.on_ready()
+    
+    def startup_report(self):
+        times = self.startup_times
+        return (f"Startup: paint {times['first_paint'] * 1000:.0f} ms | "
+                f"imports {times['import'] * 1000:.0f} ms | ready {times['ready'] * 1000:.0f} ms")
     
     def show_installation_guide(self):
         frame = tk.Frame(self.root, bg="#1a1a2e")
@@ -157,16 +191,32 @@ class VoiceEffectsStudio:
                                     command=self.toggle_recording,
                                     bg="#ff6b6b", fg="white", 
                                     font=("Papyrus", 10, "bold"),
-                                    relief=tk.FLAT, padx=15, pady=8)
+                                    relief=tk.FLAT, padx=15, pady=8,
+                                    state=tk.DISABLED)
         self.record_btn.pack(fill=tk.X, pady=3)
         
-        tk.Button(rec_inner, text="📁 Load File", 
-                 command=self.load_audio,
-                 bg="#48dbfb", fg="white", 
-                 font=("Papyrus", 10, "bold"),
-                 relief=tk.FLAT, padx=15, pady=8).pack(fill=tk.X, pady=3)
+        self.live_btn = tk.Button(rec_inner, text="🎧 Live Monitor", 
+                                  command=self.toggle_live,
+                                  bg="#a29bfe", fg="white", 
+                                  font=("Papyrus", 10, "bold"),
+                                  relief=tk.FLAT, padx=15, pady=8,
+                                  state=tk.DISABLED)
+        self.live_btn.pack(fill=tk.X, pady=3)
+        
+        self.load_btn = tk.Button(rec_inner, text="📁 Load File", 
+                                  command=self.load_audio,
+                                  bg="#48dbfb", fg="white", 
+                                  font=("Papyrus", 10, "bold"),
+                                  relief=tk.FLAT, padx=15, pady=8,
+                                  state=tk.DISABLED)
+        self.load_btn.pack(fill=tk.X, pady=3)
         
-        self.record_status = tk.Label(rec_inner, text="Ready", 
+        self.trim_record = tk.BooleanVar(value=False)
+        tk.Checkbutton(rec_inner, text="Trim silence from takes", variable=self.trim_record,
+                       bg="#0f3460", fg="white", selectcolor="#1a1a2e", activebackground="#0f3460",
+                       font=("Papyrus", 8)).pack(anchor=tk.W)
+        
+        self.record_status = tk.Label(rec_inner, text="Loading audio engine...", 
                                       font=("Papyrus", 8), bg="#0f3460", 
                                       fg="#feca57")
         self.record_status.pack(pady=3)
@@ -213,7 +263,31 @@ class VoiceEffectsStudio:
         export_inner = tk.Frame(export_frame, bg="#0f3460")
         export_inner.pack(fill=tk.X, padx=8, pady=8)
         
-        self.export_btn = tk.Button(export_inner, text="💾 Save WAV", 
+        format_row = tk.Frame(export_inner, bg="#0f3460")
+        format_row.pack(fill=tk.X)
+        self.export_formats = {}
+        for name in ("WAV", "FLAC", "OGG"):
+            self.export_formats[name] = tk.BooleanVar(value=name == "WAV")
+            tk.Checkbutton(format_row, text=name, variable=self.export_formats[name],
+                           bg="#0f3460", fg="white", selectcolor="#1a1a2e", activebackground="#0f3460",
+                           font=("Papyrus", 8)).pack(side=tk.LEFT)
+        
+        depth_row = tk.Frame(export_inner, bg="#0f3460")
+        depth_row.pack(fill=tk.X, pady=(0, 4))
+        self.export_depth = tk.StringVar(value="16-bit")
+        depth_menu = tk.OptionMenu(depth_row, self.export_depth, "16-bit", "24-bit", "32-bit float")
+        depth_menu.config(bg="#2d3561", fg="white", font=("Papyrus", 8), relief=tk.FLAT, highlightthickness=0)
+        depth_menu.pack(side=tk.LEFT)
+        self.export_dither = tk.BooleanVar(value=True)
+        tk.Checkbutton(depth_row, text="Dither", variable=self.export_dither,
+                       bg="#0f3460", fg="white", selectcolor="#1a1a2e", activebackground="#0f3460",
+                       font=("Papyrus", 8)).pack(side=tk.LEFT, padx=(8, 0))
+        self.trim_export = tk.BooleanVar(value=False)
+        tk.Checkbutton(depth_row, text="Trim", variable=self.trim_export,
+                       bg="#0f3460", fg="white", selectcolor="#1a1a2e", activebackground="#0f3460",
+                       font=("Papyrus", 8)).pack(side=tk.LEFT)
+        
+        self.export_btn = tk.Button(export_inner, text="💾 Export", 
                                     command=self.export_audio,
                                     bg="#4CAF50", fg="white", 
                                     font=("Papyrus", 9, "bold"),
@@ -241,48 +315,33 @@ class VoiceEffectsStudio:
         tk.Label(preset_header, text="🎭 Voice Presets", 
                 font=("Papyrus", 12, "bold"), bg="#0f3460", fg="#00d9ff").pack(side=tk.LEFT)
         
+        self.audition_btn = tk.Button(preset_header, text="🎛️ Render All", 
+                                      command=self.toggle_audition,
+                                      bg="#6c5ce7", fg="white", 
+                                      font=("Papyrus", 8, "bold"),
+                                      relief=tk.FLAT, padx=10, pady=2,
+                                      state=tk.DISABLED)
+        self.audition_btn.pack(side=tk.RIGHT, padx=(10, 0))
+        
+        tk.Button(preset_header, text="📚 Library", 
+                 command=self.load_library,
+                 bg="#636e72", fg="white", 
+                 font=("Papyrus", 8, "bold"),
+                 relief=tk.FLAT, padx=10, pady=2).pack(side=tk.RIGHT, padx=(10, 0))
+        
+        # Render only the active (non-silent) parts of the clip
+        self.skip_silence = tk.BooleanVar(value=False)
+        tk.Checkbutton(preset_header, text="Skip silence", variable=self.skip_silence,
+                       command=self.on_skip_silence,
+                       bg="#0f3460", fg="white", selectcolor="#1a1a2e", activebackground="#0f3460",
+                       font=("Papyrus", 8)).pack(side=tk.RIGHT, padx=(10, 0))
+        
         tk.Label(preset_header, text="Click any voice style to apply", 
                 font=("Papyrus", 8), bg="#0f3460", fg="#95afc0").pack(side=tk.RIGHT)
         
-        # Scrollable canvas
-        canvas_frame = tk.Frame(center_panel, bg="#0f3460")
-        canvas_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
-        
-        canvas = tk.Canvas(canvas_frame, bg="#1a1a2e", highlightthickness=0)
-        scrollbar = tk.Scrollbar(canvas_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = tk.Frame(canvas, bg="#1a1a2e")
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        # Add voice preset buttons
-        for category, voices in self.voice_presets.items():
-            cat_frame = tk.LabelFrame(scrollable_frame, text=f"  {category}  ", 
-                                     font=("Papyrus", 10, "bold"), bg="#1a1a2e", 
-                                     fg="#00d9ff", relief=tk.FLAT)
-            cat_frame.pack(fill=tk.X, padx=10, pady=8)
-            
-            btn_container = tk.Frame(cat_frame, bg="#1a1a2e")
-            btn_container.pack(fill=tk.X, padx=8, pady=8)
-            
-            for voice_name, params in voices:
-                btn = tk.Button(btn_container, text=voice_name,
-                               command=lambda n=voice_name, p=params: self.apply_preset(n, p),
-                               bg="#2d3561", fg="white", 
-                               font=("Papyrus", 9),
-                               relief=tk.FLAT, padx=15, pady=6,
-                               cursor="hand2", anchor=tk.W)
-                btn.pack(fill=tk.X, pady=2)
-                btn.bind("<Enter>", lambda e, b=btn: b.config(bg="#00d9ff", fg="#1a1a2e"))
-                btn.bind("<Leave>", lambda e, b=btn: b.config(bg="#2d3561", fg="white"))
+        # Searchable preset list; only the visible rows are drawn
+        self.preset_list = PresetList(center_panel, self.voice_presets, self.apply_preset)
+        self.preset_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
         
         # Right panel - Custom controls
         right_panel = tk.Frame(main_container, bg="#0f3460", relief=tk.RAISED, bd=2, width=260)
@@ -318,12 +377,19 @@ class VoiceEffectsStudio:
         # Distortion
         self.add_slider(custom_frame, "Grit/Rasp:", 0.0, 2.0, 0.0, "grit_var")
         tk.Label(custom_frame, text="(Voice Roughness)", font=("Papyrus", 7), 
-                bg="#0f3460", fg="#95afc0").pack(pady=(0, 20))
+                bg="#0f3460", fg="#95afc0").pack(pady=(0, 10))
+        
+        self.live_update = tk.BooleanVar(value=True)
+        tk.Checkbutton(custom_frame, text="Update while dragging", variable=self.live_update,
+                       bg="#0f3460", fg="white", selectcolor="#1a1a2e", activebackground="#0f3460",
+                       font=("Papyrus", 8)).pack(anchor=tk.W, pady=(0, 10))
         
-        tk.Button(custom_frame, text="Apply Custom Settings", 
-                 command=self.apply_custom,
-                 bg="#e17055", fg="white", font=("Papyrus", 10, "bold"),
-                 relief=tk.FLAT, padx=15, pady=10).pack(fill=tk.X)
+        self.apply_custom_btn = tk.Button(custom_frame, text="Apply Custom Settings", 
+                                          command=self.apply_custom,
+                                          bg="#e17055", fg="white", font=("Papyrus", 10, "bold"),
+                                          relief=tk.FLAT, padx=15, pady=10,
+                                          state=tk.DISABLED)
+        self.apply_custom_btn.pack(fill=tk.X)
         
         tk.Button(custom_frame, text="Reset to Default", 
                  command=self.reset_sliders,
@@ -335,7 +401,7 @@ class VoiceEffectsStudio:
         status_bar.pack(side=tk.BOTTOM, fill=tk.X)
         status_bar.pack_propagate(False)
         
-        self.status_label = tk.Label(status_bar, text="Ready - Load or record audio to begin", 
+        self.status_label = tk.Label(status_bar, text="Loading audio engine...", 
                                      font=("Papyrus", 9), bg="#16213e", 
                                      fg="#95afc0", anchor=tk.W)
         self.status_label.pack(side=tk.LEFT, padx=10)
@@ -344,6 +410,19 @@ class VoiceEffectsStudio:
                                             font=("Papyrus", 9), bg="#16213e", 
                                             fg="#feca57", anchor=tk.E)
         self.current_effect_label.pack(side=tk.RIGHT, padx=10)
+        
+        # Waveform / spectrogram panel above the status bar; the view itself
+        # needs numpy and is added once the audio modules are loaded
+        self.waveform_slot = tk.Frame(self.root, bg="#1a1a2e")
+        self.waveform_slot.pack(side=tk.BOTTOM, fill=tk.X, padx=15, pady=(0, 10))
+        
+        self.profile_label = tk.Label(status_bar, text="", 
+                                      font=("Papyrus", 8), bg="#16213e", 
+                                      fg="#95afc0", anchor=tk.E)
+        self.profile_label.pack(side=tk.RIGHT, padx=10)
+        
+        self.startup_controls = [self.record_btn, self.live_btn, self.load_btn,
+                                 self.audition_btn, self.apply_custom_btn]
     
     def add_slider(self, parent, label, from_, to, default, var_name):
         tk.Label(parent, text=label, font=("Papyrus", 9, "bold"), 
@@ -356,9 +435,31 @@ class VoiceEffectsStudio:
                          variable=var, orient=tk.HORIZONTAL,
                          bg="#0f3460", fg="white", font=("Papyrus", 8),
                          highlightthickness=0, troughcolor="#1a1a2e",
-                         showvalue=True)
+                         showvalue=True, command=self.on_slider)
         slider.pack(fill=tk.X, padx=5)
     
+    def on_slider(self, value):
+        if self.preview_job is None:
+            wait = PREVIEW_THROTTLE_MS - (time.perf_counter() - self.preview_sent) * 1000
+            self.preview_job = self.root.after(max(int(wait), 0), self.apply_preview)
+        if self.slider_job is not None:
+            self.root.after_cancel(self.slider_job)
+        self.slider_job = self.root.after(LIVE_DEBOUNCE_MS, self.apply_live)
+    
+    def apply_preview(self):
+        # Preview slice only (short clips render whole); the worker drops it
+        # as soon as a newer job comes in
+        self.preview_job = None
+        self.preview_sent = time.perf_counter()
+        if self.live_update.get() and self.render_worker is not None and self.audio_data is not None:
+            region = self.preview_region()
+            self.start_render("Custom", self.custom_params(), preview=region is not None, full=region is None)
+    
+    def apply_live(self):
+        self.slider_job = None
+        if self.live_update.get() and self.render_worker is not None:
+            self.apply_custom(live=True)
+    
     def reset_sliders(self):
         self.pitch_var.set(1.0)
         self.bass_var.set(1.0)
@@ -367,6 +468,50 @@ class VoiceEffectsStudio:
         self.grit_var.set(0.0)
         self.status_label.config(text="Sliders reset to default")
     
+    def toggle_live(self):
+        if self.live_monitor is None:
+            self.start_live()
+        else:
+            self.stop_live()
+    
+    def start_live(self):
+        if self.is_recording:
+            messagebox.showwarning("Recording", "Stop recording before starting live monitoring")
+            return
+        
+        try:
+            self.live_monitor = LiveMonitor(self.current_params)
+            self.live_monitor.start()
+        except Exception as e:
+            self.live_monitor = None
+            messagebox.showerror("Error", f"Failed to start live monitoring:\n{str(e)}")
+            return
+        
+        self.live_btn.config(text="⏹️ Stop Live", bg="#4CAF50")
+        self.status_label.config(text="Live monitoring - click a preset to hear it")
+        self.update_live_status()
+    
+    def stop_live(self):
+        if self.live_monitor is not None:
+            self.live_monitor.stop()
+            self.live_monitor = None
+        self.live_btn.config(text="🎧 Live Monitor", bg="#a29bfe")
+        self.record_status.config(text="Ready", fg="#feca57")
+        self.status_label.config(text="Live monitoring stopped")
+    
+    def update_live_status(self):
+        if self.live_monitor is None:
+            return
+        
+        stats = self.live_monitor.stats()
+        latency = "--" if stats["latency"] is None else f"{stats['latency'] * 1000:.1f}"
+        self.record_status.config(
+            text=f"Live {latency} ms incl. chain {stats['chain_latency'] * 1000:.1f} "
+                 f"(target {stats['latency_target'] * 1000:.0f}) @ {stats['blocksize']}\n"
+                 f"xruns {stats['xruns']} | late {stats['deadline_misses']} | load {stats['max_load']:.0%}",
+            fg="#feca57" if stats["within_target"] and not stats["xruns"] else "#ff6b6b")
+        self.root.after(500, self.update_live_status)
+    
     def toggle_recording(self):
         if not self.is_recording:
             self.start_recording()
@@ -374,33 +519,103 @@ class VoiceEffectsStudio:
             self.stop_recording()
     
     def start_recording(self):
+        if self.live_monitor is not None:
+            self.stop_live()
+        
         self.is_recording = True
-        self.recording_data = []
+        self.waveform.clear_track("processed")
+        self.record_pyramid = self.waveform.start_live_track("original", 44100)
+        device = sd.query_devices(kind="input")
+        channels = min(max(int(device["max_input_channels"]), 1), MAX_RECORD_CHANNELS)
+        self.recorder = RingRecorder(sample_rate=44100, channels=channels,
+                                     on_block=lambda block: self.record_pyramid.append(
+                                         block.mean(axis=1, dtype=np.float32) if channels > 1 else block[:, 0]))
+        self.recorder.start()
         self.record_btn.config(text="⏹️ Stop", bg="#4CAF50")
         self.record_status.config(text="Recording...")
         self.status_label.config(text="Recording... Speak now!")
         
-        def record_callback(indata, frames, time, status):
-            if self.is_recording:
-                self.recording_data.append(indata.copy())
-        
-        self.stream = sd.InputStream(callback=record_callback, channels=1, 
+        self.stream = sd.InputStream(callback=self.recorder.callback, channels=channels, 
                                      samplerate=44100, dtype='float32')
         self.stream.start()
+        self.update_record_status()
+    
+    def update_record_status(self):
+        if not self.is_recording:
+            return
+        
+        stats = self.recorder.stats()
+        if stats["error"] is not None:
+            self.stop_recording()
+            return
+        self.record_status.config(
+            text=f"Recording... {stats['seconds']:.1f}s\n"
+                 f"dropped {stats['dropped_blocks']} blocks | buffer {stats['max_fill']:.0%}",
+            fg="#ff6b6b" if stats["dropped_blocks"] else "#feca57")
+        self.waveform.follow()
+        self.root.after(250, self.update_record_status)
     
     def stop_recording(self):
         if self.is_recording:
-            self.is_recording = False
-            self.stream.stop()
-            self.stream.close()
+            path = self.finish_take()
+            stats = self.recorder.stats()
+            if path is None:
+                self.record_btn.config(text="🎙️ Record", bg="#ff6b6b")
+                self.record_status.config(text="Recording failed", fg="#ff6b6b")
+                return
+            
+            if self.recording_path is not None:
+                self.remove_take(self.recording_path)
+            self.recording_path = path
             
-            if self.recording_data:
-                self.audio_data = np.concatenate(self.recording_data, axis=0).flatten()
-                self.sample_rate = 44100
+            if stats["frames"]:
+                # A copy, since the take's file is deleted with the next take
+                self.audio_data, self.sample_rate = load_audio_file(path, copy=True)
+                if self.trim_record.get():
+                    start, end = activity.trim_bounds(self.audio_data, self.sample_rate)
+                    if (start, end) != (0, len(self.audio_data)):
+                        self.audio_data = self.audio_data[start:end]
+                        self.record_pyramid = None
                 self.on_audio_loaded()
             
             self.record_btn.config(text="🎙️ Record", bg="#ff6b6b")
-            self.record_status.config(text="Recording stopped")
+            self.record_status.config(text=f"Recording stopped ({stats['dropped_blocks']} blocks dropped)",
+                                      fg="#feca57")
+    
+    def finish_take(self):
+        # Path of the finished take, or None when the writer failed; a
+        # failed take is reported and its file removed
+        self.is_recording = False
+        self.stream.stop()
+        self.stream.close()
+        try:
+            return self.recorder.stop()
+        except Exception as e:
+            self.remove_take(self.recorder.path)
+            messagebox.showerror("Error", f"Recording failed:\n{str(e)}")
+            return None
+    
+    def remove_take(self, path):
+        # Takes are temporary files, kept until the next take or exit
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            messagebox.showwarning("Warning", f"Could not remove temporary take {path}:\n{str(e)}")
+    
+    def on_close(self):
+        if self.is_recording:
+            path = self.finish_take()
+            if path is not None:
+                self.remove_take(path)
+        if self.live_monitor is not None:
+            self.live_monitor.stop()
+            self.live_monitor = None
+        if self.recording_path is not None:
+            self.remove_take(self.recording_path)
+            self.recording_path = None
+        self.root.destroy()
     
     def load_audio(self):
         filename = filedialog.askopenfilename(
@@ -410,9 +625,7 @@ class VoiceEffectsStudio:
         
         if filename:
             try:
-                self.audio_data, self.sample_rate = sf.read(filename)
-                if len(self.audio_data.shape) > 1:
-                    self.audio_data = self.audio_data.mean(axis=1)
+                self.audio_data, self.sample_rate = load_audio_file(filename)
                 self.on_audio_loaded()
                 self.status_label.config(text=f"Loaded: {os.path.basename(filename)}")
             except Exception as e:
@@ -420,149 +633,215 @@ class VoiceEffectsStudio:
     
     def on_audio_loaded(self):
         duration = len(self.audio_data) / self.sample_rate
-        self.info_label.config(text=f"✓ Audio Loaded\n\nDuration:\n{duration:.2f}s\n\nSample Rate:\n{self.sample_rate} Hz")
+        channels = self.audio_data.shape[1] if self.audio_data.ndim > 1 else 1
+        self.info_label.config(text=f"✓ Audio Loaded\n\nDuration:\n{duration:.2f}s\n\nSample Rate:\n{self.sample_rate} Hz"
+                                    f"\n\nChannels:\n{channels}")
         self.play_btn.config(state=tk.NORMAL)
         self.export_btn.config(state=tk.NORMAL)
         self.record_status.config(text="Ready!")
         
-        self.original_audio = self.audio_data.copy()
+        # One canonical float32 source per clip; renders borrow it read-only
+        self.original_audio = self.audio_data
+        self.original_audio.flags.writeable = False
         self.processed_audio = None
+        pyramid, self.record_pyramid = self.record_pyramid, None
+        self.waveform.set_track("original", self.original_audio, self.sample_rate, pyramid)
+        self.waveform.clear_track("processed")
+        
+        self.render_worker.cancel()
+        self.stop_audition()
+        self.render_cache.clear()
+        self.render_worker.memo.clear()
+        self.source_key = audio_fingerprint(self.original_audio)
+        self.preset_list.clear_marks()
     
-    def apply_preset(self, name, params):
+    def on_skip_silence(self):
+        # Cached renders were made with the other setting
+        self.stop_audition()
+        if self.render_cache is not None:
+            self.render_cache.clear()
+        self.preset_list.clear_marks()
+        if self.audio_data is not None:
+            segments = activity.segment_map(self.original_audio, self.sample_rate, self.source_key)
+            share = activity.active_share(segments, len(self.original_audio))
+            self.status_label.config(text=f"Skip silence {'on' if self.skip_silence.get() else 'off'}: "
+                                          f"{len(segments)} active regions, {share:.0%} of the clip")
+    
+    def load_library(self):
+        filename = filedialog.askopenfilename(
+            title="Load Preset Library",
+            filetypes=[("Preset libraries", "*.json *.toml"), ("All Files", "*.*")]
+        )
+        
+        if filename:
+            try:
+                self.libraries.append(load_library(filename))
+            except (OSError, PresetError) as e:
+                messagebox.showerror("Preset Library", str(e))
+                return
+            self.voice_presets = merge_libraries(*self.libraries)
+            self.preset_list.set_presets(self.voice_presets)
+            self.status_label.config(text=f"Loaded presets from {os.path.basename(filename)} "
+                                          f"({len(self.preset_list.index)} presets)")
+    
+    def toggle_audition(self):
+        if self.audition is not None:
+            self.stop_audition()
+            self.status_label.config(text="Render all cancelled")
+        else:
+            self.start_audition()
+    
+    def start_audition(self):
         if self.audio_data is None:
             messagebox.showwarning("No Audio", "Please load or record audio first")
             return
         
-        try:
-            audio = self.original_audio.copy()
-            
-            # Apply effects based on parameters
-            pitch = params.get("pitch", 1.0)
-            bass = params.get("bass", 1.0)
-            reverb = params.get("reverb", 0.0)
-            
-            if pitch != 1.0:
-                audio = self.change_pitch(audio, pitch)
-            
-            if bass > 1.0:
-                audio = self.bass_boost(audio, bass)
-            
-            if "bandpass" in params:
-                low, high = params["bandpass"]
-                audio = self.bandpass_filter(audio, low, high)
-            
-            if reverb > 0:
-                audio = self.add_reverb(audio, reverb)
-            
-            if params.get("robotic"):
-                audio = self.robot_effect(audio)
-            
-            if params.get("raspy", 0) > 0:
-                audio = self.add_rasp(audio, params["raspy"])
-            
-            if params.get("distortion", 0) > 0:
-                audio = self.add_distortion(audio, params["distortion"])
-            
-            # Normalize
-            audio = audio / (np.max(np.abs(audio)) + 0.0001)
-            
-            self.processed_audio = audio
-            self.play_effect_btn.config(state=tk.NORMAL)
-            self.current_effect_label.config(text=f"Effect: {name}")
-            self.status_label.config(text=f"Applied: {name}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to apply effect:\n{str(e)}")
+        presets = [(name, params) for voices in self.voice_presets.values() for name, params in voices
+                   if not self.render_cache.has(self.source_key, params)]
+        segments = None
+        if self.skip_silence.get():
+            segments = activity.segment_map(self.original_audio, self.sample_rate, self.source_key)
+        self.audition = AuditionGrid(self.original_audio, self.sample_rate, presets, segments=segments)
+        self.audition_key = self.source_key
+        self.audition_total = len(presets)
+        self.audition_ready = 0
+        self.audition.start()
+        self.audition_btn.config(text="⏹ Cancel", bg="#ff6b6b")
+        self.status_label.config(text=f"Rendering all {len(presets)} presets...")
+        self.root.after(50, self.poll_audition)
+    
+    def stop_audition(self):
+        if self.audition is not None:
+            self.audition.cancel()
+            self.audition = None
+            self.audition_btn.config(text="🎛️ Render All", bg="#6c5ce7")
     
-    def apply_custom(self):
+    def poll_audition(self):
+        audition = self.audition
+        if audition is None:
+            return
+        
+        for event in audition.poll():
+            if event[0] == "done":
+                _, name, params, audio, seconds = event
+                self.render_cache.put(self.audition_key, params, audio)
+                self.audition_ready += 1
+                self.preset_list.set_mark(name, "done")
+                self.status_label.config(
+                    text=f"Render all: {self.audition_ready}/{self.audition_total} ready ({name} {seconds:.1f}s)")
+            elif event[0] == "error":
+                self.preset_list.set_mark(event[1], "error")
+            elif event[0] == "finished":
+                self.status_label.config(
+                    text=f"Rendered {self.audition_ready}/{self.audition_total} presets in {event[1]:.1f}s"
+                         " - click any to hear it")
+                self.audition = None
+                self.audition_btn.config(text="🎛️ Render All", bg="#6c5ce7")
+                return
+        
+        self.root.after(50, self.poll_audition)
+    
+    def apply_preset(self, name, params):
+        self.current_params = params
+        if self.live_monitor is not None:
+            self.live_monitor.set_params(params)
+            self.current_effect_label.config(text=f"Effect: {name}")
+        
         if self.audio_data is None:
+            if self.live_monitor is not None:
+                return
             messagebox.showwarning("No Audio", "Please load or record audio first")
             return
         
-        try:
-            audio = self.original_audio.copy()
-            
-            pitch = self.pitch_var.get()
-            bass = self.bass_var.get()
-            reverb = self.reverb_var.get()
-            speed = self.speed_var.get()
-            grit = self.grit_var.get()
-            
-            if pitch != 1.0:
-                audio = self.change_pitch(audio, pitch)
-            
-            if bass > 1.0:
-                audio = self.bass_boost(audio, bass)
-            
-            if reverb > 0:
-                audio = self.add_reverb(audio, reverb)
-            
-            if speed != 1.0:
-                audio = self.change_speed(audio, speed)
-            
-            if grit > 0:
-                audio = self.add_rasp(audio, grit)
-            
-            audio = audio / (np.max(np.abs(audio)) + 0.0001)
-            
-            self.processed_audio = audio
-            self.play_effect_btn.config(state=tk.NORMAL)
+        self.start_render(name, params)
+    
+    def custom_params(self):
+        return {
+            "pitch": self.pitch_var.get(),
+            "bass": self.bass_var.get(),
+            "reverb": self.reverb_var.get(),
+            "speed": self.speed_var.get(),
+            "raspy": self.grit_var.get(),
+        }
+    
+    def apply_custom(self, live=False):
+        self.current_params = self.custom_params()
+        if self.live_monitor is not None:
+            self.live_monitor.set_params(self.current_params)
             self.current_effect_label.config(text=f"Effect: Custom")
-            self.status_label.config(text="Applied custom settings")
+        
+        if self.audio_data is None:
+            if self.live_monitor is not None or live:
+                return
+            messagebox.showwarning("No Audio", "Please load or record audio first")
+            return
+        
+        self.start_render("Custom", self.current_params, preview=live)
+    
+    def preview_region(self):
+        # The part of the clip the user is listening to or looking at
+        length = int(PREVIEW_SECONDS * self.sample_rate)
+        if len(self.original_audio) < 2 * length:
+            return None
+        start = self.waveform.playhead if self.waveform.playhead is not None else self.waveform.view_start
+        start = min(max(int(start), 0), len(self.original_audio) - length)
+        return start, start + length
+    
+    def start_render(self, name, params, preview=False, full=True):
+        cached = self.render_cache.get(self.source_key, params)
+        if cached is not None:
+            self.render_worker.cancel()
+            self.show_render(name, cached, cached=True)
+            return
+        
+        self.render_worker.submit(name, params, self.original_audio, self.sample_rate, key=self.source_key,
+                                  preview=self.preview_region() if preview else None,
+                                  skip_silence=self.skip_silence.get(), full=full)
+        self.status_label.config(text=f"Rendering {name}...")
+        if not self.render_polling:
+            self.render_polling = True
+            self.root.after(30, self.poll_render)
+    
+    def show_render(self, name, audio, cached=False, profile=None):
+        self.processed_audio = audio
+        self.waveform.set_track("processed", audio, self.sample_rate)
+        self.play_effect_btn.config(state=tk.NORMAL)
+        self.current_effect_label.config(text=f"Effect: {name}")
+        if profile is not None:
+            self.profile_label.config(text=profile.summary())
+        elif cached:
+            self.profile_label.config(text="cached render")
+        status = "Applied custom settings" if name == "Custom" else f"Applied: {name}"
+        if cached:
+            stats = self.render_cache.stats()
+            status += f" (cached - {stats['hits']} hits, {stats['bytes'] / 1e6:.0f} MB)"
+        self.status_label.config(text=status)
+    
+    def poll_render(self):
+        for event in self.render_worker.poll():
+            kind, job = event[0], event[1]
+            if job.cancelled:
+                continue
             
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to apply effect:\n{str(e)}")
-    
-    def change_pitch(self, audio, factor):
-        indices = np.round(np.arange(0, len(audio), factor))
-        indices = indices[indices < len(audio)].astype(int)
-        return audio[indices]
-    
-    def change_speed(self, audio, factor):
-        indices = np.round(np.arange(0, len(audio), factor))
-        indices = indices[indices < len(audio)].astype(int)
-        return audio[indices]
-    
-    def bass_boost(self, audio, factor):
-        nyquist = self.sample_rate / 2
-        cutoff = 200 / nyquist
-        b, a = signal.butter(4, cutoff, btype='low')
-        bass = signal.filtfilt(b, a, audio)
-        return audio + bass * (factor - 1)
-    
-    def bandpass_filter(self, audio, lowcut, highcut):
-        nyquist = self.sample_rate / 2
-        low = lowcut / nyquist
-        high = highcut / nyquist
-        b, a = signal.butter(4, [low, high], btype='band')
-        return signal.filtfilt(b, a, audio)
-    
-    def robot_effect(self, audio):
-        carrier_freq = 30
-        t = np.arange(len(audio)) / self.sample_rate
-        carrier = np.sin(2 * np.pi * carrier_freq * t)
-        return audio * carrier
-    
-    def add_reverb(self, audio, amount):
-        delay_samples = int(0.05 * self.sample_rate)
-        reverb = np.zeros(len(audio) + delay_samples)
-        reverb[:len(audio)] = audio
-        
-        for i in range(3):
-            delay = int((0.05 + i * 0.03) * self.sample_rate)
-            decay = amount * (0.6 ** i)
-            if len(audio) + delay <= len(reverb):
-                reverb[delay:delay+len(audio)] += audio * decay
-        
-        return reverb[:len(audio)]
-    
-    def add_rasp(self, audio, amount):
-        noise = np.random.normal(0, 0.05 * amount, len(audio))
-        distorted = np.tanh(audio * (1 + amount))
-        return audio * (1 - amount * 0.3) + distorted * amount * 0.3 + noise
-    
-    def add_distortion(self, audio, amount):
-        return np.tanh(audio * (1 + amount * 2))
+            if kind == "progress":
+                self.status_label.config(text=f"Rendering {job.name}... {event[3]:.0%} ({event[2]})")
+            elif kind == "preview":
+                start, end = job.preview
+                self.waveform.set_track("processed", job.preview_result, self.sample_rate,
+                                        offset=int(start / job.params.get("speed", 1.0)))
+                self.status_label.config(
+                    text=f"Preview {start / self.sample_rate:.1f}-{end / self.sample_rate:.1f}s "
+                         f"in {job.preview_seconds * 1000:.0f} ms" + (" - rendering the rest..." if job.full else ""))
+            elif kind == "done":
+                self.render_cache.put(job.key, job.params, job.result)
+                self.show_render(job.name, job.result, profile=job.profile)
+            elif kind == "error":
+                messagebox.showerror("Error", f"Failed to apply effect:\n{str(event[2])}")
+        
+        if self.render_worker.busy or not self.render_worker.events.empty():
+            self.root.after(30, self.poll_render)
+        else:
+            self.render_polling = False
     
     def play_audio(self, audio_type):
         if self.is_playing:
@@ -579,6 +858,9 @@ class VoiceEffectsStudio:
         self.is_playing = True
         self.stop_btn.config(state=tk.NORMAL)
         self.status_label.config(text="Playing audio...")
+        self.play_started = time.perf_counter()
+        self.play_frames = len(audio)
+        self.update_playhead()
         
         def play():
             sd.play(audio, self.sample_rate)
@@ -590,6 +872,14 @@ class VoiceEffectsStudio:
         import threading
         threading.Thread(target=play, daemon=True).start()
     
+    def update_playhead(self):
+        frame = int((time.perf_counter() - self.play_started) * self.sample_rate)
+        if not self.is_playing or frame >= self.play_frames:
+            self.waveform.set_playhead(None)
+            return
+        self.waveform.set_playhead(frame)
+        self.root.after(40, self.update_playhead)
+    
     def stop_audio(self):
         sd.stop()
         self.is_playing = False
@@ -597,29 +887,78 @@ class VoiceEffectsStudio:
         self.status_label.config(text="Playback stopped")
     
     def export_audio(self):
+        if self.exporter is not None:
+            self.exporter.cancel()
+            return
+        
         if self.processed_audio is None:
             messagebox.showwarning("No Effect", "Apply an effect first before exporting")
             return
         
+        formats = [name for name, var in self.export_formats.items() if var.get()]
+        if not formats:
+            messagebox.showwarning("No Format", "Pick at least one format to export")
+            return
+        
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        default_name = f"voice_effect_{timestamp}.wav"
+        default_name = f"voice_effect_{timestamp}"
         
         filename = filedialog.asksaveasfilename(
-            defaultextension=".wav",
-            filetypes=[("WAV files", "*.wav")],
+            title="Export as " + " + ".join(formats),
+            filetypes=[("Audio files", "*.wav *.flac *.ogg")],
             initialfile=default_name,
             initialdir=self.output_path
         )
         
         if filename:
-            try:
-                sf.write(filename, self.processed_audio, self.sample_rate)
-                messagebox.showinfo("Success", f"Audio saved to:\n{filename}")
-                self.status_label.config(text=f"Exported: {os.path.basename(filename)}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to save audio:\n{str(e)}")
+            base = os.path.splitext(filename)[0]
+            depth = {"16-bit": "PCM_16", "24-bit": "PCM_24", "32-bit float": "FLOAT"}[self.export_depth.get()]
+            targets = targets_for(base, formats, depth, self.export_dither.get())
+            audio = self.processed_audio
+            if self.trim_export.get():
+                audio = activity.trim(audio, self.sample_rate)
+            self.exporter = Exporter(audio, self.sample_rate, targets)
+            self.exporter.start()
+            self.export_btn.config(text="⏹ Cancel Export", bg="#ff6b6b")
+            self.root.after(50, self.poll_export)
+    
+    def poll_export(self):
+        for event in self.exporter.poll():
+            if event[0] == "progress":
+                self.status_label.config(text=f"Exporting... {event[1]:.0%}")
+            elif event[0] == "done":
+                names = ", ".join(os.path.basename(r["path"]) for r in event[1])
+                self.status_label.config(text=f"Exported: {names}")
+                messagebox.showinfo("Success", "Audio saved to:\n" + "\n".join(r["path"] for r in event[1]))
+            elif event[0] == "cancelled":
+                self.status_label.config(text="Export cancelled")
+            elif event[0] == "error":
+                messagebox.showerror("Error", f"Failed to save audio:\n{str(event[1])}")
+        
+        if self.exporter.busy or not self.exporter.events.empty():
+            self.root.after(50, self.poll_export)
+        else:
+            self.exporter = None
+            self.export_btn.config(text="💾 Export", bg="#4CAF50")
 
 if __name__ == "__main__":
+    import argparse
+    import json
+    
+    parser = argparse.ArgumentParser(description="Voice Effects Studio")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print startup timings as JSON once the audio engine is ready, then exit")
+    parser.add_argument("--presets", action="append", default=[], metavar="FILE",
+                        help="load a JSON or TOML preset library (repeatable)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="add per-stage peak allocations to render profiles (slows renders down)")
+    args = parser.parse_args()
+    
     root = tk.Tk()
-    app = VoiceEffectsStudio(root)
+    app = VoiceEffectsStudio(root, args.presets, args.trace_memory)
+    if args.startup_report:
+        def report():
+            print(json.dumps({key: round(value, 4) for key, value in app.startup_times.items()}))
+            root.destroy()
+        app.on_ready = report
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,362 @@
+import threading
+import tkinter as tk
+
+import numpy as np
+
+BASE_BUCKET = 64
+LEVEL_FACTOR = 4
+BUILD_CHUNK = 1 << 20
+SPECTROGRAM_FFT = 512
+
+
+class _Level:
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.mins = np.zeros(256, dtype=np.float32)
+        self.maxs = np.zeros(256, dtype=np.float32)
+        self.sumsq = np.zeros(256, dtype=np.float32)
+        self.size = 0
+        self.reduced = 0
+    
+    def extend(self, mins, maxs, sumsq):
+        needed = self.size + len(mins)
+        if needed > len(self.mins):
+            capacity = max(needed, 2 * len(self.mins))
+            for name in ("mins", "maxs", "sumsq"):
+                grown = np.zeros(capacity, dtype=np.float32)
+                grown[:self.size] = getattr(self, name)[:self.size]
+                setattr(self, name, grown)
+        self.mins[self.size:needed] = mins
+        self.maxs[self.size:needed] = maxs
+        self.sumsq[self.size:needed] = sumsq
+        self.size = needed
+
+
+class LevelPyramid:
+    # Min, max and sum of squares per bucket of BASE_BUCKET samples, then
+    # per LEVEL_FACTOR buckets of the level below, and so on. append() only
+    # touches new samples, so it can follow a recording as it grows, and a
+    # view of any range reads about one bucket per pixel.
+    def __init__(self, sample_rate, base=BASE_BUCKET, factor=LEVEL_FACTOR):
+        self.sample_rate = sample_rate
+        self.factor = factor
+        self.levels = [_Level(base)]
+        self.partial = np.zeros(0, dtype=np.float32)
+        self.frames = 0
+        self.lock = threading.Lock()
+    
+    @classmethod
+    def from_audio(cls, audio, sample_rate):
+        pyramid = cls(sample_rate)
+        for start in range(0, len(audio), BUILD_CHUNK):
+            pyramid.append(audio[start:start + BUILD_CHUNK])
+        return pyramid
+    
+    def append(self, samples):
+        with self.lock:
+            self.frames += len(samples)
+            if len(self.partial):
+                samples = np.concatenate([self.partial, samples])
+            bucket = self.levels[0].bucket
+            full = len(samples) // bucket * bucket
+            blocks = samples[:full].reshape(-1, bucket)
+            self.partial = np.array(samples[full:], dtype=np.float32)
+            if len(blocks):
+                self._extend(0, blocks.min(axis=1), blocks.max(axis=1), np.einsum('ij,ij->i', blocks, blocks))
+    
+    def _extend(self, index, mins, maxs, sumsq):
+        level = self.levels[index]
+        level.extend(mins, maxs, sumsq)
+        groups = (level.size - level.reduced) // self.factor
+        if groups == 0:
+            return
+        end = level.reduced + groups * self.factor
+        shape = (groups, self.factor)
+        if index + 1 == len(self.levels):
+            self.levels.append(_Level(level.bucket * self.factor))
+        lo = level.reduced
+        level.reduced = end
+        self._extend(index + 1,
+                     level.mins[lo:end].reshape(shape).min(axis=1),
+                     level.maxs[lo:end].reshape(shape).max(axis=1),
+                     level.sumsq[lo:end].reshape(shape).sum(axis=1))
+    
+    def view(self, start, end, pixels, audio=None):
+        # (mins, maxs, rms) for about `pixels` columns covering [start, end)
+        start, end = max(int(start), 0), min(int(end), self.frames)
+        if end <= start or pixels <= 0:
+            empty = np.zeros(0, dtype=np.float32)
+            return empty, empty, empty
+        per_pixel = (end - start) / pixels
+        
+        if per_pixel < self.levels[0].bucket and audio is not None:
+            # Zoomed in past the finest level: read the samples themselves
+            samples = np.asarray(audio[start:end], dtype=np.float32)
+            if len(samples) <= pixels:
+                return samples, samples, np.abs(samples)
+            edges = np.linspace(0, len(samples), pixels + 1).astype(np.int64)[:-1]
+            return (np.minimum.reduceat(samples, edges), np.maximum.reduceat(samples, edges),
+                    np.sqrt(np.add.reduceat(samples * samples, edges) / np.diff(np.append(edges, len(samples)))))
+        
+        with self.lock:
+            level = self.levels[0]
+            for candidate in self.levels:
+                if candidate.bucket <= per_pixel and candidate.size:
+                    level = candidate
+            first = start // level.bucket
+            last = min(-(-end // level.bucket), level.size)
+            if last <= first:
+                empty = np.zeros(0, dtype=np.float32)
+                return empty, empty, empty
+            count = min(pixels, last - first)
+            edges = np.linspace(first, last, count + 1).astype(np.int64)
+            offsets = edges[:-1] - first
+            mins = np.minimum.reduceat(level.mins[first:last], offsets)
+            maxs = np.maximum.reduceat(level.maxs[first:last], offsets)
+            sumsq = np.add.reduceat(level.sumsq[first:last], offsets)
+        rms = np.sqrt(sumsq / (np.diff(edges) * level.bucket))
+        return mins, maxs, rms
+
+
+def spectrogram_columns(audio, start, end, columns, rows, n_fft=SPECTROGRAM_FFT):
+    # One short FFT per pixel column, so the cost depends on the view size
+    # rather than the clip length. Returns a (rows, columns) uint8 image,
+    # low frequencies at the bottom.
+    centers = np.linspace(start, end, columns, endpoint=False).astype(np.int64)
+    index = np.clip(centers[:, None] - n_fft // 2 + np.arange(n_fft), 0, len(audio) - 1)
+    frames = np.asarray(audio[index.ravel()], dtype=np.float32).reshape(columns, n_fft)
+    frames *= np.hanning(n_fft).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames, axis=1)) ** 2
+    db = 10 * np.log10(power + 1e-10)
+    bins = np.linspace(0, power.shape[1] - 1, rows).astype(np.int64)[::-1]
+    level = np.clip((db[:, bins].T + 80) / 80, 0, 1)
+    return (level * 255).astype(np.uint8)
+
+
+def _palette():
+    # Dark background through cyan to yellow, matching the app colours
+    stops = np.array([(0x1a, 0x1a, 0x2e), (0x0f, 0x34, 0x60), (0x00, 0xd9, 0xff), (0xfe, 0xca, 0x57)], dtype=float)
+    positions = np.linspace(0, 255, len(stops))
+    channels = [np.interp(np.arange(256), positions, stops[:, c]).astype(int) for c in range(3)]
+    return [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in zip(*channels)]
+
+
+PALETTE = _palette()
+
+
+class WaveformView(tk.Frame):
+    TRACKS = (("original", "Original", "#00d9ff"), ("processed", "With Effect", "#feca57"))
+    
+    def __init__(self, parent, height=170):
+        super().__init__(parent, bg="#0f3460", relief=tk.RAISED, bd=2)
+        self.tracks = {key: None for key, _, _ in self.TRACKS}
+        self.view_start = 0
+        self.view_span = 0
+        self.playhead = None
+        self.images = {}
+        self.drag_x = None
+        self.spectrogram = tk.BooleanVar(value=False)
+        
+        header = tk.Frame(self, bg="#0f3460")
+        header.pack(fill=tk.X, padx=10, pady=(6, 0))
+        tk.Label(header, text="〰️ Waveform", font=("Papyrus", 10, "bold"),
+                 bg="#0f3460", fg="#00d9ff").pack(side=tk.LEFT)
+        tk.Button(header, text="Fit", command=self.fit,
+                  bg="#636e72", fg="white", font=("Papyrus", 8),
+                  relief=tk.FLAT, padx=8).pack(side=tk.RIGHT)
+        tk.Checkbutton(header, text="Spectrogram", variable=self.spectrogram, command=self.redraw,
+                       bg="#0f3460", fg="#95afc0", selectcolor="#1a1a2e", activebackground="#0f3460",
+                       font=("Papyrus", 8)).pack(side=tk.RIGHT, padx=8)
+        self.position_label = tk.Label(header, text="", font=("Papyrus", 8), bg="#0f3460", fg="#95afc0")
+        self.position_label.pack(side=tk.RIGHT, padx=8)
+        
+        self.canvas = tk.Canvas(self, height=height, bg="#1a1a2e", highlightthickness=0)
+        self.canvas.pack(fill=tk.X, padx=10, pady=(4, 0))
+        self.scrollbar = tk.Scrollbar(self, orient=tk.HORIZONTAL, command=self.on_scroll)
+        self.scrollbar.pack(fill=tk.X, padx=10, pady=(0, 6))
+        
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Button-4>", lambda e: self.zoom(0.8, e.x))
+        self.canvas.bind("<Button-5>", lambda e: self.zoom(1.25, e.x))
+        self.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+    
+    @property
+    def total_frames(self):
+        return max((track["offset"] + track["pyramid"].frames for track in self.tracks.values() if track),
+                   default=0)
+    
+    @property
+    def sample_rate(self):
+        for track in self.tracks.values():
+            if track:
+                return track["pyramid"].sample_rate
+        return None
+    
+    def set_track(self, key, audio, sample_rate, pyramid=None, offset=0):
+        # offset places a partial track (a preview of part of the clip) at
+        # that frame of the timeline. Multichannel tracks show their mix.
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1, dtype=np.float32)
+        if pyramid is None or pyramid.frames != len(audio):
+            pyramid = LevelPyramid.from_audio(audio, sample_rate)
+        self.tracks[key] = {"audio": audio, "pyramid": pyramid, "offset": offset}
+        if key == "original":
+            self.fit()
+        else:
+            self.redraw()
+    
+    def start_live_track(self, key, sample_rate):
+        # A pyramid without samples behind it yet; the recorder appends to it
+        pyramid = LevelPyramid(sample_rate)
+        self.tracks[key] = {"audio": None, "pyramid": pyramid, "offset": 0}
+        self.view_start, self.view_span = 0, 0
+        return pyramid
+    
+    def clear_track(self, key):
+        self.tracks[key] = None
+        self.redraw()
+    
+    def fit(self):
+        self.view_start, self.view_span = 0, self.total_frames
+        self.redraw()
+    
+    def follow(self):
+        # While recording, show everything captured so far
+        self.view_start, self.view_span = 0, max(self.total_frames, 1)
+        self.redraw()
+    
+    def zoom(self, factor, x):
+        total = self.total_frames
+        width = max(self.canvas.winfo_width(), 1)
+        if not total:
+            return
+        anchor = self.view_start + self.view_span * x / width
+        span = int(min(max(self.view_span * factor, width), total))
+        self.view_start = int(min(max(anchor - span * x / width, 0), total - span))
+        self.view_span = span
+        self.redraw()
+    
+    def on_wheel(self, event):
+        if event.state & 0x1:
+            self.pan(-event.delta / 120 * self.view_span * 0.1)
+        else:
+            self.zoom(0.8 if event.delta > 0 else 1.25, event.x)
+    
+    def on_press(self, event):
+        self.drag_x = event.x
+    
+    def on_drag(self, event):
+        width = max(self.canvas.winfo_width(), 1)
+        self.pan((self.drag_x - event.x) * self.view_span / width)
+        self.drag_x = event.x
+    
+    def pan(self, frames):
+        total = self.total_frames
+        self.view_start = int(min(max(self.view_start + frames, 0), max(total - self.view_span, 0)))
+        self.redraw()
+    
+    def on_scroll(self, action, value, unit=None):
+        total = self.total_frames
+        if not total:
+            return
+        if action == "moveto":
+            self.view_start = int(float(value) * total)
+            self.pan(0)
+        else:
+            step = self.view_span if unit == "pages" else self.view_span * 0.1
+            self.pan(int(value) * step)
+    
+    def set_playhead(self, frame):
+        self.playhead = frame
+        self.canvas.delete("playhead")
+        if frame is None or not self.view_span:
+            return
+        if not self.view_start <= frame < self.view_start + self.view_span:
+            # Page the view along with playback
+            self.view_start = int(min(frame, max(self.total_frames - self.view_span, 0)))
+            self.redraw()
+            return
+        self._draw_playhead()
+    
+    def _draw_playhead(self):
+        width = self.canvas.winfo_width()
+        x = (self.playhead - self.view_start) * width / self.view_span
+        self.canvas.create_line(x, 0, x, self.canvas.winfo_height(), fill="#ff6b6b", width=2, tags="playhead")
+    
+    def redraw(self):
+        self.canvas.delete("all")
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        total = self.total_frames
+        if width < 2 or not total:
+            self.scrollbar.set(0, 1)
+            self.position_label.config(text="")
+            return
+        if not self.view_span:
+            self.view_span = total
+        self.view_span = min(self.view_span, total)
+        end = self.view_start + self.view_span
+        row_height = height / len(self.TRACKS)
+        
+        for row, (key, label, color) in enumerate(self.TRACKS):
+            top = row * row_height
+            track = self.tracks[key]
+            if track is None:
+                self.canvas.create_text(8, top + 4, text=label, anchor=tk.NW, fill="#636e72", font=("Papyrus", 8))
+                continue
+            if self.spectrogram.get() and track["audio"] is not None and len(track["audio"]):
+                self._draw_spectrogram(key, track, end, width, top, row_height)
+            else:
+                self._draw_wave(track, end, width, top, row_height, color)
+            self.canvas.create_text(8, top + 4, text=label, anchor=tk.NW, fill=color, font=("Papyrus", 8))
+        self.canvas.create_line(0, row_height, width, row_height, fill="#16213e")
+        
+        self.scrollbar.set(self.view_start / total, end / total)
+        sample_rate = self.sample_rate
+        self.position_label.config(text=f"{self.view_start / sample_rate:.2f}s - {end / sample_rate:.2f}s")
+        if self.playhead is not None:
+            self._draw_playhead()
+    
+    def _track_span(self, track, end, width):
+        # Where a track starts within the view: (first frame in the track,
+        # last frame in the track, x of the first frame, pixels to the right)
+        offset = track["offset"]
+        first = max(self.view_start, offset)
+        x0 = (first - self.view_start) * width / self.view_span
+        return first - offset, end - offset, x0, max(int(round(width - x0)), 1)
+    
+    def _draw_wave(self, track, end, width, top, row_height, color):
+        start, stop, x0, pixels = self._track_span(track, end, width)
+        if stop <= start:
+            return
+        mins, maxs, rms = track["pyramid"].view(start, stop, pixels, track["audio"])
+        if not len(mins):
+            return
+        middle = top + row_height / 2
+        scale = row_height / 2 - 2
+        # Columns cover the part of the view this track actually has
+        covered = min(stop, track["pyramid"].frames) - start
+        xs = x0 + np.arange(len(mins)) * (covered / (stop - start)) * pixels / len(mins)
+        # One zigzag polyline per layer keeps it to two canvas items
+        peak = np.empty(4 * len(mins))
+        peak[0::4], peak[1::4] = xs, middle - maxs * scale
+        peak[2::4], peak[3::4] = xs, middle - mins * scale
+        body = np.empty(4 * len(rms))
+        body[0::4], body[1::4] = xs, middle - rms * scale
+        body[2::4], body[3::4] = xs, middle + rms * scale
+        if len(mins) > 1:
+            self.canvas.create_line(*peak.tolist(), fill=color, width=1)
+            self.canvas.create_line(*body.tolist(), fill="#ffffff", width=1)
+    
+    def _draw_spectrogram(self, key, track, end, width, top, row_height):
+        start, stop, x0, columns = self._track_span(track, end, width)
+        audio = track["audio"]
+        if min(stop, len(audio)) <= start:
+            return
+        rows = max(int(row_height), 1)
+        pixels = spectrogram_columns(audio, start, min(stop, len(audio)), columns, rows)
+        image = tk.PhotoImage(width=columns, height=rows)
+        image.put(" ".join("{" + " ".join(PALETTE[v] for v in row) + "}" for row in pixels))
+        self.images[key] = image
+        self.canvas.create_image(x0, top, image=image, anchor=tk.NW)
\ No newline at end of file